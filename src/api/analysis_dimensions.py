@@ -0,0 +1,153 @@
+import copy
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+DEFAULT_ANALYSIS_MODEL = "gemini-2.5-flash-preview-05-20"
+
+@dataclass(frozen=True)
+class AnalysisDimension:
+    """One model call of a multi-call analysis, described declaratively."""
+    name: str
+    # Prompt template file in src/prompts/prompt_templates
+    template: str
+    # Top-level keys of the model's JSON response that this dimension contributes
+    output_keys: Tuple[str, ...]
+    # Result per output key, used when the call fails or leaves the key out
+    fallback: Dict[str, Dict[str, Any]]
+    # Output keys whose "score" counts towards the overall score
+    score_fields: Tuple[str, ...] = ()
+    model: str = DEFAULT_ANALYSIS_MODEL
+    # Dimensions whose results this dimension's prompt needs
+    depends_on: Tuple[str, ...] = ()
+
+@dataclass
+class DimensionOutcome:
+    """The results of one dimension, and which of its output keys fell back."""
+    results: Dict[str, Any]
+    fallback_keys: Tuple[str, ...] = ()
+
+DimensionRunner = Callable[[AnalysisDimension, Dict[str, Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+def validate_dimensions(dimensions: Sequence[AnalysisDimension]) -> None:
+    """
+    Check that dimension names are unique, dependencies exist and there are no cycles.
+
+    Raises:
+        ValueError: If the dimensions do not form a valid graph.
+    """
+    by_name = {}
+    for dimension in dimensions:
+        if dimension.name in by_name:
+            raise ValueError(f"Duplicate analysis dimension: {dimension.name}")
+        by_name[dimension.name] = dimension
+
+    for dimension in dimensions:
+        missing_fallbacks = set(dimension.output_keys) - set(dimension.fallback)
+        if missing_fallbacks:
+            raise ValueError(f"Analysis dimension {dimension.name} has no fallback for {sorted(missing_fallbacks)}")
+        for dependency in dimension.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Analysis dimension {dimension.name} depends on unknown dimension {dependency}")
+
+    # Depth-first search for cycles: "visiting" nodes are on the current path
+    state: Dict[str, str] = {}
+
+    def visit(name: str, path: List[str]) -> None:
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Analysis dimensions form a cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        for dependency in by_name[name].depends_on:
+            visit(dependency, path + [name])
+        state[name] = "done"
+
+    for dimension in dimensions:
+        visit(dimension.name, [])
+
+async def run_dimensions(
+    dimensions: Sequence[AnalysisDimension],
+    run: DimensionRunner,
+    max_concurrency: int = 5,
+    fatal_errors: Tuple[Type[BaseException], ...] = (),
+    logger: Optional[logging.Logger] = None
+) -> Dict[str, DimensionOutcome]:
+    """
+    Run analysis dimensions concurrently, each as soon as its dependencies are done.
+
+    Args:
+        dimensions: The dimensions to run (see `validate_dimensions`).
+        run: Coroutine function called with a dimension and the results of its
+            dependencies, returning the dimension's parsed results.
+        max_concurrency: Maximum number of dimensions running at once.
+        fatal_errors: Exception types raised by `run` that fail the whole run instead
+            of falling back, e.g. a prompt template error: it would fail every request
+            the same way, so it must surface rather than look like a model failure.
+        logger: Custom logger instance. If None, will create a new one.
+
+    Returns:
+        Dict[str, DimensionOutcome]: The outcome of every dimension, by dimension name.
+        Output keys of a failed dimension, or missing from its results, get their fallback.
+
+    Raises:
+        Exception: The first of `fatal_errors` raised by `run`; the other dimensions are cancelled.
+    """
+    logger = logger or logging.getLogger(__name__)
+    validate_dimensions(dimensions)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_dimension(dimension: AnalysisDimension) -> DimensionOutcome:
+        # Wait for dependencies before taking a slot, so waiting never holds one
+        dependency_results = {}
+        for dependency in dimension.depends_on:
+            dependency_results[dependency] = (await tasks[dependency]).results
+
+        async with semaphore:
+            logger.info(f"Starting {dimension.name} analysis...")
+            try:
+                results = await run(dimension, dependency_results)
+            except fatal_errors:
+                raise
+            except Exception as e:
+                logger.error(f"{dimension.name} analysis failed: {e}", exc_info=True)
+                results = {}
+
+        results = dict(results) if isinstance(results, dict) else {}
+        fallback_keys = tuple(key for key in dimension.output_keys if not isinstance(results.get(key), dict))
+        for key in fallback_keys:
+            results[key] = copy.deepcopy(dimension.fallback[key])
+        if fallback_keys:
+            logger.warning(f"{dimension.name} analysis fell back for {', '.join(fallback_keys)}")
+        else:
+            logger.info(f"{dimension.name} analysis completed")
+        return DimensionOutcome(results=results, fallback_keys=fallback_keys)
+
+    # Tasks are created in declaration order; dependencies are looked up lazily,
+    # so every task exists before any of them first awaits another
+    for dimension in dimensions:
+        tasks[dimension.name] = asyncio.create_task(run_dimension(dimension))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        # Let the cancelled tasks finish, so none keeps running or leaves an unretrieved error
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
+
+def collect_scores(dimensions: Sequence[AnalysisDimension], outcomes: Dict[str, DimensionOutcome]) -> List[float]:
+    """Return the model-given scores of every dimension's score fields; fallbacks are left out."""
+    scores = []
+    for dimension in dimensions:
+        outcome = outcomes[dimension.name]
+        for key in dimension.score_fields:
+            if key in outcome.fallback_keys:
+                continue
+            value = outcome.results.get(key)
+            if isinstance(value, dict) and isinstance(value.get("score"), (int, float)):
+                scores.append(value["score"])
+    return scores
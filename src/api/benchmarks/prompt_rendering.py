@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of prompt template rendering.
+
+Compares, per comparison template, the previous approach (read the file from disk,
+then one `str.replace` pass per placeholder) with the precompiled templates of
+`PromptTemplateRegistry` (one `format_map` pass, plus an mtime check). Both must
+produce the same prompt; the benchmark checks that before timing them.
+
+Usage (from src/api):
+    python benchmarks/prompt_rendering.py --number 2000
+"""
+
+import os
+import sys
+import timeit
+import argparse
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_registry import PromptTemplateRegistry
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "prompts", "prompt_templates")
+TEMPLATES = [
+    "comparison_translation_analysis.md",
+    "comparison_cultural_analysis.md",
+    "comparison_technical_analysis.md",
+    "comparison_visual_analysis.md",
+    "comparison_seo_aso_analysis.md",
+]
+FIELDS = [
+    "language", "country", "title", "short_description", "long_description", "developer",
+    "category", "price", "last_updated", "screenshots_count", "rating", "installs", "size",
+    "version", "content_rating", "has_feature_graphic", "icon_url",
+]
+
+
+def sample_values() -> Dict[str, str]:
+    """Placeholder values of a realistic listing pair (long descriptions near the 4000-character limit)."""
+    values = {}
+    for prefix, language, country in (("source", "en", "US"), ("target", "pt", "BR")):
+        for field in FIELDS:
+            values[f"{prefix}_{field}"] = f"{prefix} {field} value"
+        values[f"{prefix}_language"] = language
+        values[f"{prefix}_country"] = country
+        values[f"{prefix}_long_description"] = ("Plan your week, track habits and share lists. " * 85).strip()
+    return values
+
+
+def render_with_replace(template_name: str, values: Dict[str, str]) -> str:
+    """The previous approach: read the template, then replace each placeholder in turn."""
+    with open(os.path.join(TEMPLATE_DIR, template_name), "r") as f:
+        prompt = f.read()
+    for key, value in values.items():
+        prompt = prompt.replace("{{" + key + "}}", value)
+    return prompt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Renders per template and approach")
+    args = parser.parse_args()
+
+    values = sample_values()
+    registry = PromptTemplateRegistry(TEMPLATE_DIR)
+    for name in TEMPLATES:
+        registry.register(name, values)
+
+    total_replace = total_compiled = 0.0
+    print(f"{'template':<38} {'replace':>10} {'compiled':>10} {'speedup':>8}")
+    for name in TEMPLATES:
+        if registry.render(name, values) != render_with_replace(name, values):
+            raise SystemExit(f"Rendered prompts differ for {name}")
+        replace = timeit.timeit(lambda: render_with_replace(name, values), number=args.number) / args.number * 1e6
+        compiled = timeit.timeit(lambda: registry.render(name, values), number=args.number) / args.number * 1e6
+        total_replace += replace
+        total_compiled += compiled
+        print(f"{name:<38} {replace:8.1f}us {compiled:8.1f}us {replace / compiled:7.1f}x")
+    print(f"{'per /analyze-comparison request':<38} {total_replace:8.1f}us {total_compiled:8.1f}us {total_replace / total_compiled:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
@@ -14,6 +15,8 @@ from PIL import Image
 
 # Import the GeminiClient from the local vertex_libs file
 from vertex_libs import GeminiClient, TokenCount
+from prompt_registry import PromptTemplateError, PromptTemplateRegistry, find_template_directory
+from analysis_dimensions import DEFAULT_ANALYSIS_MODEL, AnalysisDimension, collect_scores, run_dimensions, validate_dimensions
 
 # Load environment variables
 load_dotenv()
@@ -249,13 +252,234 @@ app.add_middleware(
 )
 
 # --- Gemini Client Initialization ---
+# Region routing: a failing region is demoted for REGION_COOLDOWN_SECONDS, and every
+# region is probed every REGION_PROBE_INTERVAL seconds (0 disables probing)
+REGION_COOLDOWN_SECONDS = float(os.getenv("REGION_COOLDOWN_SECONDS", "60"))
+REGION_PROBE_INTERVAL = float(os.getenv("REGION_PROBE_INTERVAL", "30"))
+
+# Default models of /analyze and /analyze-app-listing (comparison dimensions declare their own)
+ANALYZE_DEFAULT_MODEL = "gemini-2.0-flash-001"
+APP_LISTING_DEFAULT_MODEL = DEFAULT_ANALYSIS_MODEL
+
+# Hedged requests (opt-in): a call still running after GEMINI_HEDGE_PERCENTILE of the
+# region's recent latency for the same model (or after GEMINI_HEDGE_DELAY_MS, if set) is
+# duplicated to the next-best region; at most GEMINI_HEDGE_BUDGET of calls may fire a hedge
+GEMINI_HEDGE_REQUESTS = os.getenv("GEMINI_HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+GEMINI_HEDGE_BUDGET = float(os.getenv("GEMINI_HEDGE_BUDGET", "0.1"))
+GEMINI_HEDGE_DELAY_MS = float(os.getenv("GEMINI_HEDGE_DELAY_MS")) if os.getenv("GEMINI_HEDGE_DELAY_MS") else None
+
 try:
-    gemini_client = GeminiClient(logger=logger)
+    gemini_client = GeminiClient(
+        logger=logger,
+        region_cooldown_seconds=REGION_COOLDOWN_SECONDS,
+        hedge_requests=GEMINI_HEDGE_REQUESTS,
+        hedge_percentile=GEMINI_HEDGE_PERCENTILE,
+        hedge_budget_ratio=GEMINI_HEDGE_BUDGET,
+        hedge_delay_ms=GEMINI_HEDGE_DELAY_MS
+    )
     logger.info(f"GeminiClient initialized successfully for project: {gemini_client.project_id}")
 except ValueError as e:
     logger.error(f"Failed to initialize GeminiClient: {e}")
     gemini_client = None
 
+# Open connections to the primary region at startup, so the first request does not pay for them
+GEMINI_WARM_UP = os.getenv("GEMINI_WARM_UP", "true").lower() in ("1", "true", "yes")
+
+@app.on_event("startup")
+async def warm_up_gemini_client():
+    if gemini_client and GEMINI_WARM_UP:
+        # In the background: startup does not wait for (or fail on) the warm-up call
+        app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(gemini_client.warm_up))
+
+async def probe_regions_periodically():
+    """Keep region latency fresh and re-admit demoted regions once they answer again."""
+    while True:
+        try:
+            await asyncio.to_thread(gemini_client.probe_regions, None, REGION_PROBE_MODELS)
+        except Exception as e:
+            logger.warning(f"Region probe round failed: {e}")
+        await asyncio.sleep(REGION_PROBE_INTERVAL)
+
+@app.on_event("startup")
+async def start_region_probes():
+    app.state.region_probe_task = None
+    if gemini_client and REGION_PROBE_INTERVAL > 0:
+        app.state.region_probe_task = asyncio.create_task(probe_regions_periodically())
+
+@app.on_event("shutdown")
+async def close_gemini_client():
+    if getattr(app.state, "region_probe_task", None):
+        app.state.region_probe_task.cancel()
+    if gemini_client:
+        gemini_client.close()
+
+# --- Comparison Analysis Dimensions ---
+# Maximum number of /analyze-comparison model calls in flight per request
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "5"))
+
+# Each dimension is one model call whose JSON results are merged into the comparison.
+# Add a dimension by adding an entry here (and its prompt template); use `depends_on`
+# when its prompt needs another dimension's results.
+COMPARISON_DIMENSIONS = [
+    AnalysisDimension(
+        name="translation",
+        template="comparison_translation_analysis.md",
+        output_keys=("translation_completeness", "translation_quality"),
+        score_fields=("translation_completeness", "translation_quality"),
+        fallback={
+            "translation_completeness": {
+                "score": 70, 
+                "details": "Unable to analyze translation completeness. The app title and descriptions should be fully translated for the target market.",
+                "missing_elements": ["Unable to determine - manual review needed"],
+                "evaluation_criteria": "Could not evaluate automatically"
+            },
+            "translation_quality": {
+                "score": 70, 
+                "details": "Unable to analyze translation quality. Professional translation with cultural adaptation is recommended.",
+                "issues": [],
+                "strengths": [],
+                "evaluation_criteria": "Could not evaluate automatically"
+            }
+        }
+    ),
+    AnalysisDimension(
+        name="cultural",
+        template="comparison_cultural_analysis.md",
+        output_keys=("cultural_adaptation",),
+        score_fields=("cultural_adaptation",),
+        fallback={
+            "cultural_adaptation": {
+                "score": 70, 
+                "details": "Cultural adaptation analysis could not be completed. Consider local market preferences and cultural sensitivities.",
+                "issues": [],
+                "strengths": [],
+                "market_insights": "Manual cultural review recommended",
+                "evaluation_criteria": "Could not evaluate automatically"
+            }
+        }
+    ),
+    AnalysisDimension(
+        name="technical",
+        template="comparison_technical_analysis.md",
+        output_keys=("technical_localization",),
+        score_fields=("technical_localization",),
+        fallback={
+            "technical_localization": {
+                "score": 75, 
+                "details": "Technical localization analysis could not be completed. Ensure date, time, currency, and number formats match local standards.",
+                "issues": [],
+                "compliant_elements": [],
+                "evaluation_criteria": "Could not evaluate automatically"
+            }
+        }
+    ),
+    AnalysisDimension(
+        name="visual",
+        template="comparison_visual_analysis.md",
+        output_keys=("visual_localization",),
+        score_fields=("visual_localization",),
+        fallback={
+            "visual_localization": {
+                "score": 75, 
+                "details": "Visual localization analysis could not be completed. Ensure all screenshots and graphics contain localized text.",
+                "untranslated_visuals": [],
+                "cultural_concerns": [],
+                "localized_elements": [],
+                "recommendations": ["Review all visual assets for proper localization"],
+                "evaluation_criteria": "Could not evaluate automatically"
+            }
+        }
+    ),
+    AnalysisDimension(
+        name="seo_aso",
+        template="comparison_seo_aso_analysis.md",
+        output_keys=("seo_aso_optimization",),
+        score_fields=("seo_aso_optimization",),
+        fallback={
+            "seo_aso_optimization": {
+                "score": 80, 
+                "keyword_analysis": "SEO/ASO analysis could not be completed. Research local search terms and optimize accordingly.",
+                "character_utilization": {
+                    "title": "Unable to analyze",
+                    "short_description": "Unable to analyze"
+                },
+                "recommendations": ["Research local keywords", "Optimize title and descriptions for local search"],
+                "competitive_insights": "Manual competitive analysis recommended",
+                "missed_opportunities": [],
+                "strengths": [],
+                "evaluation_criteria": "Could not evaluate automatically"
+            }
+        }
+    ),
+]
+validate_dimensions(COMPARISON_DIMENSIONS)
+
+# Models the region probes look up (besides any other model calls have used), so a
+# region that does not serve one of them is demoted for it before a request finds out
+REGION_PROBE_MODELS = sorted(
+    {ANALYZE_DEFAULT_MODEL, APP_LISTING_DEFAULT_MODEL} | {dimension.model for dimension in COMPARISON_DIMENSIONS}
+)
+
+# --- Prompt Templates ---
+# Templates are compiled once at startup and reloaded when their file changes
+PROMPT_TEMPLATE_DIR = os.getenv("PROMPT_TEMPLATE_DIR") or find_template_directory([
+    os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prompts", "prompt_templates")),
+    "../prompts/prompt_templates",
+    "src/prompts/prompt_templates",
+])
+
+COMPARISON_PLACEHOLDERS = frozenset(
+    f"{prefix}_{key}"
+    for prefix in ("source", "target")
+    for key in (
+        "language", "country", "title", "short_description", "long_description", "developer",
+        "category", "price", "last_updated", "screenshots_count", "rating", "installs", "size",
+        "version", "content_rating", "has_feature_graphic", "icon_url",
+    )
+)
+AUDIT_PLACEHOLDERS = frozenset({
+    "app_title", "developer_name", "short_description", "long_description", "target_market",
+    "screenshots_description", "app_icon_description", "feature_graphics_description",
+    "sample_reviews", "sample_responses",
+})
+
+prompt_templates = PromptTemplateRegistry(PROMPT_TEMPLATE_DIR, logger=logger)
+prompt_templates.register("comprehensive_audit.md", AUDIT_PLACEHOLDERS)
+for dimension in COMPARISON_DIMENSIONS:
+    prompt_templates.register(dimension.template, COMPARISON_PLACEHOLDERS)
+
+def listing_placeholder_values(prefix: str, listing: AppListingAnalysisRequest) -> Dict[str, str]:
+    """Return the comparison template placeholder values of one listing (prefix "source" or "target")."""
+    values = {
+        "language": listing.language,
+        "country": listing.country,
+        "title": listing.title,
+        "short_description": listing.short_description or "Not available",
+        "long_description": listing.long_description or "Not available",
+        "developer": listing.developer,
+        "category": listing.category or "Not available",
+        "price": listing.price or "Free",
+        "last_updated": listing.last_updated or "Not available",
+        "screenshots_count": str(len(listing.screenshots)),
+        "rating": str(listing.rating) if listing.rating else "Not available",
+        "installs": listing.installs or "Not available",
+        "size": listing.size or "Not available",
+        "version": listing.version or "Not available",
+        "content_rating": listing.content_rating or "Not available",
+        "has_feature_graphic": "Yes" if listing.feature_graphic else "No",
+        "icon_url": listing.icon_url,
+    }
+    return {f"{prefix}_{key}": value for key, value in values.items()}
+
+def render_prompt(template_name: str, values: Dict[str, str]) -> str:
+    """Render a registered prompt template, turning template errors into a 500."""
+    try:
+        return prompt_templates.render(template_name, values)
+    except PromptTemplateError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
 # --- API Endpoints ---
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_content(request: AnalyzeRequest):
@@ -275,7 +499,7 @@ async def analyze_content(request: AnalyzeRequest):
     try:
         response_data = await gemini_client.generate_content_async(
             contents=contents,
-            model=request.model if request.model else "gemini-2.0-flash-001",
+            model=request.model if request.model else ANALYZE_DEFAULT_MODEL,
             return_json=request.return_json,
             count_tokens=request.count_tokens
         )
@@ -303,49 +527,37 @@ async def analyze_app_listing(request: AppListingAnalysisRequest):
 
     logger.info(f"Received request for /analyze-app-listing for app: {request.title} ({request.app_id})")
 
-    # Load the comprehensive audit prompt template
-    try:
-        with open("../prompts/prompt_templates/comprehensive_audit.md", "r") as f:
-            prompt_template = f.read()
-    except FileNotFoundError:
-        try:
-            with open("src/prompts/prompt_templates/comprehensive_audit.md", "r") as f:
-                prompt_template = f.read()
-        except FileNotFoundError:
-            logger.error("Could not find comprehensive_audit.md prompt template")
-            raise HTTPException(status_code=500, detail="Prompt template not found")
-
-    # Fill in all prompt template placeholders
-    filled_prompt = prompt_template.replace("{{app_title}}", request.title)
-    filled_prompt = filled_prompt.replace("{{developer_name}}", request.developer)
-    filled_prompt = filled_prompt.replace("{{short_description}}", request.short_description or "Not available")
-    filled_prompt = filled_prompt.replace("{{long_description}}", request.long_description or "Not available")
-    filled_prompt = filled_prompt.replace("{{target_market}}", f"Language: {request.language}, Country: {request.country}")
-    
     # Handle screenshots
     screenshots_desc = f"{len(request.screenshots)} screenshots available" if request.screenshots else "No screenshots available"
-    filled_prompt = filled_prompt.replace("{{screenshots_description}}", screenshots_desc)
-    
-    # Handle app icon
-    filled_prompt = filled_prompt.replace("{{app_icon_description}}", f"App icon URL: {request.icon_url}")
     
     # Handle feature graphics
     feature_graphics_desc = "Feature graphic available" if request.feature_graphic else "No feature graphic available"
-    filled_prompt = filled_prompt.replace("{{feature_graphics_description}}", feature_graphics_desc)
     
     # Handle user reviews
     if request.user_reviews:
         sample_reviews = "\n".join([f"- {review.author}: {review.text[:100]}..." for review in request.user_reviews[:3]])
     else:
         sample_reviews = "No user reviews available"
-    filled_prompt = filled_prompt.replace("{{sample_reviews}}", sample_reviews)
     
     # Handle developer responses
     if request.developer_responses:
         sample_responses = "\n".join([f"- {response.text[:100]}..." for response in request.developer_responses[:3]])
     else:
         sample_responses = "No developer responses available"
-    filled_prompt = filled_prompt.replace("{{sample_responses}}", sample_responses)
+    
+    # Fill in all prompt template placeholders
+    filled_prompt = render_prompt("comprehensive_audit.md", {
+        "app_title": request.title,
+        "developer_name": request.developer,
+        "short_description": request.short_description or "Not available",
+        "long_description": request.long_description or "Not available",
+        "target_market": f"Language: {request.language}, Country: {request.country}",
+        "screenshots_description": screenshots_desc,
+        "app_icon_description": f"App icon URL: {request.icon_url}",
+        "feature_graphics_description": feature_graphics_desc,
+        "sample_reviews": sample_reviews,
+        "sample_responses": sample_responses,
+    })
     
     # Add JSON format requirement
     json_format_instruction = """
@@ -417,7 +629,7 @@ Include specific observations about the visual elements in your analysis, especi
     try:
         response_data = await gemini_client.generate_content_async(
             contents=contents,
-            model=request.model if request.model else "gemini-2.5-flash-preview-05-20",
+            model=request.model if request.model else APP_LISTING_DEFAULT_MODEL,
             return_json=True,
             count_tokens=request.count_tokens
         )
@@ -512,245 +724,44 @@ async def analyze_localization_comparison(request: ComparisonAnalysisRequest):
 
     logger.info(f"Received request for /analyze-comparison: {request.source.title} vs {request.target.title}")
 
-    # Helper function to load and fill prompt templates
-    def load_and_fill_prompt(template_name: str, source: AppListingAnalysisRequest, target: AppListingAnalysisRequest) -> str:
-        try:
-            with open(f"../prompts/prompt_templates/{template_name}", "r") as f:
-                prompt_template = f.read()
-        except FileNotFoundError:
-            try:
-                with open(f"src/prompts/prompt_templates/{template_name}", "r") as f:
-                    prompt_template = f.read()
-            except FileNotFoundError:
-                logger.error(f"Could not find {template_name} prompt template")
-                raise HTTPException(status_code=500, detail=f"{template_name} prompt template not found")
-
-        # Fill common placeholders
-        prompt = prompt_template.replace("{{source_language}}", source.language)
-        prompt = prompt.replace("{{source_country}}", source.country)
-        prompt = prompt.replace("{{source_title}}", source.title)
-        prompt = prompt.replace("{{source_short_description}}", source.short_description or "Not available")
-        prompt = prompt.replace("{{source_long_description}}", source.long_description or "Not available")
-        prompt = prompt.replace("{{source_developer}}", source.developer)
-        prompt = prompt.replace("{{source_category}}", source.category or "Not available")
-        prompt = prompt.replace("{{source_price}}", source.price or "Free")
-        prompt = prompt.replace("{{source_last_updated}}", source.last_updated or "Not available")
-        prompt = prompt.replace("{{source_screenshots_count}}", str(len(source.screenshots)))
-        prompt = prompt.replace("{{source_rating}}", str(source.rating) if source.rating else "Not available")
-        prompt = prompt.replace("{{source_installs}}", source.installs or "Not available")
-        prompt = prompt.replace("{{source_size}}", source.size or "Not available")
-        prompt = prompt.replace("{{source_version}}", source.version or "Not available")
-        prompt = prompt.replace("{{source_content_rating}}", source.content_rating or "Not available")
-        prompt = prompt.replace("{{source_has_feature_graphic}}", "Yes" if source.feature_graphic else "No")
-        prompt = prompt.replace("{{source_icon_url}}", source.icon_url)
-
-        prompt = prompt.replace("{{target_language}}", target.language)
-        prompt = prompt.replace("{{target_country}}", target.country)
-        prompt = prompt.replace("{{target_title}}", target.title)
-        prompt = prompt.replace("{{target_short_description}}", target.short_description or "Not available")
-        prompt = prompt.replace("{{target_long_description}}", target.long_description or "Not available")
-        prompt = prompt.replace("{{target_developer}}", target.developer)
-        prompt = prompt.replace("{{target_category}}", target.category or "Not available")
-        prompt = prompt.replace("{{target_price}}", target.price or "Free")
-        prompt = prompt.replace("{{target_last_updated}}", target.last_updated or "Not available")
-        prompt = prompt.replace("{{target_screenshots_count}}", str(len(target.screenshots)))
-        prompt = prompt.replace("{{target_rating}}", str(target.rating) if target.rating else "Not available")
-        prompt = prompt.replace("{{target_installs}}", target.installs or "Not available")
-        prompt = prompt.replace("{{target_size}}", target.size or "Not available")
-        prompt = prompt.replace("{{target_version}}", target.version or "Not available")
-        prompt = prompt.replace("{{target_content_rating}}", target.content_rating or "Not available")
-        prompt = prompt.replace("{{target_has_feature_graphic}}", "Yes" if target.feature_graphic else "No")
-        prompt = prompt.replace("{{target_icon_url}}", target.icon_url)
-
-        return prompt
-
-    # Make specialized analysis calls
-    analysis_results = {}
-    total_score = 0
-    analysis_count = 0
+    placeholder_values = {
+        **listing_placeholder_values("source", request.source),
+        **listing_placeholder_values("target", request.target),
+    }
 
-    # 1. Translation Analysis
-    try:
-        logger.info("Starting translation analysis...")
-        translation_prompt = load_and_fill_prompt("comparison_translation_analysis.md", request.source, request.target)
+    async def run_comparison_dimension(dimension: AnalysisDimension, dependency_results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        prompt = render_prompt(dimension.template, placeholder_values)
+        if dependency_results:
+            prompt += "\n\nResults of related analyses (JSON):\n" + json.dumps(dependency_results, ensure_ascii=False, indent=2)
 
-        translation_response = await gemini_client.generate_content_async(
-            contents=[types.Content(role="user", parts=[types.Part(text=translation_prompt)])],
-            model="gemini-2.5-flash-preview-05-20",
+        response = await gemini_client.generate_content_async(
+            contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+            model=dimension.model,
             return_json=True
         )
-
-        raw_translation_data = translation_response if not request.count_tokens else translation_response[0]
         # Parse the response to handle wrapped JSON
-        translation_data = parse_ai_response(raw_translation_data)
-        
-        logger.info(f"Translation response keys after parsing: {list(translation_data.keys())}")
-        
-        # Update analysis results with the parsed response
-        analysis_results.update(translation_data)
-
-        if 'translation_completeness' in translation_data and 'score' in translation_data['translation_completeness']:
-            total_score += translation_data['translation_completeness']['score']
-            analysis_count += 1
-            logger.info(f"Translation completeness score: {translation_data['translation_completeness']['score']}")
-        
-        if 'translation_quality' in translation_data and 'score' in translation_data['translation_quality']:
-            total_score += translation_data['translation_quality']['score']
-            analysis_count += 1
-            logger.info(f"Translation quality score: {translation_data['translation_quality']['score']}")
-
-        logger.info("Translation analysis completed")
-    except Exception as e:
-        logger.error(f"Translation analysis failed: {e}", exc_info=True)
-        analysis_results['translation_completeness'] = {
-            "score": 70, 
-            "details": "Unable to analyze translation completeness. The app title and descriptions should be fully translated for the target market.",
-            "missing_elements": ["Unable to determine - manual review needed"],
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
-        analysis_results['translation_quality'] = {
-            "score": 70, 
-            "details": "Unable to analyze translation quality. Professional translation with cultural adaptation is recommended.",
-            "issues": [],
-            "strengths": [],
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
-
-    # 2. Cultural Analysis
-    try:
-        logger.info("Starting cultural analysis...")
-        cultural_prompt = load_and_fill_prompt("comparison_cultural_analysis.md", request.source, request.target)
-
-        cultural_response = await gemini_client.generate_content_async(
-            contents=[types.Content(role="user", parts=[types.Part(text=cultural_prompt)])],
-            model="gemini-2.5-flash-preview-05-20",
-            return_json=True
-        )
-
-        raw_cultural_data = cultural_response if not request.count_tokens else cultural_response[0]
-        cultural_data = parse_ai_response(raw_cultural_data)
-        
-        analysis_results.update(cultural_data)
-
-        if 'cultural_adaptation' in cultural_data and 'score' in cultural_data['cultural_adaptation']:
-            total_score += cultural_data['cultural_adaptation']['score']
-            analysis_count += 1
-
-        logger.info("Cultural analysis completed")
-    except Exception as e:
-        logger.error(f"Cultural analysis failed: {e}")
-        analysis_results['cultural_adaptation'] = {
-            "score": 70, 
-            "details": "Cultural adaptation analysis could not be completed. Consider local market preferences and cultural sensitivities.",
-            "issues": [],
-            "strengths": [],
-            "market_insights": "Manual cultural review recommended",
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
-
-    # 3. Technical Analysis
-    try:
-        logger.info("Starting technical analysis...")
-        technical_prompt = load_and_fill_prompt("comparison_technical_analysis.md", request.source, request.target)
-
-        technical_response = await gemini_client.generate_content_async(
-            contents=[types.Content(role="user", parts=[types.Part(text=technical_prompt)])],
-            model="gemini-2.5-flash-preview-05-20",
-            return_json=True
-        )
-
-        raw_technical_data = technical_response if not request.count_tokens else technical_response[0]
-        technical_data = parse_ai_response(raw_technical_data)
-        
-        analysis_results.update(technical_data)
-
-        if 'technical_localization' in technical_data and 'score' in technical_data['technical_localization']:
-            total_score += technical_data['technical_localization']['score']
-            analysis_count += 1
-
-        logger.info("Technical analysis completed")
-    except Exception as e:
-        logger.error(f"Technical analysis failed: {e}")
-        analysis_results['technical_localization'] = {
-            "score": 75, 
-            "details": "Technical localization analysis could not be completed. Ensure date, time, currency, and number formats match local standards.",
-            "issues": [],
-            "compliant_elements": [],
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
-
-    # 4. Visual Analysis
-    try:
-        logger.info("Starting visual analysis...")
-        visual_prompt = load_and_fill_prompt("comparison_visual_analysis.md", request.source, request.target)
-
-        visual_response = await gemini_client.generate_content_async(
-            contents=[types.Content(role="user", parts=[types.Part(text=visual_prompt)])],
-            model="gemini-2.5-flash-preview-05-20",
-            return_json=True
-        )
-
-        raw_visual_data = visual_response if not request.count_tokens else visual_response[0]
-        visual_data = parse_ai_response(raw_visual_data)
-        
-        analysis_results.update(visual_data)
-
-        if 'visual_localization' in visual_data and 'score' in visual_data['visual_localization']:
-            total_score += visual_data['visual_localization']['score']
-            analysis_count += 1
-
-        logger.info("Visual analysis completed")
-    except Exception as e:
-        logger.error(f"Visual analysis failed: {e}")
-        analysis_results['visual_localization'] = {
-            "score": 75, 
-            "details": "Visual localization analysis could not be completed. Ensure all screenshots and graphics contain localized text.",
-            "untranslated_visuals": [],
-            "cultural_concerns": [],
-            "localized_elements": [],
-            "recommendations": ["Review all visual assets for proper localization"],
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
-
-    # 5. SEO/ASO Analysis
-    try:
-        logger.info("Starting SEO/ASO analysis...")
-        seo_prompt = load_and_fill_prompt("comparison_seo_aso_analysis.md", request.source, request.target)
-
-        seo_response = await gemini_client.generate_content_async(
-            contents=[types.Content(role="user", parts=[types.Part(text=seo_prompt)])],
-            model="gemini-2.5-flash-preview-05-20",
-            return_json=True
-        )
-
-        raw_seo_data = seo_response if not request.count_tokens else seo_response[0]
-        seo_data = parse_ai_response(raw_seo_data)
-        
-        analysis_results.update(seo_data)
+        data = parse_ai_response(response)
+        logger.info(f"{dimension.name} response keys after parsing: {list(data.keys())}")
+        return data
+
+    # Independent dimensions run concurrently; latency is about that of the slowest one
+    outcomes = await run_dimensions(
+        COMPARISON_DIMENSIONS,
+        run_comparison_dimension,
+        max_concurrency=ANALYSIS_MAX_CONCURRENCY,
+        # render_prompt raises a 500 for template errors: fail the request rather than fall back
+        fatal_errors=(HTTPException,),
+        logger=logger
+    )
+    analysis_results = {}
+    for dimension in COMPARISON_DIMENSIONS:
+        analysis_results.update(outcomes[dimension.name].results)
 
-        if 'seo_aso_optimization' in seo_data and 'score' in seo_data['seo_aso_optimization']:
-            total_score += seo_data['seo_aso_optimization']['score']
-            analysis_count += 1
-
-        logger.info("SEO/ASO analysis completed")
-    except Exception as e:
-        logger.error(f"SEO/ASO analysis failed: {e}")
-        analysis_results['seo_aso_optimization'] = {
-            "score": 80, 
-            "keyword_analysis": "SEO/ASO analysis could not be completed. Research local search terms and optimize accordingly.",
-            "character_utilization": {
-                "title": "Unable to analyze",
-                "short_description": "Unable to analyze"
-            },
-            "recommendations": ["Research local keywords", "Optimize title and descriptions for local search"],
-            "competitive_insights": "Manual competitive analysis recommended",
-            "missed_opportunities": [],
-            "strengths": [],
-            "evaluation_criteria": "Could not evaluate automatically"
-        }
+    scores = collect_scores(COMPARISON_DIMENSIONS, outcomes)
+    logger.info(f"Dimension scores: {scores}")
 
     # Calculate overall score
-    overall_score = int(total_score / analysis_count) if analysis_count > 0 else 70
+    overall_score = int(sum(scores) / len(scores)) if scores else 70
 
     # Generate prioritized recommendations based on all analyses
     prioritized_recommendations = []
@@ -838,10 +849,21 @@ async def analyze_localization_comparison(request: ComparisonAnalysisRequest):
     logger.info(f"Successfully completed multi-call localization comparison analysis with overall score: {overall_score}")
     return ComparisonAnalysisResponse(result=comparison_result, token_info=None)
 
+@app.get("/regions")
+async def region_status():
+    """Current region routing order, per-region health, latency and counters, and hedging counters."""
+    if not gemini_client:
+        raise HTTPException(status_code=503, detail="Gemini client not available. Check project ID configuration.")
+    return {**gemini_client.router.stats(), "hedging": gemini_client.hedge_stats()}
+
 @app.get("/health")
 async def health_check():
     """Basic health check endpoint."""
-    return {"status": "ok", "gemini_client_initialized": gemini_client is not None}
+    return {
+        "status": "ok",
+        "gemini_client_initialized": gemini_client is not None,
+        "prompt_templates": prompt_templates.stats()
+    }
 
 # --- Running the app ---
 if __name__ == "__main__":
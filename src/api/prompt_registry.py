@@ -0,0 +1,199 @@
+import os
+import re
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional
+
+# A placeholder such as {{source_title}}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Za-z0-9_]+)\}\}")
+
+class PromptTemplateError(Exception):
+    """Raised when a prompt template is missing, uses unknown placeholders or cannot be rendered."""
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A prompt template split once into literal text and placeholders."""
+    name: str
+    path: str
+    mtime: float
+    placeholders: FrozenSet[str]
+    # The template as a str.format string: literal braces are escaped and each
+    # placeholder is a format field, so rendering is a single C-level pass
+    _format: str
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """
+        Fill in every placeholder.
+
+        Args:
+            values: Text for each placeholder; extra keys are ignored.
+
+        Raises:
+            PromptTemplateError: If a placeholder of the template has no value.
+        """
+        try:
+            return self._format.format_map(values)
+        except KeyError as e:
+            raise PromptTemplateError(f"No value for placeholder {{{{{e.args[0]}}}}} in {self.name}") from None
+
+def compile_template(name: str, path: str, text: str, mtime: float = 0.0) -> CompiledTemplate:
+    """Split a template into literal segments and placeholders and build its format string."""
+    segments = []
+    placeholders = set()
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        segments.append(text[position:match.start()].replace("{", "{{").replace("}", "}}"))
+        segments.append("{" + match.group(1) + "}")
+        placeholders.add(match.group(1))
+        position = match.end()
+    segments.append(text[position:].replace("{", "{{").replace("}", "}}"))
+    return CompiledTemplate(
+        name=name,
+        path=path,
+        mtime=mtime,
+        placeholders=frozenset(placeholders),
+        _format="".join(segments)
+    )
+
+class PromptTemplateRegistry:
+    """
+    Prompt templates loaded and compiled once, and reloaded when their file changes.
+
+    Each template is registered with the variables its caller declares it supplies. A
+    template that uses any other placeholder is rejected when it is loaded, instead of
+    reaching the model with a literal {{placeholder}} in it, and a render that leaves
+    out a declared variable is rejected, naming the template and the variable.
+    """
+
+    def __init__(self, directory: str, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the PromptTemplateRegistry.
+
+        Args:
+            directory: Directory holding the template files.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.directory = directory
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._allowed: Dict[str, FrozenSet[str]] = {}
+        self._templates: Dict[str, CompiledTemplate] = {}
+        # mtime of a file version that failed to reload, so it is not retried on every use
+        self._failed_mtimes: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {"renders": 0, "reloads": 0, "reload_errors": 0}
+
+    def register(self, name: str, variables: Iterable[str]) -> None:
+        """
+        Load and compile a template, and check it only uses the declared variables.
+
+        A missing file is logged and reported when the template is used, so the
+        other templates keep working; unknown placeholders raise right away.
+
+        Raises:
+            PromptTemplateError: If the template uses placeholders that are not declared.
+        """
+        self._allowed[name] = frozenset(variables)
+        try:
+            template = self._load(name)
+        except FileNotFoundError:
+            self.logger.error(f"Could not find {name} prompt template in {self.directory}")
+            return
+        with self._lock:
+            self._templates[name] = template
+        self.logger.info(f"Loaded prompt template {name} ({len(template.placeholders)} placeholders)")
+
+    def get(self, name: str) -> CompiledTemplate:
+        """
+        Return the compiled template, reloading it first if its file changed.
+
+        A changed file that fails to load or validate is logged and the previous
+        version is kept.
+
+        Raises:
+            PromptTemplateError: If the template is not registered or was never loaded.
+        """
+        if name not in self._allowed:
+            raise PromptTemplateError(f"{name} prompt template is not registered")
+        template = self._templates.get(name)
+        path = template.path if template else os.path.join(self.directory, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        if (
+            mtime is not None
+            and (template is None or mtime != template.mtime)
+            and mtime != self._failed_mtimes.get(name)
+        ):
+            template = self._reload(name, template, mtime)
+        if template is None:
+            raise PromptTemplateError(f"{name} prompt template not found")
+        return template
+
+    def render(self, name: str, values: Mapping[str, str]) -> str:
+        """
+        Render a registered template with the given variable values.
+
+        Raises:
+            PromptTemplateError: If the template cannot be loaded, or a declared
+                variable has no value (even one the current template does not use).
+        """
+        template = self.get(name)
+        missing = sorted(variable for variable in self._allowed[name] if values.get(variable) is None)
+        if missing:
+            raise PromptTemplateError(
+                f"{name} prompt template has no value for {', '.join('{{' + v + '}}' for v in missing)}"
+            )
+        text = template.render(values)
+        self._counters["renders"] += 1
+        return text
+
+    def stats(self) -> Dict[str, object]:
+        """Return the loaded templates and counters."""
+        return {
+            "directory": self.directory,
+            "templates": sorted(self._templates),
+            "missing": sorted(set(self._allowed) - set(self._templates)),
+            **self._counters,
+        }
+
+    def _reload(self, name: str, previous: Optional[CompiledTemplate], mtime: float) -> Optional[CompiledTemplate]:
+        with self._lock:
+            current = self._templates.get(name)
+            if current is not previous:
+                # Another thread reloaded it already
+                return current
+            try:
+                template = self._load(name)
+            except (OSError, PromptTemplateError) as e:
+                self._counters["reload_errors"] += 1
+                self._failed_mtimes[name] = mtime
+                self.logger.error(f"Failed to reload {name} prompt template, keeping the previous version: {e}")
+                return previous
+            self._templates[name] = template
+            self._failed_mtimes.pop(name, None)
+            self._counters["reloads"] += 1
+        self.logger.info(f"Reloaded prompt template {name}")
+        return template
+
+    def _load(self, name: str) -> CompiledTemplate:
+        path = os.path.join(self.directory, name)
+        mtime = os.stat(path).st_mtime
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        template = compile_template(name, path, text, mtime)
+        unknown = template.placeholders - self._allowed[name]
+        if unknown:
+            raise PromptTemplateError(
+                f"{name} uses unknown placeholders: {', '.join('{{' + p + '}}' for p in sorted(unknown))}"
+            )
+        return template
+
+def find_template_directory(candidates: Iterable[str]) -> str:
+    """Return the first candidate directory that exists, or the first candidate."""
+    candidates = list(candidates)
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return candidate
+    return candidates[0]
@@ -0,0 +1,266 @@
+import time
+import logging
+import threading
+import statistics
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+class RegionStats:
+    """Rolling call outcomes and probe latency of one region, and the models it does not serve."""
+
+    def __init__(self, region: str, window_size: int):
+        self.region = region
+        # (failed, latency_ms) of the most recent calls
+        self.window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        # Latencies of the most recent successful calls, per model: models differ too
+        # much in speed for one model's calls to tell when another's is late
+        self.model_latencies: Dict[str, Deque[float]] = {}
+        self.consecutive_failures = 0
+        self.probe_latency_ms: Optional[float] = None  # EWMA of successful probes
+        self.demoted_until: Optional[float] = None
+        # Models the region answered "not found" for, and until when they stay demoted
+        self.model_demoted_until: Dict[str, float] = {}
+        self.last_error: Optional[str] = None
+        self.last_probe_at: Optional[float] = None
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "failures": 0,
+            "probes": 0,
+            "probe_failures": 0,
+            "demotions": 0,
+            "model_demotions": 0,
+            "routed_first": 0,
+        }
+
+    @property
+    def error_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return sum(1 for failed, _ in self.window if failed) / len(self.window)
+
+    def latencies(self) -> List[float]:
+        """Latencies of the successful calls in the window, sorted."""
+        return sorted(latency for failed, latency in self.window if not failed)
+
+class RegionRouter:
+    """
+    Orders regions for each call by their current health and latency.
+
+    Healthy regions come first, fastest first: by the latency of periodic probes
+    (a cheap call that is comparable across regions, unlike generation calls whose
+    latency depends on the prompt), penalized by each region's recent call error rate.
+    Regions without probe data keep their configured order. A region that fails
+    `failure_threshold` calls in a row, or whose error rate over the window reaches
+    `error_rate_threshold`, is demoted for `cooldown_seconds`: it is only tried after
+    every healthy region, and is re-admitted by a successful probe (or call) once the
+    cooldown is over.
+
+    A region can also be demoted for a single model, when it reports that model as not
+    found (e.g. a preview model that is not served there): calls to that model try it
+    last, calls to other models are unaffected, and a successful probe (or call) of
+    that model once the cooldown is over re-admits it.
+    """
+
+    def __init__(
+        self,
+        regions: List[str],
+        window_size: int = 50,
+        min_calls: int = 5,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        cooldown_seconds: float = 60.0,
+        probe_ewma_alpha: float = 0.3,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the RegionRouter.
+
+        Args:
+            regions: Regions in order of preference when there is no data yet.
+            window_size: Number of most recent calls per region the stats are computed over.
+            min_calls: Minimum number of calls in the window before the error rate may demote a region.
+            failure_threshold: Consecutive failed calls that demote a region.
+            error_rate_threshold: Error rate (0-1) over the window that demotes a region.
+            cooldown_seconds: Minimum time a demoted region stays demoted.
+            probe_ewma_alpha: Weight of the newest probe in the probe latency average.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.regions = list(regions)
+        self.window_size = max(1, window_size)
+        self.min_calls = max(1, min_calls)
+        self.failure_threshold = max(1, failure_threshold)
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.probe_ewma_alpha = probe_ewma_alpha
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RegionStats] = {region: RegionStats(region, self.window_size) for region in self.regions}
+        self._last_routes: Dict[Optional[str], List[str]] = {None: list(self.regions)}
+
+    def route(self, model: Optional[str] = None) -> List[str]:
+        """Return every region, in the order a call (to `model`, if given) should try them."""
+        with self._lock:
+            order = sorted(self.regions, key=lambda region: self._sort_key(region, model))
+            self._stats[order[0]].counters["routed_first"] += 1
+            if order != self._last_routes.get(model, self.regions):
+                for_model = f" for {model}" if model else ""
+                self.logger.info(f"Region routing order{for_model} changed: {' > '.join(order)}")
+            self._last_routes[model] = order
+            return order
+
+    def is_demoted(self, region: str, model: Optional[str] = None) -> bool:
+        """Tell whether a region is demoted, or demoted for `model` if given."""
+        with self._lock:
+            stats = self._stats[region]
+            return stats.demoted_until is not None or (model is not None and model in stats.model_demoted_until)
+
+    def record_success(self, region: str, latency_ms: Optional[float] = None, model: Optional[str] = None) -> None:
+        """
+        Record a call that succeeded in a region, with its duration in milliseconds.
+
+        Leave `latency_ms` out for calls whose duration is not comparable to generation
+        calls (e.g. token counting): they still count towards the region's health.
+        """
+        with self._lock:
+            stats = self._stats[region]
+            if latency_ms is not None:
+                stats.window.append((False, latency_ms))
+                if model is not None:
+                    stats.model_latencies.setdefault(model, deque(maxlen=self.window_size)).append(latency_ms)
+            stats.counters["calls"] += 1
+            stats.consecutive_failures = 0
+            now = time.monotonic()
+            if stats.demoted_until is not None and now >= stats.demoted_until:
+                self._readmit(stats, "a successful call")
+            if model is not None and now >= stats.model_demoted_until.get(model, float("inf")):
+                self._readmit_model(stats, model, "a successful call")
+
+    def record_failure(self, region: str, latency_ms: float, error: str) -> None:
+        """Record a call that failed because of the region (not because of the request)."""
+        with self._lock:
+            stats = self._stats[region]
+            stats.window.append((True, latency_ms))
+            stats.counters["calls"] += 1
+            stats.counters["failures"] += 1
+            stats.consecutive_failures += 1
+            stats.last_error = error
+            if stats.consecutive_failures >= self.failure_threshold:
+                self._demote(stats, f"{stats.consecutive_failures} failures in a row")
+            elif len(stats.window) >= self.min_calls and stats.error_rate >= self.error_rate_threshold:
+                self._demote(stats, f"error rate {stats.error_rate:.0%} over {len(stats.window)} calls")
+
+    def record_model_failure(self, region: str, model: str, error: str) -> None:
+        """
+        Record that a region does not serve a model (a call or probe of it was "not found").
+
+        The region is demoted for that model only; its health for other models is unchanged.
+        """
+        with self._lock:
+            stats = self._stats[region]
+            stats.last_error = error
+            self._demote_model(stats, model, "model not found")
+
+    def record_probe(
+        self, region: str, latency_ms: Optional[float], error: Optional[str] = None, model: Optional[str] = None
+    ) -> None:
+        """Record a probe of a region (of `model`, if given): its latency in milliseconds, or the error if it failed."""
+        with self._lock:
+            stats = self._stats[region]
+            stats.counters["probes"] += 1
+            stats.last_probe_at = time.monotonic()
+            if error is not None or latency_ms is None:
+                stats.counters["probe_failures"] += 1
+                stats.last_error = error
+                return
+            if stats.probe_latency_ms is None:
+                stats.probe_latency_ms = latency_ms
+            else:
+                stats.probe_latency_ms += self.probe_ewma_alpha * (latency_ms - stats.probe_latency_ms)
+            now = time.monotonic()
+            if stats.demoted_until is not None and now >= stats.demoted_until:
+                self._readmit(stats, "a successful probe")
+            if model is not None and now >= stats.model_demoted_until.get(model, float("inf")):
+                self._readmit_model(stats, model, "a successful probe")
+
+    def call_latency_percentile(
+        self, region: str, percentile: float, min_samples: int = 1, model: Optional[str] = None
+    ) -> Optional[float]:
+        """
+        Return a percentile (0-100) of a region's recent successful call latencies, if there are enough.
+
+        With `model`, only the calls to that model count.
+        """
+        with self._lock:
+            stats = self._stats[region]
+            if model is None:
+                latencies = stats.latencies()
+            else:
+                latencies = sorted(stats.model_latencies.get(model, ()))
+        if len(latencies) < max(1, min_samples):
+            return None
+        index = min(len(latencies) - 1, max(0, int(round(percentile / 100 * len(latencies))) - 1))
+        return latencies[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current routing order and per-region health, latency and counters."""
+        now = time.monotonic()
+        with self._lock:
+            regions = {}
+            for region in self.regions:
+                stats = self._stats[region]
+                latencies = stats.latencies()
+                regions[region] = {
+                    "state": "demoted" if stats.demoted_until is not None else "healthy",
+                    "demoted_for_seconds": (
+                        round(max(0.0, stats.demoted_until - now), 1) if stats.demoted_until is not None else None
+                    ),
+                    "error_rate": round(stats.error_rate, 4),
+                    "window_calls": len(stats.window),
+                    "consecutive_failures": stats.consecutive_failures,
+                    "latency_ms": {
+                        "p50": round(statistics.median(latencies), 1) if latencies else None,
+                        "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+                    },
+                    "probe_latency_ms": round(stats.probe_latency_ms, 1) if stats.probe_latency_ms is not None else None,
+                    "last_probe_seconds_ago": round(now - stats.last_probe_at, 1) if stats.last_probe_at is not None else None,
+                    "demoted_models": {
+                        model: round(max(0.0, until - now), 1) for model, until in sorted(stats.model_demoted_until.items())
+                    },
+                    "last_error": stats.last_error,
+                    **stats.counters,
+                }
+            return {"order": sorted(self.regions, key=self._sort_key), "regions": regions}
+
+    def _sort_key(self, region: str, model: Optional[str] = None) -> Tuple[bool, bool, float, int]:
+        stats = self._stats[region]
+        position = self.regions.index(region)
+        demoted = stats.demoted_until is not None or (model is not None and model in stats.model_demoted_until)
+        if stats.probe_latency_ms is None:
+            return (demoted, True, 0.0, position)
+        # Each point of error rate costs as much as the probe latency itself
+        return (demoted, False, stats.probe_latency_ms * (1 + stats.error_rate), position)
+
+    def _demote(self, stats: RegionStats, reason: str) -> None:
+        already_demoted = stats.demoted_until is not None
+        stats.demoted_until = time.monotonic() + self.cooldown_seconds
+        if not already_demoted:
+            stats.counters["demotions"] += 1
+            self.logger.warning(f"Region {stats.region} demoted for {self.cooldown_seconds:g}s: {reason}")
+
+    def _demote_model(self, stats: RegionStats, model: str, reason: str) -> None:
+        already_demoted = model in stats.model_demoted_until
+        stats.model_demoted_until[model] = time.monotonic() + self.cooldown_seconds
+        if not already_demoted:
+            stats.counters["model_demotions"] += 1
+            self.logger.warning(f"Region {stats.region} demoted for {model} for {self.cooldown_seconds:g}s: {reason}")
+
+    def _readmit_model(self, stats: RegionStats, model: str, reason: str) -> None:
+        del stats.model_demoted_until[model]
+        self.logger.info(f"Region {stats.region} re-admitted for {model} after {reason}")
+
+    def _readmit(self, stats: RegionStats, reason: str) -> None:
+        stats.demoted_until = None
+        stats.consecutive_failures = 0
+        stats.window.clear()
+        stats.model_latencies.clear()
+        self.logger.info(f"Region {stats.region} re-admitted after {reason}")
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from analysis_dimensions import AnalysisDimension, collect_scores, run_dimensions, validate_dimensions
+
+
+def dimension(name, output_keys=None, depends_on=(), score_fields=None):
+    output_keys = tuple(output_keys or (f"{name}_analysis",))
+    return AnalysisDimension(
+        name=name,
+        template=f"{name}.md",
+        output_keys=output_keys,
+        fallback={key: {"score": 0, "summary": f"{key} not analyzed"} for key in output_keys},
+        score_fields=output_keys if score_fields is None else score_fields,
+        depends_on=depends_on,
+    )
+
+
+def run(dimensions, runner, max_concurrency=5):
+    return asyncio.run(run_dimensions(dimensions, runner, max_concurrency=max_concurrency))
+
+
+def test_failed_and_incomplete_dimensions_fall_back():
+    dimensions = [
+        dimension("ok"),
+        dimension("broken"),
+        dimension("partial", output_keys=("partial_a", "partial_b")),
+        dimension("not_a_dict"),
+    ]
+
+    async def runner(dim, dependency_results):
+        if dim.name == "broken":
+            raise RuntimeError("model call failed")
+        if dim.name == "partial":
+            return {"partial_a": {"score": 70}, "partial_b": "not an object"}
+        if dim.name == "not_a_dict":
+            return ["unexpected"]
+        return {"ok_analysis": {"score": 90}}
+
+    outcomes = run(dimensions, runner)
+    assert outcomes["ok"].fallback_keys == ()
+    assert outcomes["broken"].fallback_keys == ("broken_analysis",)
+    assert outcomes["broken"].results["broken_analysis"]["summary"] == "broken_analysis not analyzed"
+    assert outcomes["partial"].fallback_keys == ("partial_b",)
+    assert outcomes["partial"].results["partial_a"] == {"score": 70}
+    assert outcomes["not_a_dict"].fallback_keys == ("not_a_dict_analysis",)
+    # Fallback scores never count towards the overall score
+    assert collect_scores(dimensions, outcomes) == [90, 70]
+    # Fallbacks are copies, so a caller editing one does not change the definition
+    outcomes["broken"].results["broken_analysis"]["summary"] = "edited"
+    assert dimensions[1].fallback["broken_analysis"]["summary"] == "broken_analysis not analyzed"
+
+
+def test_dimensions_run_concurrently_after_their_dependencies():
+    dimensions = [dimension("a"), dimension("b"), dimension("c", depends_on=("a", "b")), dimension("d")]
+    started = {}
+
+    async def runner(dim, dependency_results):
+        started[dim.name] = time.perf_counter()
+        if dim.name == "c":
+            assert set(dependency_results) == {"a", "b"}
+            assert dependency_results["a"]["a_analysis"] == {"score": 1}
+        await asyncio.sleep(0.1)
+        return {f"{dim.name}_analysis": {"score": 1}}
+
+    start = time.perf_counter()
+    outcomes = run(dimensions, runner)
+    elapsed = time.perf_counter() - start
+    assert all(not outcome.fallback_keys for outcome in outcomes.values())
+    assert elapsed < 0.35
+    assert started["c"] - start >= 0.1
+
+
+def test_dependency_of_a_failed_dimension_sees_its_fallback():
+    dimensions = [dimension("a"), dimension("b", depends_on=("a",))]
+    seen = {}
+
+    async def runner(dim, dependency_results):
+        if dim.name == "a":
+            raise RuntimeError("model call failed")
+        seen.update(dependency_results)
+        return {"b_analysis": {"score": 50}}
+
+    outcomes = run(dimensions, runner)
+    assert seen["a"]["a_analysis"]["summary"] == "a_analysis not analyzed"
+    assert outcomes["b"].fallback_keys == ()
+
+
+def test_max_concurrency_is_respected():
+    dimensions = [dimension(name) for name in "abcdef"]
+    running = peak = 0
+
+    async def runner(dim, dependency_results):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {}
+
+    run(dimensions, runner, max_concurrency=2)
+    assert peak == 2
+
+
+@pytest.mark.parametrize("dimensions, message", [
+    ([dimension("a"), dimension("a")], "Duplicate"),
+    ([dimension("a", depends_on=("missing",))], "unknown dimension"),
+    ([dimension("a", depends_on=("b",)), dimension("b", depends_on=("a",))], "cycle"),
+    ([AnalysisDimension("a", "a.md", ("x", "y"), {"x": {}})], "no fallback"),
+])
+def test_invalid_graphs_are_rejected(dimensions, message):
+    with pytest.raises(ValueError, match=message):
+        validate_dimensions(dimensions)
+
+
+def test_fatal_errors_fail_the_run_instead_of_falling_back():
+    dimensions = [dimension("a"), dimension("slow"), dimension("b", depends_on=("a",))]
+    cancelled = []
+
+    async def runner(dim, dependency_results):
+        if dim.name == "a":
+            raise LookupError("comparison_a.md prompt template has no value for {{source_title}}")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(dim.name)
+            raise
+        return {}
+
+    with pytest.raises(LookupError, match="source_title"):
+        asyncio.run(run_dimensions(dimensions, runner, fatal_errors=(LookupError,)))
+    assert cancelled == ["slow"]
+
+    # Without it, the same error is a fallback like any other failure
+    outcomes = asyncio.run(run_dimensions(dimensions[:1], runner))
+    assert outcomes["a"].fallback_keys == ("a_analysis",)
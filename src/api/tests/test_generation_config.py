@@ -0,0 +1,28 @@
+from google.genai import types
+
+from vertex_libs import GeminiClient
+
+
+def test_json_settings_do_not_leak_into_the_shared_config():
+    client = GeminiClient(project_id="test-project")
+    schema_a = {"type": "OBJECT", "properties": {"a": {"type": "STRING"}}}
+    schema_b = {"type": "OBJECT", "properties": {"b": {"type": "STRING"}}}
+
+    config_a = client._prepare_generation_config(None, True, schema_a)
+    config_b = client._prepare_generation_config(None, True, schema_b)
+    plain = client._prepare_generation_config(None, False, None)
+
+    assert config_a.response_schema == schema_a
+    assert config_b.response_schema == schema_b
+    assert plain.response_mime_type is None and plain.response_schema is None
+    assert client.default_generation_config.response_schema is None
+    assert config_a.safety_settings == client.default_generation_config.safety_settings
+
+
+def test_callers_config_is_not_modified():
+    client = GeminiClient(project_id="test-project")
+    config = types.GenerateContentConfig(temperature=0.2, system_instruction="Be brief")
+    prepared = client._prepare_generation_config(config, True, None)
+    assert prepared.response_mime_type == "application/json"
+    assert prepared.system_instruction == "Be brief" and prepared.temperature == 0.2
+    assert config.response_mime_type is None
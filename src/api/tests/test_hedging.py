@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from tenacity import wait_none
+
+from vertex_libs import GeminiClient
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    monkeypatch.setattr(GeminiClient._generate_hedged.retry, "wait", wait_none())
+
+
+def hedging_client(region_results, **kwargs):
+    """A client whose regions answer with region_results[region]: (delay seconds, result or exception)."""
+    gemini = GeminiClient(project_id="test-project", hedge_requests=True, **kwargs)
+    calls = []
+
+    async def generate_in_region(region, contents, gen_config, model, return_json, token_count):
+        calls.append(region)
+        delay, result = region_results(region, len(calls))
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    gemini._generate_in_region_async = generate_in_region
+    return gemini, calls
+
+
+def test_hedged_call_is_retried_when_every_region_fails():
+    gemini, calls = hedging_client(
+        lambda region, n: (0, RuntimeError("unavailable")) if n <= len(gemini.regions) else (0, "ok")
+    )
+    assert asyncio.run(gemini.generate_content_async(contents=[], model="m")) == "ok"
+    assert len(calls) == len(gemini.regions) + 1
+
+
+def test_hedged_call_gives_up_after_the_retry_policy():
+    gemini, calls = hedging_client(lambda region, n: (0, RuntimeError("unavailable")))
+    with pytest.raises(Exception):
+        asyncio.run(gemini.generate_content_async(contents=[], model="m"))
+    assert len(calls) == 3 * len(gemini.regions)
+
+
+def test_hedge_delay_uses_latencies_of_the_same_model():
+    gemini, calls = hedging_client(lambda region, n: (0.2 if n == 1 else 0, region), hedge_min_samples=5)
+    primary = gemini.router.route()[0]
+    # Fast calls to another model must not make the slow model's calls look late
+    for _ in range(5):
+        gemini.router.record_success(primary, 10.0, model="fast-model")
+        gemini.router.record_success(primary, 500.0, model="slow-model")
+
+    assert asyncio.run(gemini.generate_content_async(contents=[], model="slow-model")) == primary
+    assert calls == [primary]
+
+    calls.clear()
+    result = asyncio.run(gemini.generate_content_async(contents=[], model="fast-model"))
+    assert len(calls) == 2 and result == calls[1] != primary
+    assert gemini.hedge_stats()["won"] == 1
+
+
+def test_configured_hedge_delay_is_used_without_latency_data():
+    gemini, calls = hedging_client(lambda region, n: (0.2 if n == 1 else 0, region), hedge_delay_ms=20)
+    result = asyncio.run(gemini.generate_content_async(contents=[], model="new-model"))
+    assert len(calls) == 2 and result == calls[1]
+    assert gemini.hedge_stats()["no_latency_data"] == 0
+
+    calls.clear()
+    # A per-call delay overrides it
+    asyncio.run(gemini.generate_content_async(contents=[], model="new-model", hedge_delay_ms=1000))
+    assert len(calls) == 1
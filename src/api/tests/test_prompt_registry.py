@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from prompt_registry import PromptTemplateError, PromptTemplateRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    (tmp_path / "greeting.md").write_text("Hello {{name}} from {{country}}! Reply as JSON: {\"ok\": true}")
+    registry = PromptTemplateRegistry(str(tmp_path))
+    registry.register("greeting.md", {"name", "country", "language"})
+    return registry
+
+
+def test_render_fills_declared_variables(registry):
+    values = {"name": "Ana", "country": "BR", "language": "pt"}
+    assert registry.render("greeting.md", values) == 'Hello Ana from BR! Reply as JSON: {"ok": true}'
+
+
+@pytest.mark.parametrize("values", [
+    {"name": "Ana", "country": "BR"},
+    {"name": "Ana", "country": "BR", "language": None},
+])
+def test_missing_declared_variable_names_template_and_variable(registry, values):
+    # language is declared but not used by the template: it is still required
+    with pytest.raises(PromptTemplateError, match=r"greeting\.md .*\{\{language\}\}"):
+        registry.render("greeting.md", values)
+
+
+def test_undeclared_placeholder_is_rejected_at_load(tmp_path):
+    (tmp_path / "greeting.md").write_text("Hello {{name}} {{surname}}")
+    registry = PromptTemplateRegistry(str(tmp_path))
+    with pytest.raises(PromptTemplateError, match=r"\{\{surname\}\}"):
+        registry.register("greeting.md", {"name"})
+
+
+def test_invalid_reload_keeps_previous_version(registry, tmp_path):
+    path = tmp_path / "greeting.md"
+    path.write_text("Hi {{name}} {{unknown}}")
+    os.utime(path, (1, 1))
+    values = {"name": "Ana", "country": "BR", "language": "pt"}
+    assert registry.render("greeting.md", values).startswith("Hello Ana")
+    assert registry.stats()["reload_errors"] == 1
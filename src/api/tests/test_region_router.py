@@ -0,0 +1,102 @@
+import time
+
+from google.genai import errors
+
+from region_router import RegionRouter
+from vertex_libs import GeminiClient, is_model_not_found, is_region_failure
+
+REGIONS = ["us-central1", "europe-west2", "asia-northeast1"]
+
+
+def client_error(code):
+    return errors.ClientError(code, {"error": {"code": code, "message": "error", "status": "ERROR"}})
+
+
+def test_model_failure_demotes_the_region_for_that_model_only():
+    router = RegionRouter(REGIONS, cooldown_seconds=60)
+    router.record_model_failure("us-central1", "preview-model", "404 model not found")
+
+    assert router.route("preview-model") == ["europe-west2", "asia-northeast1", "us-central1"]
+    assert router.route("stable-model")[0] == "us-central1"
+    assert router.route()[0] == "us-central1"
+    assert router.is_demoted("us-central1", "preview-model")
+    assert not router.is_demoted("us-central1")
+    stats = router.stats()["regions"]["us-central1"]
+    assert stats["state"] == "healthy"
+    assert set(stats["demoted_models"]) == {"preview-model"}
+    assert stats["model_demotions"] == 1
+
+
+def test_model_is_readmitted_by_a_probe_of_it_after_the_cooldown():
+    router = RegionRouter(REGIONS, cooldown_seconds=0.05)
+    router.record_model_failure("us-central1", "preview-model", "404 model not found")
+    router.record_probe("us-central1", 10.0, model="preview-model")
+    # Still in its cooldown
+    assert router.is_demoted("us-central1", "preview-model")
+
+    time.sleep(0.06)
+    router.record_probe("us-central1", 10.0, model="stable-model")
+    assert router.is_demoted("us-central1", "preview-model")
+    router.record_probe("us-central1", 10.0, model="preview-model")
+    assert not router.is_demoted("us-central1", "preview-model")
+    assert router.route("preview-model")[0] == "us-central1"
+
+
+def test_consecutive_failures_demote_the_region_for_every_model():
+    router = RegionRouter(REGIONS, failure_threshold=3)
+    for _ in range(3):
+        router.record_failure("us-central1", 100.0, "503 unavailable")
+    assert router.route()[-1] == "us-central1"
+    assert router.route("any-model")[-1] == "us-central1"
+
+
+def test_error_classification():
+    assert is_model_not_found(client_error(404))
+    assert not is_region_failure(client_error(404))
+    assert not is_model_not_found(client_error(400)) and not is_region_failure(client_error(400))
+    assert is_region_failure(client_error(429))
+    assert is_region_failure(RuntimeError("connection reset"))
+
+
+class FakeModels:
+    def __init__(self, missing):
+        self.missing = missing
+        self.lookups = []
+
+    def get(self, model):
+        self.lookups.append(model)
+        if model in self.missing:
+            raise client_error(404)
+
+
+class FakeClient:
+    def __init__(self, missing=()):
+        self.models = FakeModels(missing)
+
+
+def test_probes_look_up_each_model_and_demote_regions_missing_one():
+    gemini = GeminiClient(project_id="test-project")
+    fakes = {"us-central1": FakeClient(missing={"preview-model"})}
+    fakes.update({region: FakeClient() for region in gemini.regions if region != "us-central1"})
+    gemini._clients = fakes
+
+    gemini._models_in_use.add("override-model")
+    results = gemini.probe_regions(models=["preview-model", "stable-model"])
+
+    assert results["us-central1"] is False
+    assert results["europe-west2"] is True
+    assert fakes["europe-west2"].models.lookups == ["override-model", "preview-model", "stable-model"]
+    assert gemini.router.is_demoted("us-central1", "preview-model")
+    assert not gemini.router.is_demoted("us-central1", "stable-model")
+    assert gemini.router.route("preview-model")[-1] == "us-central1"
+
+
+def test_call_answered_not_found_demotes_the_region_for_its_model():
+    gemini = GeminiClient(project_id="test-project")
+    start = time.perf_counter()
+    gemini._record_region_failure("us-central1", start, client_error(404), "preview-model")
+    gemini._record_region_failure("europe-west2", start, client_error(400), "preview-model")
+
+    assert gemini.router.is_demoted("us-central1", "preview-model")
+    assert not gemini.router.is_demoted("europe-west2", "preview-model")
+    assert gemini.router.stats()["regions"]["europe-west2"]["failures"] == 0
@@ -17,14 +17,38 @@
 import os
 import json
 import logging
+import time
 import asyncio
-from typing import Optional, List, Union, Dict, Tuple, Any, Callable, Generator, Iterable
-from dataclasses import dataclass
+import threading
+from typing import Optional, List, Union, Dict, Tuple, Any, Callable, Generator, Iterable, Set
+from dataclasses import dataclass, replace
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from google import genai
 from google.genai import types
+from google.genai import errors
 import re
 
+from region_router import RegionRouter
+
+# Client errors that still say something about the region rather than the request
+REGION_FAILURE_CLIENT_CODES = frozenset({408, 429})
+
+# Hedges that may be fired in a row before the budget has to refill
+HEDGE_BUDGET_BURST = 5.0
+
+# Retry policy of generation calls, hedged or not: each attempt tries every region
+GENERATE_RETRY_POLICY = dict(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+
+def is_region_failure(error: Exception) -> bool:
+    """Tell whether an error reflects a region's health (and not, e.g., an invalid request)."""
+    if isinstance(error, errors.ClientError):
+        return error.code in REGION_FAILURE_CLIENT_CODES
+    return True
+
+def is_model_not_found(error: Exception) -> bool:
+    """Tell whether an error says the region does not serve the model (404 model not found)."""
+    return isinstance(error, errors.ClientError) and error.code == 404
+
 @dataclass
 class TokenCount:
     """Token count information for a response."""
@@ -35,13 +59,26 @@ class TokenCount:
 class GeminiClient:
     """A client for interacting with Gemini API with region fallback capabilities."""
     
-    def __init__(self, project_id: Optional[str] = None, logger: Optional[logging.Logger] = None):
+    def __init__(self, project_id: Optional[str] = None, logger: Optional[logging.Logger] = None,
+                 region_cooldown_seconds: float = 60.0,
+                 hedge_requests: bool = False,
+                 hedge_percentile: float = 95.0,
+                 hedge_min_samples: int = 20,
+                 hedge_budget_ratio: float = 0.1,
+                 hedge_delay_ms: Optional[float] = None):
         """
         Initialize the GeminiClient.
         
         Args:
             project_id (str, optional): Google Cloud Project ID. If None, will try to get from environment.
             logger (logging.Logger, optional): Custom logger instance. If None, will create a new one.
+            region_cooldown_seconds (float): How long a failing region is demoted before it may be re-admitted.
+            hedge_requests (bool): Whether generate_content_async hedges calls by default.
+            hedge_percentile (float): Percentile of the region's recent call latency (for the same model)
+                after which a hedge is sent.
+            hedge_min_samples (int): Recent calls to a model a region needs before its calls are hedged.
+            hedge_budget_ratio (float): Maximum share of hedged calls that may fire a hedge.
+            hedge_delay_ms (float, optional): Fixed delay after which a hedge is sent, instead of the percentile.
         """
         self.project_id = project_id or os.environ.get("GCP_PROJECT")
         if not self.project_id:
@@ -62,6 +99,28 @@ class GeminiClient:
             "asia-south1"
         ]
         
+        # Orders the regions for each call by health and latency; the list above is
+        # the order of preference until there is data
+        self.router = RegionRouter(self.regions, cooldown_seconds=region_cooldown_seconds, logger=self.logger)
+        
+        # Hedging: a call still running after the region's usual latency is duplicated to
+        # the next-best region. Each hedged call earns `hedge_budget_ratio` of a hedge (up
+        # to a small burst), so a slow region cannot double the load on the others.
+        self.hedge_requests = hedge_requests
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget_ratio = hedge_budget_ratio
+        self.hedge_delay_ms = hedge_delay_ms
+        self._hedge_lock = threading.Lock()
+        self._hedge_tokens = HEDGE_BUDGET_BURST
+        self._hedge_counters: Dict[str, int] = {
+            "calls": 0,
+            "fired": 0,
+            "won": 0,
+            "budget_exhausted": 0,
+            "no_latency_data": 0,
+        }
+        
         # Default safety settings
         self.safety_settings = [
             types.SafetySetting(
@@ -90,6 +149,14 @@ class GeminiClient:
             response_modalities=["TEXT"],
             safety_settings=self.safety_settings
         )
+        
+        # One client per region, created on first use and kept for the life of the
+        # process, so calls reuse its HTTP connection pool instead of reconnecting
+        self._clients: Dict[str, genai.Client] = {}
+        self._clients_lock = threading.Lock()
+        
+        # Models that calls have succeeded with: the region probes look them up too
+        self._models_in_use: Set[str] = set()
 
     def _initialize_client(self, region: str):
         """Initialize Gemini client with the specified region."""
@@ -99,6 +166,110 @@ class GeminiClient:
             location=region
         )
 
+    def get_client(self, region: str) -> genai.Client:
+        """
+        Return the pooled client of a region, creating it on first use.
+        
+        Args:
+            region: Vertex AI region (e.g. us-central1)
+            
+        Returns:
+            genai.Client: The region's shared client (safe to use from several threads)
+        """
+        client = self._clients.get(region)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(region)
+                if client is None:
+                    client = self._initialize_client(region)
+                    self._clients[region] = client
+                    self.logger.info(f"Created Gemini client for region {region}")
+        return client
+
+    def warm_up(self, regions: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Open connections ahead of the first request with a cheap model lookup per region.
+        
+        Args:
+            regions: Regions to warm up (defaults to the primary region)
+            
+        Returns:
+            Dict[str, bool]: Whether each region's warm-up call succeeded
+        """
+        results = {}
+        for region in regions or self.regions[:1]:
+            try:
+                self.get_client(region).models.get(model=self.default_model)
+                results[region] = True
+                self.logger.info(f"Warmed up Gemini client for region {region}")
+            except Exception as e:
+                results[region] = False
+                self.logger.warning(f"Warm-up failed in region {region}: {str(e)}")
+        return results
+
+    def probe_models(self, models: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the models to probe: the given ones (defaults to the default model) and every model in use."""
+        return sorted(set(models or [self.default_model]) | self._models_in_use)
+
+    def probe_region(self, region: str, models: Optional[Iterable[str]] = None) -> bool:
+        """
+        Measure a region with a cheap lookup of each model and report it to the router.
+        
+        A model the region answers "not found" for demotes the region for that model.
+        
+        Args:
+            region: Vertex AI region to probe
+            models: Models to look up (see `probe_models`)
+            
+        Returns:
+            bool: Whether every model's probe succeeded
+        """
+        succeeded = True
+        for model in self.probe_models(models):
+            try:
+                if region not in self._clients:
+                    # Open the connection first, so the probe measures the region and not the handshake
+                    self.get_client(region).models.get(model=model)
+                start = time.perf_counter()
+                self.get_client(region).models.get(model=model)
+            except Exception as e:
+                self.logger.warning(f"Probe of {model} failed in region {region}: {str(e)}")
+                if is_model_not_found(e):
+                    self.router.record_model_failure(region, model, str(e))
+                self.router.record_probe(region, None, error=str(e), model=model)
+                succeeded = False
+                continue
+            self.router.record_probe(region, (time.perf_counter() - start) * 1000, model=model)
+        return succeeded
+
+    def probe_regions(self, regions: Optional[List[str]] = None, models: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Probe each region (defaults to all of them) for each model; returns whether each region's probes succeeded."""
+        models = self.probe_models(models)
+        return {region: self.probe_region(region, models) for region in regions or self.regions}
+
+    def _record_region_success(self, region: str, model: str, latency_ms: Optional[float] = None) -> None:
+        self.router.record_success(region, latency_ms, model=model)
+        self._models_in_use.add(model)
+
+    def _record_region_failure(self, region: str, start: float, error: Exception, model: Optional[str] = None) -> None:
+        if model is not None and is_model_not_found(error):
+            self.router.record_model_failure(region, model, str(error))
+        elif is_region_failure(error):
+            self.router.record_failure(region, (time.perf_counter() - start) * 1000, str(error))
+
+    def close(self) -> None:
+        """Close the pooled clients and their connections."""
+        with self._clients_lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            close = getattr(client, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    self.logger.warning(f"Error closing Gemini client: {str(e)}")
+
     def count_tokens(self, contents: List[types.Content], model: Optional[str] = None) -> TokenCount:
         """
         Count tokens in the input contents using the native Gemini API.
@@ -113,17 +284,20 @@ class GeminiClient:
         Raises:
             Exception: If token counting fails
         """
+        model = model or self.default_model
         try:
-            # Use the first available region to count tokens
-            for region in self.regions:
+            # Use the best available region to count tokens
+            for region in self.router.route(model):
+                start = time.perf_counter()
                 try:
-                    client = self._initialize_client(region)
+                    client = self.get_client(region)
                     
                     # Call the native count_tokens method
                     response = client.models.count_tokens(
-                        model=model or self.default_model,
+                        model=model,
                         contents=contents
                     )
+                    self._record_region_success(region, model)
                     
                     # Convert to our TokenCount format
                     return TokenCount(
@@ -133,6 +307,7 @@ class GeminiClient:
                     )
                 except Exception as e:
                     self.logger.warning(f"Token counting failed in region {region}: {str(e)}")
+                    self._record_region_failure(region, start, e, model)
                     continue
                 
             # If we got here, all regions failed
@@ -313,7 +488,7 @@ class GeminiClient:
             
         return [chunk.strip() for chunk in text.split(separator) if chunk.strip()]
 
-    @retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+    @retry(**GENERATE_RETRY_POLICY)
     def generate_content(self, 
                         contents: List[types.Content],
                         stream: bool = False,
@@ -342,21 +517,16 @@ class GeminiClient:
             Exception: If all regions fail
         """
         last_error = None
-        gen_config = generation_config or self.default_generation_config
+        gen_config = self._prepare_generation_config(generation_config, return_json, json_schema)
         token_count = None
-        
-        if return_json:
-            if not json_schema:
-                json_schema = {"type": "OBJECT", "properties": {"response": {"type": "STRING"}}}
-            gen_config.response_mime_type = "application/json"
-            gen_config.response_schema = json_schema
 
         if count_tokens:
             token_count = self.count_tokens(contents, model=model)
 
-        for region in self.regions:
+        for region in self.router.route(model):
+            start = time.perf_counter()
             try:
-                client = self._initialize_client(region)
+                client = self.get_client(region)
                 
                 if stream:
                     response = client.models.generate_content_stream(
@@ -364,6 +534,7 @@ class GeminiClient:
                         contents=contents,
                         config=gen_config
                     )
+                    self._record_region_success(region, model, (time.perf_counter() - start) * 1000)
                     if count_tokens:
                         # Update token count with completion tokens
                         token_count.completion_tokens = sum(len(chunk.text.split()) for chunk in response)
@@ -375,22 +546,12 @@ class GeminiClient:
                         contents=contents,
                         config=gen_config
                     )
-                    
-                    if count_tokens:
-                        # Update token count with completion tokens
-                        token_count.completion_tokens = len(response.text.split())
-                        token_count.total_tokens = token_count.prompt_tokens + token_count.completion_tokens
-                    
-                    # Parse JSON response if requested
-                    if return_json:
-                        result = self._parse_response(response)
-                    else:
-                        result = response.text
-                        
-                    return (result, token_count) if count_tokens else result
+                    self._record_region_success(region, model, (time.perf_counter() - start) * 1000)
+                    return self._build_result(response, return_json, token_count)
                     
             except Exception as e:
                 self.logger.warning(f"Error with region {region}: {str(e)}")
+                self._record_region_failure(region, start, e, model)
                 last_error = e
                 continue
         
@@ -403,7 +564,9 @@ class GeminiClient:
                                model: str = "gemini-2.0-flash-exp",
                                return_json: bool = False,
                                json_schema: Optional[Dict] = None,
-                               count_tokens: bool = False) -> Union[str, Dict, Tuple[Union[str, Dict], TokenCount]]:
+                               count_tokens: bool = False,
+                               hedge: Optional[bool] = None,
+                               hedge_delay_ms: Optional[float] = None) -> Union[str, Dict, Tuple[Union[str, Dict], TokenCount]]:
         """
         Asynchronous version of generate_content.
         
@@ -415,6 +578,10 @@ class GeminiClient:
             return_json: Whether to return response as JSON using SDK's JSON capability
             json_schema: Optional JSON schema for structured responses
             count_tokens: Whether to count tokens and return token usage
+            hedge: Whether to hedge the call across regions (defaults to hedge_requests;
+                streaming calls are never hedged)
+            hedge_delay_ms: Fixed delay after which the call is hedged (defaults to
+                hedge_delay_ms, or else the region's latency percentile for the model)
             
         Returns:
             Union[str, Dict]: Generated content as string or JSON if return_json=True
@@ -423,6 +590,11 @@ class GeminiClient:
         Raises:
             Exception: If all regions fail
         """
+        if (self.hedge_requests if hedge is None else hedge) and not stream:
+            gen_config = self._prepare_generation_config(generation_config, return_json, json_schema)
+            token_count = await asyncio.to_thread(self.count_tokens, contents, model) if count_tokens else None
+            return await self._generate_hedged(contents, gen_config, model, return_json, token_count, hedge_delay_ms)
+        
         # We need to run the synchronous method in a thread pool executor since the
         # Google Vertex AI API doesn't have native async support yet
         loop = asyncio.get_event_loop()
@@ -439,6 +611,143 @@ class GeminiClient:
             )
         )
     
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Return hedging settings and counters (hedges fired, and won by the hedge region)."""
+        with self._hedge_lock:
+            return {
+                "enabled": self.hedge_requests,
+                "percentile": self.hedge_percentile,
+                "delay_ms": self.hedge_delay_ms,
+                "budget_ratio": self.hedge_budget_ratio,
+                "budget_tokens": round(self._hedge_tokens, 2),
+                **self._hedge_counters,
+            }
+
+    def _prepare_generation_config(self, generation_config: Optional[types.GenerateContentConfig],
+                                   return_json: bool, json_schema: Optional[Dict]) -> types.GenerateContentConfig:
+        """
+        Return the config of one call.
+        
+        JSON settings go on a copy: the default config (and a caller's config) is shared
+        by concurrent calls, so one call's schema must not leak into another.
+        """
+        gen_config = generation_config or self.default_generation_config
+        
+        if return_json:
+            if not json_schema:
+                json_schema = {"type": "OBJECT", "properties": {"response": {"type": "STRING"}}}
+            gen_config = gen_config.model_copy(update={
+                "response_mime_type": "application/json",
+                "response_schema": json_schema,
+            })
+        return gen_config
+
+    def _build_result(self, response, return_json: bool, token_count: Optional[TokenCount]):
+        if token_count is not None:
+            # Update token count with completion tokens
+            completion_tokens = len(response.text.split())
+            token_count = replace(
+                token_count,
+                completion_tokens=completion_tokens,
+                total_tokens=token_count.prompt_tokens + completion_tokens
+            )
+        
+        # Parse JSON response if requested
+        if return_json:
+            result = self._parse_response(response)
+        else:
+            result = response.text
+            
+        return (result, token_count) if token_count is not None else result
+
+    async def _generate_in_region_async(self, region: str, contents: List[types.Content],
+                                        gen_config: types.GenerateContentConfig, model: str,
+                                        return_json: bool, token_count: Optional[TokenCount]):
+        """Generate in one region with the SDK's native async client, so the call can be cancelled."""
+        start = time.perf_counter()
+        try:
+            response = await self.get_client(region).aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=gen_config
+            )
+        except Exception as e:
+            self.logger.warning(f"Error with region {region}: {str(e)}")
+            self._record_region_failure(region, start, e, model)
+            raise
+        self._record_region_success(region, model, (time.perf_counter() - start) * 1000)
+        return self._build_result(response, return_json, token_count)
+
+    def _take_hedge_token(self) -> bool:
+        with self._hedge_lock:
+            if self._hedge_tokens < 1:
+                self._hedge_counters["budget_exhausted"] += 1
+                return False
+            self._hedge_tokens -= 1
+            self._hedge_counters["fired"] += 1
+            return True
+
+    @retry(**GENERATE_RETRY_POLICY)
+    async def _generate_hedged(self, contents: List[types.Content], gen_config: types.GenerateContentConfig,
+                               model: str, return_json: bool, token_count: Optional[TokenCount],
+                               hedge_delay_ms: Optional[float] = None):
+        """
+        Call the best region and, if it is slower than its usual latency percentile for
+        the model (or the configured hedge delay), the next-best one too. The first
+        successful response wins and the other call is cancelled. If both fail, the
+        remaining regions are tried in order, and then the whole call is retried like
+        an unhedged one.
+        """
+        order = self.router.route(model)
+        primary = order[0]
+        delay_ms = hedge_delay_ms if hedge_delay_ms is not None else self.hedge_delay_ms
+        if delay_ms is None:
+            delay_ms = self.router.call_latency_percentile(primary, self.hedge_percentile, self.hedge_min_samples, model=model)
+        with self._hedge_lock:
+            self._hedge_counters["calls"] += 1
+            self._hedge_tokens = min(HEDGE_BUDGET_BURST, self._hedge_tokens + self.hedge_budget_ratio)
+            if delay_ms is None:
+                self._hedge_counters["no_latency_data"] += 1
+        
+        attempts: Dict[asyncio.Task, str] = {
+            asyncio.create_task(self._generate_in_region_async(primary, contents, gen_config, model, return_json, token_count)): primary
+        }
+        last_error = None
+        try:
+            if delay_ms is not None and len(order) > 1:
+                done, _ = await asyncio.wait(attempts, timeout=delay_ms / 1000)
+                if not done and self._take_hedge_token():
+                    hedge_region = order[1]
+                    self.logger.info(f"No response from {primary} after {delay_ms:.0f}ms; hedging to {hedge_region}")
+                    attempts[asyncio.create_task(
+                        self._generate_in_region_async(hedge_region, contents, gen_config, model, return_json, token_count)
+                    )] = hedge_region
+            
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if attempts[task] != primary:
+                            with self._hedge_lock:
+                                self._hedge_counters["won"] += 1
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            # Cancel the slower call; its HTTP request is closed with it
+            for task in attempts:
+                task.cancel()
+        
+        for region in order:
+            if region in attempts.values():
+                continue
+            try:
+                return await self._generate_in_region_async(region, contents, gen_config, model, return_json, token_count)
+            except Exception as e:
+                last_error = e
+        
+        raise Exception(f"All regions failed. Last error: {str(last_error)}") from last_error
+
     def batch_generate_content(self, 
                              contents_list: List[List[types.Content]],
                              generation_config: Optional[types.GenerateContentConfig] = None,
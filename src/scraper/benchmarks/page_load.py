@@ -0,0 +1,130 @@
+"""
+Benchmark the Playwright page-load modes used by the scraper's fallback path.
+
+Compares the default mode (all resources, wait for `networkidle`) with lean mode
+(heavy and third-party resources blocked, static assets cached, wait for
+`domcontentloaded` + `h1`). For each app it reports the bytes received over the
+network and the time from navigation start until the page HTML is available,
+and checks that lean mode extracts the same listing fields as the default mode.
+
+Usage (from src/scraper, requires network access and `playwright install chromium`):
+    python benchmarks/page_load.py com.spotify.music com.duolingo --rounds 3
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_pool import BrowserPool  # noqa: E402
+from extractors import extract_listing_fields  # noqa: E402
+
+DEFAULT_APPS = ["com.spotify.music", "com.duolingo", "com.whatsapp"]
+
+
+async def measure_navigation(pool: BrowserPool, app_id: str, url: str, lean: bool) -> Dict[str, Any]:
+    """Navigate to `url` once and return bytes received, time to extract and the extracted fields."""
+    async with pool.page(lean=lean) as page:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        received = {"bytes": 0, "requests": 0}
+
+        def on_loading_finished(event):
+            received["bytes"] += event.get("encodedDataLength", 0)
+            received["requests"] += 1
+
+        cdp.on("Network.loadingFinished", on_loading_finished)
+
+        start = time.perf_counter()
+        await page.goto(url, wait_until="domcontentloaded" if lean else "networkidle")
+        await page.wait_for_selector("h1")
+        html = await page.content()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        await cdp.detach()
+        fields = extract_listing_fields(html, app_id, url, "en", "US")
+        return {
+            "app_id": app_id,
+            "ms": elapsed_ms,
+            "bytes": received["bytes"],
+            "requests": received["requests"],
+            "html_bytes": len(html.encode("utf-8")),
+            "fields": fields,
+        }
+
+
+async def run_mode(app_ids: List[str], rounds: int, lean: bool) -> List[Dict[str, Any]]:
+    pool = BrowserPool(
+        max_browsers=1,
+        max_pages_per_browser=1,
+        lean_mode=lean,
+        context_options={"user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"},
+    )
+    await pool.start()
+    samples = []
+    try:
+        for _ in range(rounds):
+            for app_id in app_ids:
+                url = f"https://play.google.com/store/apps/details?id={app_id}&hl=en-US&gl=US"
+                samples.append(await measure_navigation(pool, app_id, url, lean))
+    finally:
+        if lean:
+            cache = pool.asset_cache.stats()
+            print(f"  lean asset cache: {cache['hits']} hits, {cache['bytes_served'] / 1024:.0f} KiB served locally")
+        await pool.stop()
+    return samples
+
+
+def summarize(name: str, samples: List[Dict[str, Any]]) -> None:
+    times = sorted(sample["ms"] for sample in samples)
+    p95_index = max(0, int(round(0.95 * len(times))) - 1)
+    print(
+        f"{name:<8} n={len(samples):<3} "
+        f"time p50={statistics.median(times):7.0f} ms  p95={times[p95_index]:7.0f} ms  "
+        f"network avg={statistics.mean(s['bytes'] for s in samples) / 1024:8.0f} KiB  "
+        f"requests avg={statistics.mean(s['requests'] for s in samples):5.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app_ids", nargs="*", default=DEFAULT_APPS)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Running default mode (networkidle, all resources)...")
+    default_samples = await run_mode(args.app_ids, args.rounds, lean=False)
+    print("Running lean mode (domcontentloaded, blocked resources, asset cache)...")
+    lean_samples = await run_mode(args.app_ids, args.rounds, lean=True)
+
+    print()
+    summarize("default", default_samples)
+    summarize("lean", lean_samples)
+    compare_extraction(default_samples, lean_samples)
+
+
+def compare_extraction(default_samples: List[Dict[str, Any]], lean_samples: List[Dict[str, Any]]) -> None:
+    """Report, per app, the listing fields lean mode extracted differently from the default mode."""
+    # Values that legitimately differ between two loads of the same page
+    ignored = {"extractor", "html_content", "fetch_timings"}
+    default_fields = {sample["app_id"]: sample["fields"] for sample in default_samples}
+    print()
+    mismatches = 0
+    for app_id, lean_fields in {sample["app_id"]: sample["fields"] for sample in lean_samples}.items():
+        differing = sorted(
+            key for key in set(default_fields[app_id]) | set(lean_fields)
+            if key not in ignored and default_fields[app_id].get(key) != lean_fields.get(key)
+        )
+        if differing:
+            mismatches += 1
+            print(f"{app_id}: lean mode extracted different {', '.join(differing)}")
+    print(f"lean extraction matches default mode for {len(default_fields) - mismatches}/{len(default_fields)} apps")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
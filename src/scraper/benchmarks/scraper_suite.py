@@ -0,0 +1,185 @@
+"""
+Offline benchmark suite for the scraper, replayed from recorded fixtures.
+
+`record` scrapes a corpus of listings against live Google Play and saves every
+upstream response (google-play-scraper calls and details pages) as fixtures.
+`run` replays them without network access and times, per listing:
+
+- gplay: `scrape_with_google_play_scraper` (library calls and mapping)
+- dom: `extract_listing_from_dom` on the recorded details page HTML
+- scrape: the `/scrape` route end to end, with the listing cache bypassed
+
+Each stage reports p50/p95 latency and the peak memory allocated per listing
+(measured with tracemalloc in a separate pass, so it does not skew the timings).
+
+Usage (from src/scraper):
+    python benchmarks/scraper_suite.py record com.spotify.music com.duolingo --locales en-US,pt-BR
+    python benchmarks/scraper_suite.py run --rounds 5
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_APPS = ["com.spotify.music", "com.duolingo", "com.whatsapp"]
+DEFAULT_LOCALES = "en-US"
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CORPUS_FILE = "corpus.json"
+
+
+def configure_environment(mode: str, fixture_dir: str) -> None:
+    """Set the scraper's configuration before `main` is imported."""
+    os.environ["FIXTURE_MODE"] = mode
+    os.environ["FIXTURE_DIR"] = fixture_dir
+    # Measure the scrape itself: no snapshot shortcuts, no upstream pacing
+    os.environ["SNAPSHOT_DB_PATH"] = ""
+    os.environ["UPSTREAM_RATE_PER_SECOND"] = "0"
+
+
+def parse_locales(value: str) -> List[Tuple[str, str]]:
+    locales = []
+    for locale in value.split(","):
+        language, _, country = locale.strip().partition("-")
+        locales.append((language.lower(), country.upper() or "US"))
+    return locales
+
+
+def record(app_ids: List[str], locales: List[Tuple[str, str]], fixture_dir: str) -> None:
+    configure_environment("record", fixture_dir)
+    import main
+
+    async def record_all() -> List[Dict[str, str]]:
+        corpus = []
+        for app_id in app_ids:
+            for language, country in locales:
+                entry = {"app_id": app_id, "language": language, "country": country}
+                for name, scrape in (("gplay", main.scrape_with_google_play_scraper), ("http", main.scrape_with_http)):
+                    try:
+                        await scrape(app_id, language, country)
+                    except Exception as e:
+                        print(f"  {app_id} {language}-{country}: {name} failed: {main.describe_error(e)}")
+                print(f"Recorded {app_id} {language}-{country}")
+                corpus.append(entry)
+        await main.http_client.aclose()
+        return corpus
+
+    corpus = asyncio.run(record_all())
+    with open(os.path.join(fixture_dir, CORPUS_FILE), "w", encoding="utf-8") as f:
+        json.dump(corpus, f, indent=2)
+    print(f"Saved {len(corpus)} listings to {fixture_dir}")
+
+
+def measure(name: str, calls: List[Callable[[], object]], rounds: int) -> Dict[str, float]:
+    """Time each call `rounds` times, then measure its peak allocation once."""
+    times = []
+    for _ in range(rounds):
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            times.append((time.perf_counter() - start) * 1000)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for call in calls:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    p95_index = max(0, int(round(0.95 * len(times))) - 1)
+    return {
+        "name": name,
+        "n": len(times),
+        "p50": statistics.median(times),
+        "p95": times[p95_index],
+        "peak_kib": statistics.mean(peaks) / 1024,
+    }
+
+
+def run(fixture_dir: str, rounds: int) -> None:
+    configure_environment("replay", fixture_dir)
+    import main
+    from extractors import extract_listing_from_dom
+    from fastapi.testclient import TestClient
+
+    with open(os.path.join(fixture_dir, CORPUS_FILE), "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    loop = asyncio.new_event_loop()
+    gplay_calls, dom_calls, scrape_calls = [], [], []
+    client = TestClient(main.app)
+
+    for entry in corpus:
+        app_id, language, country = entry["app_id"], entry["language"], entry["country"]
+        url = main.build_listing_url(app_id, language, country)
+
+        gplay_calls.append(
+            lambda a=app_id, l=language, c=country: loop.run_until_complete(main.scrape_with_google_play_scraper(a, l, c))
+        )
+        try:
+            page = main.fixture_store.load("GET", url)
+        except Exception as e:
+            print(f"Skipping DOM extraction for {app_id} {language}-{country}: {e}")
+        else:
+            dom_calls.append(
+                lambda h=page["body"], a=app_id, u=url, l=language, c=country: extract_listing_from_dom(h, a, u, l, c)
+            )
+
+        def post_scrape(u=url, l=language, c=country):
+            response = client.post(
+                "/scrape",
+                json={"url": u, "language": l, "country": c},
+                headers={"Cache-Control": "no-cache"},
+            )
+            response.raise_for_status()
+        scrape_calls.append(post_scrape)
+
+    results = []
+    with client:
+        for name, calls in (("gplay", gplay_calls), ("dom", dom_calls), ("scrape", scrape_calls)):
+            if calls:
+                results.append(measure(name, calls, rounds))
+    loop.close()
+
+    print(f"{len(corpus)} listings, {rounds} rounds, fixtures: {main.fixture_store.stats()}")
+    for result in results:
+        print(
+            f"{result['name']:<8} n={result['n']:<4} "
+            f"time p50={result['p50']:8.2f} ms  p95={result['p95']:8.2f} ms  "
+            f"alloc peak avg={result['peak_kib']:9.1f} KiB/listing"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Fixture directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record fixtures from live Google Play")
+    record_parser.add_argument("app_ids", nargs="*", default=DEFAULT_APPS)
+    record_parser.add_argument("--locales", default=DEFAULT_LOCALES, help="Comma-separated language-COUNTRY pairs")
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks against recorded fixtures")
+    run_parser.add_argument("--rounds", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.app_ids, parse_locales(args.locales), args.fixtures)
+    else:
+        run(args.fixtures, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
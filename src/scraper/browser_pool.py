@@ -0,0 +1,437 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, Browser, Page, Playwright, Route
+
+# Resource types never needed to extract listing data from the DOM
+LEAN_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Hosts whose scripts and stylesheets Play pages are allowed to load in lean mode
+LEAN_FIRST_PARTY_HOSTS = ("play.google.com", "gstatic.com")
+
+# Resource types whose responses are kept in the static asset cache
+CACHEABLE_RESOURCE_TYPES = frozenset({"script", "stylesheet"})
+
+
+def _read_rss_bytes(pid: int) -> int:
+    """Return the resident set size of a process in bytes (Linux only, 0 if unavailable)."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _is_first_party(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == allowed or host.endswith("." + allowed) for allowed in LEAN_FIRST_PARTY_HOSTS)
+
+
+class StaticAssetCache:
+    """An in-memory LRU cache of static asset responses shared across navigations."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, Dict[str, str], bytes]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(url)
+        self.hits += 1
+        self.bytes_served += len(entry[2])
+        return entry
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(url, None)
+        if previous is not None:
+            self._size -= len(previous[2])
+        self._entries[url] = (status, headers, body)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_served": self.bytes_served,
+        }
+
+
+class _BrowserSlot:
+    """
+    A browser together with its usage counters.
+
+    A slot is reserved (with no browser yet) before its browser is launched, so the
+    launch can run outside the pool lock; `ready` is set once the launch has finished.
+    """
+
+    def __init__(self, browser: Optional[Browser], slot_id: int):
+        self.browser = browser
+        self.slot_id = slot_id
+        self.active_pages = 0
+        self.navigations = 0
+        self.retiring = False
+        self.closed = False
+        self.launch_error: Optional[BaseException] = None
+        self.ready = asyncio.Event()
+        if browser is not None:
+            self.ready.set()
+
+    @property
+    def launching(self) -> bool:
+        return self.browser is None and not self.ready.is_set()
+
+    @property
+    def live(self) -> bool:
+        """Whether the slot may take new leases: not retiring, and launching or connected."""
+        if self.retiring:
+            return False
+        return self.launching or (self.browser is not None and self.browser.is_connected())
+
+
+class BrowserPool:
+    """
+    A pool of warm Chromium browsers that leases isolated contexts and pages.
+
+    Browsers are launched once and reused across requests. Each lease gets a fresh
+    browser context (cookies, storage and cache are not shared between leases), and
+    browsers are recycled after a number of navigations or when the browser's
+    process tree grows above a memory threshold. A recycled browser gets no new
+    leases: a replacement is launched next to it, and it is closed once its last
+    page is released.
+
+    In lean mode, pages skip images, media, fonts and third-party scripts, and
+    first-party scripts and stylesheets are served from a shared in-memory cache
+    after their first download.
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = 1,
+        max_pages_per_browser: int = 4,
+        max_navigations_per_browser: int = 200,
+        max_memory_mb: Optional[int] = 1024,
+        memory_check_interval: int = 10,
+        lean_mode: bool = False,
+        asset_cache_max_bytes: int = 64 * 1024 * 1024,
+        launch_options: Optional[Dict[str, Any]] = None,
+        context_options: Optional[Dict[str, Any]] = None,
+        on_browser_launch: Optional[Callable[[float], None]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the BrowserPool.
+
+        Args:
+            max_browsers: Maximum number of concurrently running browsers.
+            max_pages_per_browser: Maximum number of pages leased from one browser at a time.
+            max_navigations_per_browser: Number of leases after which a browser is recycled.
+            max_memory_mb: Recycle a browser once its processes use more than this much RSS (None disables the check).
+            memory_check_interval: Check a browser's memory every this many navigations.
+            lean_mode: Block heavy and third-party resources and cache static assets across navigations.
+            asset_cache_max_bytes: Size limit of the static asset cache used in lean mode.
+            launch_options: Extra keyword arguments for `chromium.launch`.
+            context_options: Default keyword arguments for `browser.new_context`.
+            on_browser_launch: Called with the launch duration in seconds after each browser launch.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.max_browsers = max(1, max_browsers)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.max_navigations_per_browser = max(1, max_navigations_per_browser)
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_interval = max(1, memory_check_interval)
+        self.lean_mode = lean_mode
+        self.asset_cache = StaticAssetCache(asset_cache_max_bytes)
+        self.launch_options = launch_options or {"headless": True}
+        self.context_options = context_options or {}
+        self.on_browser_launch = on_browser_launch
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_BrowserSlot] = []
+        self._lock = asyncio.Lock()
+        self._capacity = asyncio.Semaphore(self.max_browsers * self.max_pages_per_browser)
+        self._next_slot_id = 0
+        self._started = False
+        self.browsers_launched = 0
+        self.browsers_recycled = 0
+
+    async def start(self) -> None:
+        """Start Playwright and launch the first browser so the pool is warm."""
+        async with self._lock:
+            if self._started:
+                return
+            self._playwright = await async_playwright().start()
+            self._started = True
+            slot = self._reserve_slot()
+        await self._launch_slot(slot)
+        self.logger.info(
+            f"Browser pool started (max_browsers={self.max_browsers}, "
+            f"max_pages_per_browser={self.max_pages_per_browser})"
+        )
+
+    async def stop(self) -> None:
+        """Close all browsers and stop Playwright."""
+        async with self._lock:
+            slots, self._slots = self._slots, []
+            for slot in slots:
+                await self._close_slot(slot)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            self._started = False
+        self.logger.info("Browser pool stopped")
+
+    @asynccontextmanager
+    async def page(self, lean: Optional[bool] = None, **context_options: Any) -> AsyncIterator[Page]:
+        """
+        Lease a page in a fresh, isolated browser context.
+
+        Args:
+            lean: Override the pool's lean mode for this lease.
+            **context_options: Overrides for the pool's default context options (e.g. locale).
+
+        Yields:
+            Page: A new page; its context is closed when the lease ends.
+        """
+        async with self._capacity:
+            slot = await self._acquire_slot()
+            context = None
+            try:
+                context = await slot.browser.new_context(**{**self.context_options, **context_options})
+                if self.lean_mode if lean is None else lean:
+                    await context.route("**/*", self._route_lean)
+                page = await context.new_page()
+                yield page
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        self.logger.warning(f"Failed to close browser context: {e}")
+                await self._release_slot(slot)
+
+    @property
+    def active_pages(self) -> int:
+        """Number of pages currently leased."""
+        return sum(slot.active_pages for slot in self._slots)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool state."""
+        return {
+            "started": self._started,
+            "browsers": [
+                {
+                    "id": slot.slot_id,
+                    "active_pages": slot.active_pages,
+                    "navigations": slot.navigations,
+                    "retiring": slot.retiring,
+                    "launching": slot.launching,
+                }
+                for slot in self._slots
+            ],
+            "max_browsers": self.max_browsers,
+            "max_pages_per_browser": self.max_pages_per_browser,
+            "browsers_launched": self.browsers_launched,
+            "browsers_recycled": self.browsers_recycled,
+            "lean_mode": self.lean_mode,
+            "asset_cache": self.asset_cache.stats(),
+        }
+
+    async def _route_lean(self, route: Route) -> None:
+        """Request handler for lean mode: block heavy resources, serve cached assets."""
+        request = route.request
+        resource_type = request.resource_type
+
+        if resource_type in LEAN_BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+            return
+        if resource_type not in ("document", "stylesheet") and not _is_first_party(request.url):
+            # Third-party scripts, beacons and trackers
+            await route.abort()
+            return
+        if resource_type not in CACHEABLE_RESOURCE_TYPES or request.method != "GET":
+            await route.continue_()
+            return
+
+        cached = self.asset_cache.get(request.url)
+        if cached is not None:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.abort()
+            return
+        if response.ok:
+            self.asset_cache.put(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    async def _acquire_slot(self) -> _BrowserSlot:
+        launch = False
+        async with self._lock:
+            if not self._started:
+                self._playwright = await async_playwright().start()
+                self._started = True
+
+            # Retiring browsers get no new leases and do not count towards the
+            # browser limit, so their replacement starts while they drain.
+            # Browsers still launching count, and their leases wait for them.
+            live = [slot for slot in self._slots if slot.live]
+            candidates = [slot for slot in live if slot.active_pages < self.max_pages_per_browser]
+            if candidates:
+                slot = min(candidates, key=lambda s: s.active_pages)
+            elif len(live) < self.max_browsers:
+                slot = self._reserve_slot()
+                launch = True
+            else:
+                # Draining browsers still hold some of the leases the pool allows;
+                # until they are closed, the live browsers take the extra pages.
+                slot = min(live, key=lambda s: s.active_pages)
+
+            slot.active_pages += 1
+
+        # The launch takes seconds, so it runs outside the lock: other leases and
+        # releases go on meanwhile
+        try:
+            if launch:
+                await self._launch_slot(slot)
+            elif not slot.ready.is_set():
+                await slot.ready.wait()
+            if slot.browser is None:
+                raise RuntimeError(f"Browser {slot.slot_id} failed to launch") from slot.launch_error
+        except BaseException:
+            slot.active_pages -= 1
+            raise
+        return slot
+
+    async def _release_slot(self, slot: _BrowserSlot) -> None:
+        async with self._lock:
+            slot.active_pages -= 1
+            slot.navigations += 1
+            if not slot.retiring and slot.navigations >= self.max_navigations_per_browser:
+                self.logger.info(f"Recycling browser {slot.slot_id} after {slot.navigations} navigations")
+                slot.retiring = True
+            check_memory = (
+                not slot.retiring
+                and self.max_memory_mb is not None
+                and slot.navigations % self.memory_check_interval == 0
+            )
+
+        if check_memory:
+            # The CDP round-trip happens outside the lock so it never delays other leases
+            rss_mb = await self._browser_rss_mb(slot)
+            if rss_mb is not None and rss_mb > self.max_memory_mb and not slot.retiring:
+                self.logger.info(f"Recycling browser {slot.slot_id} at {rss_mb:.0f} MB RSS")
+                slot.retiring = True
+
+        replacement = None
+        async with self._lock:
+            recycle = (slot.retiring or not slot.browser.is_connected()) and slot.active_pages == 0 and not slot.closed
+            if recycle:
+                if slot in self._slots:
+                    self._slots.remove(slot)
+                slot.retiring = True
+                slot.closed = True
+                self.browsers_recycled += 1
+                if not self._slots and self._started:
+                    # Keep one browser warm for the next request
+                    replacement = self._reserve_slot()
+
+        # Closing and launching browsers take a while; neither holds the lock
+        if recycle:
+            await self._close_browser(slot)
+        if replacement is not None:
+            try:
+                await self._launch_slot(replacement)
+            except Exception as e:
+                self.logger.warning(f"Failed to launch a replacement browser: {e}")
+
+    def _reserve_slot(self) -> _BrowserSlot:
+        """Add a slot for a browser about to be launched. Caller holds the lock."""
+        slot = _BrowserSlot(None, self._next_slot_id)
+        self._next_slot_id += 1
+        self._slots.append(slot)
+        return slot
+
+    async def _launch_slot(self, slot: _BrowserSlot) -> None:
+        """Launch the browser of a reserved slot, without holding the lock, and publish it."""
+        start = time.perf_counter()
+        try:
+            browser = await self._playwright.chromium.launch(**self.launch_options)
+        except BaseException as e:
+            slot.launch_error = e
+            slot.retiring = True
+            if slot in self._slots:
+                self._slots.remove(slot)
+            slot.ready.set()
+            raise
+        if self.on_browser_launch is not None:
+            self.on_browser_launch(time.perf_counter() - start)
+        slot.browser = browser
+        browser.on("disconnected", lambda _: self._on_disconnected(slot))
+        self.browsers_launched += 1
+        slot.ready.set()
+        if slot.closed:
+            # The pool was stopped during the launch
+            await self._close_browser(slot)
+            raise RuntimeError("Browser pool stopped while a browser was launching")
+        self.logger.info(f"Launched browser {slot.slot_id}")
+
+    def _on_disconnected(self, slot: _BrowserSlot) -> None:
+        if not slot.retiring:
+            self.logger.warning(f"Browser {slot.slot_id} disconnected unexpectedly")
+        slot.retiring = True
+        if slot.active_pages == 0 and slot in self._slots:
+            self._slots.remove(slot)
+
+    async def _close_slot(self, slot: _BrowserSlot) -> None:
+        slot.retiring = True
+        slot.closed = True
+        await self._close_browser(slot)
+
+    async def _close_browser(self, slot: _BrowserSlot) -> None:
+        try:
+            if slot.browser is not None and slot.browser.is_connected():
+                await slot.browser.close()
+        except Exception as e:
+            self.logger.warning(f"Failed to close browser {slot.slot_id}: {e}")
+
+    async def _browser_rss_mb(self, slot: _BrowserSlot) -> Optional[float]:
+        """Sum the RSS of all processes belonging to a browser, in megabytes."""
+        try:
+            session = await slot.browser.new_browser_cdp_session()
+            try:
+                info = await session.send("SystemInfo.getProcessInfo")
+            finally:
+                await session.detach()
+        except Exception as e:
+            self.logger.debug(f"Could not read process info for browser {slot.slot_id}: {e}")
+            return None
+
+        total = sum(_read_rss_bytes(proc["id"]) for proc in info.get("processInfo", []))
+        return total / (1024 * 1024) if total else None
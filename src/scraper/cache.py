@@ -0,0 +1,164 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+# Cache status values reported to clients
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_STALE = "STALE"
+
+
+class FetchedValue(NamedTuple):
+    """
+    A fetched value that was already `age_seconds` old when it was fetched.
+
+    Return it from a fetch to cache a value read back from a store, so its TTL and
+    staleness count from when it was produced rather than from when it was read.
+    """
+    value: Any
+    age_seconds: float
+
+
+class _CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class ListingCache:
+    """
+    A bounded in-process TTL/LRU cache with stale-while-revalidate.
+
+    Entries younger than `ttl_seconds` are served as hits. Entries that have expired
+    but are younger than `ttl_seconds + stale_seconds` are served immediately as
+    stale while a background task refreshes them. Older entries are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 900,
+        stale_seconds: float = 3600,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the ListingCache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used one is evicted.
+            ttl_seconds: Age after which an entry is considered expired.
+            stale_seconds: How long past expiry an entry may still be served while refreshing.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "forced_refreshes": 0,
+            "background_refreshes": 0,
+            "background_refresh_failures": 0,
+            "evictions": 0,
+        }
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False,
+    ) -> Tuple[Any, str]:
+        """
+        Return the cached value for `key`, fetching it if needed.
+
+        Args:
+            key: Cache key.
+            fetch: Coroutine factory producing a fresh value.
+            force_refresh: Skip the cache lookup and always fetch a fresh value.
+
+        Returns:
+            Tuple of (value, cache status) where status is HIT, MISS or STALE.
+        """
+        if force_refresh:
+            self._counters["forced_refreshes"] += 1
+        else:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.stored_at
+                if age < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry.value, CACHE_HIT
+                if age < self.ttl_seconds + self.stale_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["stale_hits"] += 1
+                    self._schedule_refresh(key, fetch)
+                    return entry.value, CACHE_STALE
+
+        self._counters["misses"] += 1
+        value = self._store(key, await fetch())
+        return value, CACHE_MISS
+
+    def set(self, key: Hashable, value: Any, age_seconds: float = 0.0) -> None:
+        """Store a value that is `age_seconds` old, evicting the least recently used entries if the cache is full."""
+        self._entries[key] = _CacheEntry(value, time.monotonic() - max(0.0, age_seconds))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry from the cache."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and size."""
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+        served_from_cache = self._counters["hits"] + self._counters["stale_hits"]
+        return {
+            **self._counters,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "hit_ratio": round(served_from_cache / lookups, 4) if lookups else 0.0,
+        }
+
+    def _store(self, key: Hashable, fetched: Any) -> Any:
+        if isinstance(fetched, FetchedValue):
+            self.set(key, fetched.value, fetched.age_seconds)
+            return fetched.value
+        self.set(key, fetched)
+        return fetched
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, fetch))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            self._store(key, await fetch())
+            self._counters["background_refreshes"] += 1
+        except Exception as e:
+            self._counters["background_refresh_failures"] += 1
+            self.logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.discard(key)
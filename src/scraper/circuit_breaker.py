@@ -0,0 +1,166 @@
+import time
+import logging
+import statistics
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Breaker states
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker driven by the failure rate over a rolling window of calls.
+
+    While closed, calls go through and their outcomes and latencies are recorded.
+    Once at least `min_calls` are in the window and the share of failures (calls
+    slower than `slow_call_seconds` count as failures) reaches `failure_rate_threshold`,
+    the breaker opens and rejects calls for `open_seconds`. It then lets a single probe
+    call through (half-open): a successful probe closes the breaker, a failed one
+    opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        slow_call_seconds: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            name: Name of the protected component, used in logs and stats.
+            window_size: Number of most recent calls the failure rate is computed over.
+            min_calls: Minimum number of calls in the window before the breaker may open.
+            failure_rate_threshold: Failure rate (0-1) at which the breaker opens.
+            open_seconds: How long the breaker stays open before probing.
+            slow_call_seconds: Count calls slower than this as failures (None disables).
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.name = name
+        self.window_size = max(1, window_size)
+        self.min_calls = max(1, min(min_calls, self.window_size))
+        self.failure_rate_threshold = failure_rate_threshold
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.state = STATE_CLOSED
+        # (failed, latency_ms) for the most recent calls
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=self.window_size)
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._counters: Dict[str, int] = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "ignored": 0,
+            "probes": 0,
+        }
+        self._transitions: Dict[str, int] = {}
+
+    def allow(self) -> bool:
+        """Return whether a call may go through now; every allowed call must be recorded."""
+        now = time.monotonic()
+        if self.state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._transition(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN:
+            # One probe at a time; a probe that never reported back (e.g. its request
+            # was cancelled) is given up on after `open_seconds`.
+            if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                self._probe_started_at = now
+                self._counters["probes"] += 1
+                return True
+        elif self.state == STATE_CLOSED:
+            return True
+        self._counters["rejected"] += 1
+        return False
+
+    def record_success(self, latency_ms: float) -> None:
+        """Record a call that succeeded, with its duration in milliseconds."""
+        if self.slow_call_seconds is not None and latency_ms > self.slow_call_seconds * 1000:
+            self._record(True, latency_ms)
+        else:
+            self._record(False, latency_ms)
+
+    def record_failure(self, latency_ms: float) -> None:
+        """Record a call that failed, with its duration in milliseconds."""
+        self._record(True, latency_ms)
+
+    def record_ignored(self) -> None:
+        """
+        Record an allowed call whose outcome says nothing about the component's health.
+
+        Use it for calls that never reached the component, so a half-open breaker
+        lets the next call probe instead of waiting for this one.
+        """
+        self._counters["ignored"] += 1
+        if self.state == STATE_HALF_OPEN:
+            self._probe_started_at = None
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(1 for failed, _ in self._window if failed) / len(self._window)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker state, rolling failure rate and latencies, and counters."""
+        latencies = sorted(latency for _, latency in self._window)
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate, 4),
+            "window_calls": len(self._window),
+            "latency_ms": {
+                "p50": round(statistics.median(latencies), 1) if latencies else None,
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+            },
+            "open_for_seconds": (
+                round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self.state == STATE_OPEN else None
+            ),
+            **self._counters,
+            "transitions": dict(self._transitions),
+        }
+
+    def _record(self, failed: bool, latency_ms: float) -> None:
+        self._counters["failures" if failed else "successes"] += 1
+        if self.state == STATE_HALF_OPEN:
+            self._probe_started_at = None
+            if failed:
+                self._open()
+            else:
+                self._transition(STATE_CLOSED)
+                self._window.clear()
+            return
+
+        self._window.append((failed, latency_ms))
+        if (
+            self.state == STATE_CLOSED
+            and len(self._window) >= self.min_calls
+            and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(STATE_OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        key = f"{self.state}->{state}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        log = self.logger.warning if state == STATE_OPEN else self.logger.info
+        log(
+            f"Circuit breaker {self.name}: {self.state} -> {state} "
+            f"(failure rate {self.failure_rate:.0%} over {len(self._window)} calls)"
+        )
+        self.state = state
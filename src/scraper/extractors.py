@@ -0,0 +1,663 @@
+"""
+Extraction of AppListing fields from Google Play details page HTML.
+
+Two extractors are provided. `extract_listing_from_embedded_data` reads the
+structured data Play embeds in its `AF_initDataCallback` script blocks and is the
+preferred path. `extract_listing_from_dom` runs CSS selectors over the rendered
+markup and is kept as a fallback for pages without usable embedded data.
+
+Both are pure functions returning a dict of `AppListing` keyword arguments, so
+they can be used from any scraping tier and run in worker threads or processes.
+"""
+
+import re
+import json
+import html
+import time
+from datetime import datetime
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+
+# Script blocks carrying Play's embedded datasets, e.g.
+# AF_initDataCallback({key: 'ds:5', hash: '7', data:[...], sideChannel: {}});
+EMBEDDED_SCRIPT_PATTERN = re.compile(r"AF_initDataCallback[\s\S]*?</script")
+EMBEDDED_KEY_PATTERN = re.compile(r"(ds:.*?)'")
+EMBEDDED_VALUE_PATTERN = re.compile(r"data:([\s\S]*?), sideChannel: {}}\);<\/")
+# Start of a dataset's callback, e.g. AF_initDataCallback({key: 'ds:5', ...
+EMBEDDED_CALLBACK_PATTERN = re.compile(r"AF_initDataCallback\(\{\s*key:\s*'(ds:[^']*)'")
+
+# Dataset that usually holds the app details, tried before the others
+DETAILS_DATASET_KEY = "ds:5"
+
+# Path from a dataset's root to the app details node
+DETAILS_NODE_PATH = [1, 2]
+
+# Paths of the raw values inside the app details node. The same table is used by
+# the in-browser extractor, which evaluates these paths inside the page.
+EMBEDDED_FIELD_PATHS: Dict[str, List[int]] = {
+    "title": [0, 0],
+    "developer": [68, 0],
+    "icon_url": [95, 0, 3, 2],
+    "category": [79, 0, 0, 0],
+    "rating": [51, 0, 1],
+    "reviews_count": [51, 3, 1],
+    "histogram": [51, 1],
+    "short_description": [73, 0, 1],
+    "long_description": [72, 0, 1],
+    "long_description_translated": [12, 0, 0, 1],
+    "screenshots": [78, 0],
+    "feature_graphic": [96, 0, 3, 2],
+    "updated_timestamp": [145, 0, 1, 0],
+    "updated_text": [145, 0, 0],
+    "installs": [13, 0],
+    "version": [140, 0, 0, 0],
+    "min_os_version": [140, 1, 1, 0, 0, 1],
+    "content_rating": [9, 0],
+    "price_micros": [57, 0, 0, 0, 0, 1, 0, 0],
+    "currency": [57, 0, 0, 0, 0, 1, 0, 1],
+    "contains_ads": [48],
+    "in_app_purchase_text": [19, 0],
+    "developer_email": [69, 1, 0],
+    "developer_website": [69, 0, 5, 2],
+    "privacy_policy_url": [99, 0, 5, 2],
+    "recent_changes": [144, 1, 1],
+}
+
+# Maximum number of reviews taken from the embedded reviews dataset
+MAX_EMBEDDED_REVIEWS = 20
+
+
+def lookup_path(node: Any, path: Sequence[int]) -> Any:
+    """Follow a list of indexes into nested lists, returning None if any step is missing."""
+    for index in path:
+        if not isinstance(node, list) or index >= len(node):
+            return None
+        node = node[index]
+    return node
+
+
+def _clean_text(value: Any) -> Optional[str]:
+    """Convert Play's HTML-formatted text (with <br> line breaks) into plain text."""
+    if not isinstance(value, str):
+        return None
+    text = re.sub(r"<br\s*/?>", "\n", value)
+    text = re.sub(r"<[^>]+>", "", text)
+    return html.unescape(text).strip()
+
+
+def _format_timestamp(value: Any, fmt: Optional[str] = None) -> Optional[str]:
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    moment = datetime.fromtimestamp(value)
+    return moment.strftime(fmt) if fmt else moment.isoformat()
+
+
+def parse_embedded_datasets(html_content: str, keys: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """Parse the `AF_initDataCallback` datasets in the page (only `keys`, if given), keyed by their `ds:N` key."""
+    datasets: Dict[str, Any] = {}
+    for script in EMBEDDED_SCRIPT_PATTERN.findall(html_content):
+        key_match = EMBEDDED_KEY_PATTERN.search(script)
+        if not key_match or (keys is not None and key_match.group(1) not in keys):
+            continue
+        value_match = EMBEDDED_VALUE_PATTERN.search(script)
+        if not value_match:
+            continue
+        try:
+            datasets[key_match.group(1)] = json.loads(value_match.group(1))
+        except json.JSONDecodeError:
+            continue
+    return datasets
+
+
+def find_dataset_callback(html_content: str, key: str, start: int = 0) -> int:
+    """
+    Return where the `AF_initDataCallback` block of dataset `key` starts, or -1.
+
+    Only the callback itself counts: pages mention dataset keys earlier too, e.g. in
+    the `AF_dataServiceRequests` map in the head.
+    """
+    for match in EMBEDDED_CALLBACK_PATTERN.finditer(html_content, start):
+        if match.group(1) == key:
+            return match.start()
+    return -1
+
+
+def find_details_node(datasets: Dict[str, Any]) -> Optional[list]:
+    """Locate the app details node, preferring the usual dataset key."""
+    keys = sorted(datasets, key=lambda key: key != DETAILS_DATASET_KEY)
+    for key in keys:
+        node = lookup_path(datasets[key], DETAILS_NODE_PATH)
+        if isinstance(lookup_path(node, EMBEDDED_FIELD_PATHS["title"]), str):
+            return node
+    return None
+
+
+def _is_review_entry(entry: Any) -> bool:
+    return (
+        isinstance(entry, list) and len(entry) > 5
+        and isinstance(entry[1], list) and isinstance(entry[2], int)
+        and isinstance(entry[4], str)
+    )
+
+
+def find_review_entries(datasets: Dict[str, Any]) -> List[list]:
+    """Locate the embedded list of reviews, if the page carries one."""
+    for dataset in datasets.values():
+        entries = lookup_path(dataset, [0])
+        if isinstance(entries, list) and entries and all(_is_review_entry(entry) for entry in entries[:3]):
+            return entries
+    return []
+
+
+def extract_raw_embedded_values(details: list) -> Dict[str, Any]:
+    """Read every path of `EMBEDDED_FIELD_PATHS` from the app details node."""
+    return {name: lookup_path(details, path) for name, path in EMBEDDED_FIELD_PATHS.items()}
+
+
+def map_embedded_values(raw: Dict[str, Any], review_entries: Optional[List[list]] = None) -> Dict[str, Any]:
+    """
+    Convert raw embedded values into `AppListing` fields.
+
+    Args:
+        raw: Values read with `EMBEDDED_FIELD_PATHS`.
+        review_entries: Optional raw review entries from the embedded reviews dataset.
+
+    Returns:
+        Dict of AppListing keyword arguments (without app_id, url, language and country).
+    """
+    ratings_distribution = None
+    histogram = raw.get("histogram")
+    if isinstance(histogram, list) and len(histogram) >= 6:
+        ratings_distribution = {
+            str(stars): count
+            for stars in range(1, 6)
+            if isinstance(count := lookup_path(histogram, [stars, 1]), int)
+        } or None
+
+    screenshots = []
+    for i, item in enumerate(raw.get("screenshots") or []):
+        screenshot_url = lookup_path(item, [3, 2])
+        if isinstance(screenshot_url, str):
+            screenshots.append({"url": screenshot_url, "alt_text": f"Screenshot {i+1}"})
+
+    price = None
+    price_micros = raw.get("price_micros")
+    if isinstance(price_micros, (int, float)):
+        if price_micros == 0:
+            price = "Free"
+        else:
+            price = f"{price_micros / 1000000:g} {raw.get('currency') or ''}".strip()
+
+    in_app_purchase_text = raw.get("in_app_purchase_text")
+    update_history = None
+    recent_changes = _clean_text(raw.get("recent_changes"))
+    if recent_changes:
+        update_history = [{"date": raw.get("updated_text") or "", "description": recent_changes}]
+
+    user_reviews = []
+    developer_responses = []
+    for entry in (review_entries or [])[:MAX_EMBEDDED_REVIEWS]:
+        user_reviews.append({
+            "author": lookup_path(entry, [1, 0]) or "Unknown",
+            "rating": entry[2],
+            "date": _format_timestamp(lookup_path(entry, [5, 0])),
+            "text": entry[4],
+        })
+        reply = lookup_path(entry, [7, 1])
+        if isinstance(reply, str):
+            developer_responses.append({
+                "date": _format_timestamp(lookup_path(entry, [7, 2, 0])),
+                "text": reply,
+            })
+
+    return {
+        "title": raw.get("title") or "Unknown",
+        "developer": raw.get("developer") or "Unknown",
+        "icon_url": raw.get("icon_url") or "",
+        "category": raw.get("category"),
+        "rating": raw.get("rating"),
+        "reviews_count": raw.get("reviews_count"),
+        "ratings_distribution": ratings_distribution,
+        "short_description": _clean_text(raw.get("short_description")),
+        "long_description": _clean_text(raw.get("long_description_translated") or raw.get("long_description")),
+        "screenshots": screenshots,
+        "feature_graphic": raw.get("feature_graphic"),
+        "last_updated": _format_timestamp(raw.get("updated_timestamp"), "%Y-%m-%d") or raw.get("updated_text"),
+        "installs": raw.get("installs"),
+        "version": raw.get("version"),
+        "content_rating": raw.get("content_rating"),
+        "price": price,
+        "contains_ads": bool(raw.get("contains_ads")) if raw.get("contains_ads") is not None else None,
+        "in_app_purchases": bool(in_app_purchase_text),
+        "in_app_purchase_details": [in_app_purchase_text] if isinstance(in_app_purchase_text, str) else None,
+        "developer_email": raw.get("developer_email"),
+        "developer_website": raw.get("developer_website"),
+        "privacy_policy_url": raw.get("privacy_policy_url"),
+        "min_os_version": raw.get("min_os_version"),
+        "update_history": update_history,
+        "user_reviews": user_reviews,
+        "developer_responses": developer_responses,
+    }
+
+
+def extract_listing_from_embedded_data(html_content: str, app_id: str, url: str, language: str, country: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract listing fields from the `AF_initDataCallback` data embedded in a details page.
+
+    Returns:
+        Dict of AppListing keyword arguments, or None if the page has no usable details data.
+    """
+    datasets = parse_embedded_datasets(html_content)
+    details = find_details_node(datasets)
+    if details is None:
+        return None
+
+    fields = map_embedded_values(extract_raw_embedded_values(details), find_review_entries(datasets))
+    fields.update(app_id=app_id, url=url, language=language, country=country)
+    return fields
+
+
+# Script evaluated inside a rendered details page. It reads the embedded datasets
+# from the page's script tags and returns only the raw values named in
+# EMBEDDED_FIELD_PATHS (plus the first reviews), so the full HTML never has to be
+# serialized and sent to Python. Returns null when no details data is found.
+IN_PAGE_EXTRACTION_SCRIPT = r"""
+({paths, detailsKey, detailsNodePath, maxReviews}) => {
+  const lookup = (node, path) => {
+    for (const index of path) {
+      if (!Array.isArray(node) || index >= node.length) return null;
+      node = node[index];
+    }
+    return node === undefined ? null : node;
+  };
+
+  const datasets = {};
+  for (const script of document.querySelectorAll('script')) {
+    const text = script.textContent;
+    if (!text.includes('AF_initDataCallback')) continue;
+    const key = text.match(/(ds:.*?)'/);
+    const value = text.match(/data:([\s\S]*?), sideChannel: \{\}\}\);/);
+    if (!key || !value) continue;
+    try {
+      datasets[key[1]] = JSON.parse(value[1]);
+    } catch (e) {
+      // Ignore datasets that are not plain JSON
+    }
+  }
+
+  const keys = Object.keys(datasets).sort((a, b) => (b === detailsKey) - (a === detailsKey));
+  let details = null;
+  for (const key of keys) {
+    const node = lookup(datasets[key], detailsNodePath);
+    if (typeof lookup(node, paths.title) === 'string') {
+      details = node;
+      break;
+    }
+  }
+  if (details === null) return null;
+
+  const raw = {};
+  for (const [name, path] of Object.entries(paths)) raw[name] = lookup(details, path);
+
+  const isReview = (entry) => Array.isArray(entry) && entry.length > 5 && Array.isArray(entry[1])
+    && Number.isInteger(entry[2]) && typeof entry[4] === 'string';
+  let reviews = [];
+  for (const dataset of Object.values(datasets)) {
+    const entries = lookup(dataset, [0]);
+    if (Array.isArray(entries) && entries.length && entries.slice(0, 3).every(isReview)) {
+      reviews = entries.slice(0, maxReviews);
+      break;
+    }
+  }
+  return {raw, reviews};
+}
+"""
+
+
+def in_page_extraction_args() -> Dict[str, Any]:
+    """Arguments passed to `IN_PAGE_EXTRACTION_SCRIPT`."""
+    return {
+        "paths": EMBEDDED_FIELD_PATHS,
+        "detailsKey": DETAILS_DATASET_KEY,
+        "detailsNodePath": DETAILS_NODE_PATH,
+        "maxReviews": MAX_EMBEDDED_REVIEWS,
+    }
+
+
+def extract_listing_from_in_page_result(result: Optional[Dict[str, Any]], app_id: str, url: str, language: str, country: str) -> Optional[Dict[str, Any]]:
+    """
+    Map the object returned by `IN_PAGE_EXTRACTION_SCRIPT` to listing fields.
+
+    Returns:
+        Dict of AppListing keyword arguments, or None if the script found no details data.
+    """
+    if not result or not isinstance(result.get("raw"), dict):
+        return None
+
+    fields = map_embedded_values(result["raw"], result.get("reviews") or [])
+    fields.update(app_id=app_id, url=url, language=language, country=country)
+    return fields
+
+
+def extract_listing_from_dom(html_content: str, app_id: str, url: str, language: str, country: str) -> Dict[str, Any]:
+    """
+    Extract listing fields from a details page using CSS selectors.
+
+    Returns:
+        Dict of AppListing keyword arguments.
+    """
+    # Parse with BeautifulSoup
+    soup = BeautifulSoup(html_content, "lxml")
+
+    # Extract app information
+    title = soup.select_one("h1")
+    title_text = title.text.strip() if title else "Unknown"
+
+    developer_elem = soup.select_one('a[href*="developer"]')
+    developer = developer_elem.text.strip() if developer_elem else "Unknown"
+
+    icon_elem = soup.select_one('img[src*="play-lh.googleusercontent.com"]')
+    icon_url = icon_elem.get("src") if icon_elem else ""
+
+    # Extract rating
+    rating_elem = soup.select_one('div[role="img"][aria-label*="stars"]')
+    rating = None
+    if rating_elem:
+        rating_text = rating_elem.get("aria-label", "")
+        rating_match = re.search(r"([\d.]+) stars", rating_text)
+        if rating_match:
+            rating = float(rating_match.group(1))
+
+    # Extract reviews count
+    reviews_elem = soup.select_one('div[aria-label*="ratings"]')
+    reviews_count = None
+    if reviews_elem:
+        reviews_text = reviews_elem.text.strip()
+        reviews_match = re.search(r"([\d,]+)", reviews_text)
+        if reviews_match:
+            reviews_count = int(reviews_match.group(1).replace(",", ""))
+
+    # Extract descriptions
+    short_description = None
+    short_desc_elem = soup.select_one('meta[name="description"]')
+    if short_desc_elem:
+        short_description = short_desc_elem.get("content", "").strip()
+
+    long_description = None
+    long_desc_elem = soup.select_one('div[data-g-id="description"]')
+    if long_desc_elem:
+        long_description = long_desc_elem.text.strip()
+
+    # Extract screenshots
+    screenshots = []
+    screenshot_elems = soup.select('img[src*="play-lh.googleusercontent.com"][alt*="screenshot"]')
+    for img in screenshot_elems:
+        screenshots.append(
+            {
+                "url": img.get("src", ""),
+                "alt_text": img.get("alt", "")
+            }
+        )
+
+    # Extract feature graphic
+    feature_graphic = None
+    feature_elem = soup.select_one('img[src*="play-lh.googleusercontent.com"]:not([alt*="screenshot"])')
+    if feature_elem and feature_elem != icon_elem:
+        feature_graphic = feature_elem.get("src", "")
+
+    # Extract ratings distribution
+    ratings_distribution = {}
+    rating_bars = soup.select('div[class*="rating-bar"]')
+    for bar in rating_bars:
+        # Try to find the rating value (1-5 stars)
+        rating_value = None
+        for i in range(1, 6):
+            if f"{i} stars" in bar.text:
+                rating_value = str(i)
+                break
+
+        if rating_value:
+            # Try to find the count
+            count_match = re.search(r"([\d,]+)", bar.text)
+            if count_match:
+                count = int(count_match.group(1).replace(",", ""))
+                ratings_distribution[rating_value] = count
+
+    # Extract additional information
+    additional_info = {}
+    info_elems = soup.select('div[class*="details-section"] div[class*="content"]')
+    for elem in info_elems:
+        text = elem.text.strip()
+        if "Updated on" in text:
+            additional_info["last_updated"] = re.search(r"Updated on (.+)", text).group(1)
+        elif "Size" in text:
+            additional_info["size"] = re.search(r"Size (.+)", text).group(1)
+        elif "Installs" in text:
+            additional_info["installs"] = re.search(r"Installs (.+)", text).group(1)
+        elif "Current Version" in text:
+            additional_info["version"] = re.search(r"Current Version (.+)", text).group(1)
+        elif "Content Rating" in text:
+            additional_info["content_rating"] = re.search(r"Content Rating (.+)", text).group(1)
+        elif "In-app purchases" in text:
+            additional_info["in_app_purchases"] = True
+            # Try to extract in-app purchase details
+            purchase_match = re.search(r"In-app purchases(.+)", text)
+            if purchase_match:
+                purchase_text = purchase_match.group(1).strip()
+                if purchase_text and purchase_text != "Yes":
+                    additional_info["in_app_purchase_details"] = [item.strip() for item in purchase_text.split(",")]
+        elif "Contains ads" in text:
+            additional_info["contains_ads"] = True
+        elif "Offered by" in text:
+            additional_info["developer"] = re.search(r"Offered by (.+)", text).group(1).strip()
+        elif "OS" in text or "Android" in text:
+            os_match = re.search(r"Android\s+([\d\.]+)", text)
+            if os_match:
+                additional_info["min_os_version"] = os_match.group(1)
+
+    # Extract developer information
+    developer_info_section = soup.select_one('div[class*="developer-info"]')
+    if developer_info_section:
+        # Extract developer email
+        email_elem = developer_info_section.select_one('a[href^="mailto:"]')
+        if email_elem:
+            developer_email = email_elem.get("href").replace("mailto:", "")
+            additional_info["developer_email"] = developer_email
+
+        # Extract developer website
+        website_elem = developer_info_section.select_one('a[href^="http"]:not([href*="play.google.com"])')
+        if website_elem:
+            developer_website = website_elem.get("href")
+            additional_info["developer_website"] = developer_website
+
+    # Extract privacy policy
+    privacy_elem = soup.select_one('a[href*="privacy"]')
+    if privacy_elem:
+        privacy_url = privacy_elem.get("href")
+        additional_info["privacy_policy_url"] = privacy_url
+
+    # Extract app permissions
+    permissions = []
+    permission_elems = soup.select('div[class*="permission"]')
+    for perm in permission_elems:
+        perm_text = perm.text.strip()
+        if perm_text:
+            permissions.append(perm_text)
+
+    if permissions:
+        additional_info["app_permissions"] = permissions
+
+    # Extract supported devices
+    devices = []
+    device_elems = soup.select('div[class*="device-support"]')
+    for device in device_elems:
+        device_text = device.text.strip()
+        if device_text:
+            devices.append(device_text)
+
+    if devices:
+        additional_info["supported_devices"] = devices
+
+    # Extract update history
+    update_history = []
+    update_elems = soup.select('div[class*="update-history"] div[class*="update-item"]')
+    for update in update_elems:
+        date_elem = update.select_one('div[class*="date"]')
+        desc_elem = update.select_one('div[class*="description"]')
+
+        if date_elem and desc_elem:
+            update_history.append({
+                "date": date_elem.text.strip(),
+                "description": desc_elem.text.strip()
+            })
+
+    if update_history:
+        additional_info["update_history"] = update_history
+
+    # Extract user reviews
+    user_reviews = []
+    review_elems = soup.select('div[data-g-id="reviews"] div[data-g-id="review"]')
+    for review in review_elems[:5]:  # Limit to 5 reviews for performance
+        rating_elem = review.select_one('div[role="img"][aria-label*="stars"]')
+        rating_value = None
+        if rating_elem:
+            rating_text = rating_elem.get("aria-label", "")
+            rating_match = re.search(r"([\d.]+) stars", rating_text)
+            if rating_match:
+                rating_value = float(rating_match.group(1))
+
+        author_elem = review.select_one('div[class*="author"]')
+        author = author_elem.text.strip() if author_elem else "Unknown"
+
+        date_elem = review.select_one('div[class*="date"]')
+        date = date_elem.text.strip() if date_elem else None
+
+        text_elem = review.select_one('div[class*="content"]')
+        text = text_elem.text.strip() if text_elem else ""
+
+        user_reviews.append({
+            "author": author,
+            "rating": rating_value,
+            "date": date,
+            "text": text
+        })
+
+    # Extract developer responses
+    developer_responses = []
+    response_elems = soup.select('div[data-g-id="developer-response"]')
+    for response in response_elems[:5]:  # Limit to 5 responses for performance
+        date_elem = response.select_one('div[class*="date"]')
+        date = date_elem.text.strip() if date_elem else None
+
+        text_elem = response.select_one('div[class*="content"]')
+        text = text_elem.text.strip() if text_elem else ""
+
+        developer_responses.append({
+            "date": date,
+            "text": text
+        })
+
+    # Extract similar apps
+    similar_apps = []
+    similar_elems = soup.select('div[data-g-id="similar-apps"] a[href*="details"]')
+    for app in similar_elems[:5]:  # Limit to 5 similar apps for performance
+        app_name_elem = app.select_one('div[class*="title"]')
+        app_name = app_name_elem.text.strip() if app_name_elem else "Unknown"
+        app_url = app.get("href", "")
+        if app_url and not app_url.startswith("http"):
+            app_url = f"https://play.google.com{app_url}"
+
+        similar_apps.append({
+            "name": app_name,
+            "url": app_url
+        })
+
+    return {
+        "app_id": app_id,
+        "url": url,
+        "language": language,
+        "country": country,
+        "title": title_text,
+        "developer": developer,
+        "icon_url": icon_url,
+        "rating": rating,
+        "reviews_count": reviews_count,
+        "ratings_distribution": ratings_distribution if ratings_distribution else None,
+        "short_description": short_description,
+        "long_description": long_description,
+        "screenshots": screenshots,
+        "feature_graphic": feature_graphic,
+        "last_updated": additional_info.get("last_updated"),
+        "size": additional_info.get("size"),
+        "installs": additional_info.get("installs"),
+        "version": additional_info.get("version"),
+        "content_rating": additional_info.get("content_rating"),
+        "contains_ads": additional_info.get("contains_ads"),
+        "in_app_purchases": additional_info.get("in_app_purchases"),
+        "in_app_purchase_details": additional_info.get("in_app_purchase_details"),
+        "developer_email": additional_info.get("developer_email"),
+        "developer_website": additional_info.get("developer_website"),
+        "privacy_policy_url": additional_info.get("privacy_policy_url"),
+        "app_permissions": additional_info.get("app_permissions"),
+        "supported_devices": additional_info.get("supported_devices"),
+        "min_os_version": additional_info.get("min_os_version"),
+        "update_history": additional_info.get("update_history"),
+        "user_reviews": user_reviews,
+        "developer_responses": developer_responses,
+        "similar_apps": similar_apps,
+    }
+
+
+def extract_listing_fields(html_content: str, app_id: str, url: str, language: str, country: str) -> Dict[str, Any]:
+    """
+    Extract listing fields from a details page, preferring the embedded data.
+
+    Returns:
+        Dict of AppListing keyword arguments; the `extractor` key names the extractor used.
+    """
+    fields = extract_listing_from_embedded_data(html_content, app_id, url, language, country)
+    if fields is not None:
+        fields["extractor"] = "embedded"
+        return fields
+
+    fields = extract_listing_from_dom(html_content, app_id, url, language, country)
+    fields["extractor"] = "dom"
+    return fields
+
+
+def extract_listing_text(html_content: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Extract only the title and short description from a details page's embedded data.
+
+    Only the details dataset is decoded when it is at its usual key, which keeps this
+    cheap enough to probe many locales. Returns None if the page has no embedded data.
+    """
+    details = find_details_node(parse_embedded_datasets(html_content, keys={DETAILS_DATASET_KEY}))
+    if details is None:
+        details = find_details_node(parse_embedded_datasets(html_content))
+    if details is None:
+        return None
+    return {
+        "title": _clean_text(lookup_path(details, EMBEDDED_FIELD_PATHS["title"])),
+        "short_description": _clean_text(lookup_path(details, EMBEDDED_FIELD_PATHS["short_description"])),
+    }
+
+
+# Links to app details pages, as found on developer pages
+DETAILS_LINK_PATTERN = re.compile(r"/store/apps/details\?id=([A-Za-z0-9_.]+)")
+
+
+def extract_developer_app_ids(html_content: str) -> List[str]:
+    """Return the ids of the apps linked from a developer page, in page order and without duplicates."""
+    return list(dict.fromkeys(DETAILS_LINK_PATTERN.findall(html_content)))
+
+
+def run_timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Call `func(*args)` and return its result with the elapsed time in milliseconds.
+
+    Used to time extraction inside worker processes, excluding queueing and transfer.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Union
+from urllib.request import Request as UrllibRequest
+
+import httpx
+from playwright.async_api import Page, Route
+from google_play_scraper.utils import request as gplay_request
+from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+FIXTURE_MODE_RECORD = "record"
+FIXTURE_MODE_REPLAY = "replay"
+
+# Response headers kept in httpx fixtures; the body is stored decoded, so
+# content-encoding and content-length are dropped
+_KEPT_HEADERS = ("content-type", "location")
+
+# google-play-scraper errors that are recorded and raised again on replay
+_GPLAY_ERRORS = {"NotFoundError": NotFoundError, "ExtraHTTPError": ExtraHTTPError}
+
+
+class FixtureMissingError(Exception):
+    """Raised in replay mode when a request has no recorded fixture."""
+
+
+class FixtureStore:
+    """
+    Record upstream responses to fixture files, or serve them back without network access.
+
+    Covers the three ways the scraper talks to Google Play: google-play-scraper's HTTP
+    calls, the HTTP tier's httpx client and Playwright page navigations. Each request is
+    stored as one JSON file named after a hash of its method, URL and body, so the
+    same request made again maps to the same fixture.
+    """
+
+    def __init__(self, directory: str, mode: str, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the FixtureStore.
+
+        Args:
+            directory: Directory holding the fixture files (created in record mode).
+            mode: "record" to save live responses, "replay" to serve saved ones.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        if mode not in (FIXTURE_MODE_RECORD, FIXTURE_MODE_REPLAY):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {"recorded": 0, "replayed": 0, "missing": 0}
+        if mode == FIXTURE_MODE_RECORD:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == FIXTURE_MODE_REPLAY
+
+    def save(self, method: str, url: str, body: Union[str, bytes, None], fixture: Dict[str, Any]) -> None:
+        """Write the fixture of a request."""
+        path = self._path(method, url, body)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"method": method, "url": url, **fixture}, f, ensure_ascii=False)
+        with self._lock:
+            self._counters["recorded"] += 1
+
+    def load(self, method: str, url: str, body: Union[str, bytes, None] = None) -> Dict[str, Any]:
+        """Return the fixture of a request, or raise FixtureMissingError."""
+        try:
+            with open(self._path(method, url, body), "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self._counters["missing"] += 1
+            raise FixtureMissingError(f"No fixture recorded for {method} {url}")
+        with self._lock:
+            self._counters["replayed"] += 1
+        return fixture
+
+    def patch_google_play_scraper(self) -> None:
+        """Route google-play-scraper's HTTP calls through the store."""
+        original_urlopen = gplay_request._urlopen
+
+        def fixture_urlopen(obj: Union[str, UrllibRequest]) -> str:
+            if isinstance(obj, UrllibRequest):
+                method, url, body = obj.get_method(), obj.full_url, obj.data
+            else:
+                method, url, body = "GET", obj, None
+
+            if self.replaying:
+                fixture = self.load(method, url, body)
+                if "error" in fixture:
+                    raise _GPLAY_ERRORS.get(fixture["error"], ExtraHTTPError)(fixture["message"])
+                return fixture["body"]
+
+            try:
+                response = original_urlopen(obj)
+            except (NotFoundError, ExtraHTTPError) as e:
+                self.save(method, url, body, {"error": type(e).__name__, "message": str(e)})
+                raise
+            self.save(method, url, body, {"status": 200, "body": response})
+            return response
+
+        gplay_request._urlopen = fixture_urlopen
+        self.logger.info(f"google-play-scraper requests will be {self.mode}ed ({self.directory})")
+
+    def httpx_transport(self, transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        """Wrap an httpx transport so its requests go through the store."""
+        return _FixtureTransport(self, transport)
+
+    async def route_page(self, page: Page) -> None:
+        """
+        Route a Playwright page's document requests through the store.
+
+        In replay mode every other request is aborted, so pages render offline from
+        the recorded server HTML (inline scripts, including the embedded data, still run).
+        """
+        await page.route("**/*", self._handle_route)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode and fixture counters."""
+        return {"mode": self.mode, "directory": self.directory, **self._counters}
+
+    async def _handle_route(self, route: Route) -> None:
+        request = route.request
+        if request.resource_type != "document":
+            if self.replaying:
+                await route.abort()
+            else:
+                # Leave other requests to the context's routes (e.g. lean mode)
+                await route.fallback()
+            return
+
+        if self.replaying:
+            try:
+                fixture = self.load(request.method, request.url, request.post_data)
+            except FixtureMissingError as e:
+                self.logger.warning(str(e))
+                await route.abort()
+                return
+            await route.fulfill(status=fixture["status"], content_type="text/html; charset=utf-8", body=fixture["body"])
+            return
+
+        response = await route.fetch()
+        body = await response.text()
+        self.save(request.method, request.url, request.post_data, {"status": response.status, "body": body})
+        await route.fulfill(response=response, body=body)
+
+    def _path(self, method: str, url: str, body: Union[str, bytes, None]) -> str:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8") + (body or b"")).hexdigest()
+        return os.path.join(self.directory, f"{digest[:24]}.json")
+
+
+class _FixtureTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records or replays responses through a FixtureStore."""
+
+    def __init__(self, store: FixtureStore, transport: httpx.AsyncBaseTransport):
+        self.store = store
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        if self.store.replaying:
+            fixture = self.store.load(request.method, str(request.url), body)
+            return httpx.Response(
+                fixture["status"],
+                headers=fixture.get("headers", {}),
+                content=fixture["body"].encode("utf-8"),
+                request=request,
+            )
+
+        response = await self.transport.handle_async_request(request)
+        await response.aread()
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        if "content-type" in headers:
+            # The body is stored (and replayed) as UTF-8
+            headers["content-type"] = headers["content-type"].split(";")[0] + "; charset=utf-8"
+        fixture = {"status": response.status_code, "headers": headers, "body": response.text}
+        self.store.save(request.method, str(request.url), body, fixture)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=fixture["body"].encode("utf-8"),
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
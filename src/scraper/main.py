@@ -3,18 +3,52 @@ import re
 import json
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any, Union
-from datetime import datetime
+import time
+import hashlib
+import functools
+import itertools
+import statistics
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Any, Tuple, Union
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, quote_plus, urlsplit
 
 import httpx
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
-from bs4 import BeautifulSoup
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
 from google_play_scraper import app as gplay_app
 from google_play_scraper import reviews_all, reviews, permissions as gplay_permissions, Sort
+# Continuation tokens are rebuilt from their serialized form to resume harvests;
+# the library only exposes this class privately.
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.features.reviews import MAX_COUNT_EACH_FETCH, _ContinuationToken, _fetch_review_items
+from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+from browser_pool import BrowserPool
+from cache import FetchedValue, ListingCache
+from singleflight import SingleFlight
+from snapshot_store import SnapshotStore
+from rate_limit import THROTTLE_STATUS_CODES, RateLimitTimeout, UpstreamLimiter
+from circuit_breaker import CircuitBreaker
+from fixtures import FixtureStore
+from extractors import (
+    DETAILS_DATASET_KEY,
+    IN_PAGE_EXTRACTION_SCRIPT,
+    extract_developer_app_ids,
+    extract_listing_fields,
+    extract_listing_from_embedded_data,
+    extract_listing_from_in_page_result,
+    extract_listing_text,
+    find_dataset_callback,
+    in_page_extraction_args,
+    run_timed,
+)
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +60,248 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Playwright browser pool configuration
+PLAYWRIGHT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+PLAYWRIGHT_MAX_BROWSERS = int(os.environ.get("PLAYWRIGHT_MAX_BROWSERS", "1"))
+PLAYWRIGHT_MAX_PAGES_PER_BROWSER = int(os.environ.get("PLAYWRIGHT_MAX_PAGES_PER_BROWSER", "4"))
+PLAYWRIGHT_MAX_NAVIGATIONS_PER_BROWSER = int(os.environ.get("PLAYWRIGHT_MAX_NAVIGATIONS_PER_BROWSER", "200"))
+PLAYWRIGHT_MAX_BROWSER_MEMORY_MB = int(os.environ.get("PLAYWRIGHT_MAX_BROWSER_MEMORY_MB", "1024"))
+PLAYWRIGHT_MEMORY_CHECK_INTERVAL = int(os.environ.get("PLAYWRIGHT_MEMORY_CHECK_INTERVAL", "10"))
+# Lean mode blocks images, media, fonts and third-party scripts, caches static assets
+# across navigations and only waits for the DOM instead of network idle. It stays
+# opt-in until benchmarks/page_load.py has been run against live pages.
+PLAYWRIGHT_LEAN_MODE = os.environ.get("PLAYWRIGHT_LEAN_MODE", "false").lower() in ("1", "true", "yes")
+PLAYWRIGHT_ASSET_CACHE_MB = int(os.environ.get("PLAYWRIGHT_ASSET_CACHE_MB", "64"))
+# "evaluate" extracts the listing with a script run inside the page; "html" serializes
+# the whole page and parses it in Python
+PLAYWRIGHT_EXTRACTION_MODE = os.environ.get("PLAYWRIGHT_EXTRACTION_MODE", "evaluate").lower()
+
+# google-play-scraper configuration. The library is synchronous, so its calls run on
+# a dedicated, bounded thread pool instead of the event loop.
+GPLAY_MAX_WORKERS = int(os.environ.get("GPLAY_MAX_WORKERS", "12"))
+GPLAY_DETAILS_TIMEOUT = float(os.environ.get("GPLAY_DETAILS_TIMEOUT", "20"))
+GPLAY_REVIEWS_TIMEOUT = float(os.environ.get("GPLAY_REVIEWS_TIMEOUT", "15"))
+GPLAY_PERMISSIONS_TIMEOUT = float(os.environ.get("GPLAY_PERMISSIONS_TIMEOUT", "10"))
+
+gplay_executor = ThreadPoolExecutor(max_workers=GPLAY_MAX_WORKERS, thread_name_prefix="gplay")
+
+# HTML parsing configuration. Extraction runs on a worker pool ("thread" or "process")
+# to keep concurrent scrapes from blocking each other. Threads are the default: the
+# extraction is mostly regex and JSON decoding, and a process pool pays for pickling
+# the whole page to a worker on every parse.
+PARSE_POOL_KIND = os.environ.get("PARSE_POOL_KIND", "thread").lower()
+PARSE_POOL_WORKERS = int(os.environ.get("PARSE_POOL_WORKERS", "2"))
+
+def create_parse_executor() -> Executor:
+    if PARSE_POOL_KIND == "process":
+        return ProcessPoolExecutor(max_workers=PARSE_POOL_WORKERS)
+    return ThreadPoolExecutor(max_workers=PARSE_POOL_WORKERS, thread_name_prefix="parse")
+
+parse_executor = create_parse_executor()
+
+# Recent parse durations in milliseconds: time spent extracting in the worker and
+# wall time including queueing and transferring the HTML to the worker
+parse_timings: Dict[str, deque] = {"extract": deque(maxlen=1000), "wall": deque(maxlen=1000)}
+
+# Record/replay fixtures: "record" saves every upstream response to FIXTURE_DIR,
+# "replay" serves saved responses without network access (for benchmarks and tests)
+FIXTURE_MODE = os.environ.get("FIXTURE_MODE", "").lower()
+FIXTURE_DIR = os.environ.get("FIXTURE_DIR", "fixtures")
+
+fixture_store = FixtureStore(FIXTURE_DIR, FIXTURE_MODE, logger=logger) if FIXTURE_MODE else None
+if fixture_store is not None:
+    fixture_store.patch_google_play_scraper()
+
+# HTTP tier configuration. Details pages are fetched with a pooled keep-alive client
+# and parsed from their server-rendered embedded data, without a browser.
+HTTP_TIER_TIMEOUT = float(os.environ.get("HTTP_TIER_TIMEOUT", "15"))
+HTTP_TIER_MAX_CONNECTIONS = int(os.environ.get("HTTP_TIER_MAX_CONNECTIONS", "20"))
+
+http_tier_limits = httpx.Limits(
+    max_connections=HTTP_TIER_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_TIER_MAX_CONNECTIONS,
+)
+
+http_client = httpx.AsyncClient(
+    timeout=HTTP_TIER_TIMEOUT,
+    follow_redirects=True,
+    headers={"User-Agent": PLAYWRIGHT_USER_AGENT},
+    limits=http_tier_limits,
+    transport=(
+        fixture_store.httpx_transport(httpx.AsyncHTTPTransport(limits=http_tier_limits))
+        if fixture_store is not None else None
+    ),
+)
+
+# Upstream rate limiting configuration. Each class of Google Play endpoint gets its
+# own token bucket and adaptive concurrency limit, which backs off when throttled.
+UPSTREAM_RATE_PER_SECOND = float(os.environ.get("UPSTREAM_RATE_PER_SECOND", "5"))
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", "10"))
+UPSTREAM_MIN_CONCURRENCY = int(os.environ.get("UPSTREAM_MIN_CONCURRENCY", "1"))
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get("UPSTREAM_MAX_CONCURRENCY", "8"))
+UPSTREAM_QUEUE_TIMEOUT = float(os.environ.get("UPSTREAM_QUEUE_TIMEOUT", "30"))
+
+def http_error_status(e: BaseException) -> Optional[int]:
+    """Return the HTTP status code an upstream error reports, if any."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code
+    if isinstance(e, ExtraHTTPError):
+        match = re.search(r"Status code (\d+)", str(e))
+        return int(match.group(1)) if match else None
+    return None
+
+def is_throttle_error(e: Exception) -> bool:
+    """Tell whether an upstream error means Google Play is throttling us."""
+    if http_error_status(e) in THROTTLE_STATUS_CODES:
+        return True
+    # google-play-scraper's batchexecute calls report rate limiting this way
+    return "PlayGatewayError" in str(e)
+
+# "web_page" covers the details page fetched by both the HTTP and Playwright tiers
+upstream_limiters = {
+    name: UpstreamLimiter(
+        name,
+        rate_per_second=UPSTREAM_RATE_PER_SECOND,
+        burst=UPSTREAM_BURST,
+        min_concurrency=UPSTREAM_MIN_CONCURRENCY,
+        max_concurrency=UPSTREAM_MAX_CONCURRENCY,
+        queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+        is_throttled=is_throttle_error,
+        logger=logger,
+    )
+    for name in ("details", "reviews", "permissions", "web_page")
+}
+
+# Circuit breaker configuration. A tier whose recent calls mostly fail is skipped
+# until a probe call shows it has recovered.
+CIRCUIT_BREAKER_WINDOW = int(os.environ.get("CIRCUIT_BREAKER_WINDOW", "20"))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.environ.get("CIRCUIT_BREAKER_MIN_CALLS", "5"))
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.environ.get("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.environ.get("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+CIRCUIT_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", "0"))
+
+# Listing cache configuration
+LISTING_CACHE_MAX_ENTRIES = int(os.environ.get("LISTING_CACHE_MAX_ENTRIES", "512"))
+LISTING_CACHE_TTL_SECONDS = float(os.environ.get("LISTING_CACHE_TTL_SECONDS", "900"))
+LISTING_CACHE_STALE_SECONDS = float(os.environ.get("LISTING_CACHE_STALE_SECONDS", "3600"))
+
+listing_cache = ListingCache(
+    max_entries=LISTING_CACHE_MAX_ENTRIES,
+    ttl_seconds=LISTING_CACHE_TTL_SECONDS,
+    stale_seconds=LISTING_CACHE_STALE_SECONDS,
+    logger=logger,
+)
+
+# Small lookups (developer app lists, locale probe texts) get their own cache, so they
+# neither evict full listings nor count towards the listing cache's hit ratio
+LOOKUP_CACHE_MAX_ENTRIES = int(os.environ.get("LOOKUP_CACHE_MAX_ENTRIES", "2048"))
+
+lookup_cache = ListingCache(
+    max_entries=LOOKUP_CACHE_MAX_ENTRIES,
+    ttl_seconds=LISTING_CACHE_TTL_SECONDS,
+    stale_seconds=LISTING_CACHE_STALE_SECONDS,
+    logger=logger,
+)
+
+# Concurrent identical scrapes share one upstream fetch
+scrape_singleflight = SingleFlight()
+
+# Snapshot store configuration (an empty SNAPSHOT_DB_PATH disables the store)
+SNAPSHOT_DB_PATH = os.environ.get("SNAPSHOT_DB_PATH", "snapshots.db")
+SNAPSHOT_KEYFRAME_INTERVAL = int(os.environ.get("SNAPSHOT_KEYFRAME_INTERVAL", "10"))
+SNAPSHOT_WARM_SECONDS = float(os.environ.get("SNAPSHOT_WARM_SECONDS", "900"))
+
+snapshot_store = SnapshotStore(
+    path=SNAPSHOT_DB_PATH,
+    keyframe_interval=SNAPSHOT_KEYFRAME_INTERVAL,
+    logger=logger,
+) if SNAPSHOT_DB_PATH else None
+
+# Batch scraping configuration
+SCRAPE_BATCH_MAX_CONCURRENCY = int(os.environ.get("SCRAPE_BATCH_MAX_CONCURRENCY", "5"))
+SCRAPE_BATCH_MAX_LOCALES = int(os.environ.get("SCRAPE_BATCH_MAX_LOCALES", "50"))
+SCRAPE_BATCH_MAX_ITEMS = int(os.environ.get("SCRAPE_BATCH_MAX_ITEMS", "500"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Developer portfolio crawl configuration
+DEVELOPER_MAX_APPS = int(os.environ.get("DEVELOPER_MAX_APPS", "100"))
+
+# Review harvesting configuration. google-play-scraper's reviews() swallows fetch
+# errors and returns what it has without a token, just like the end of a stream, so
+# pages are fetched one request at a time with fetch_review_page, which raises
+# instead; a failed page is retried before the stream is reported as failed.
+REVIEWS_MAX_PER_REQUEST = int(os.environ.get("REVIEWS_MAX_PER_REQUEST", "5000"))
+REVIEWS_MAX_BATCH_SIZE = min(int(os.environ.get("REVIEWS_MAX_BATCH_SIZE", "200")), MAX_COUNT_EACH_FETCH)
+REVIEWS_PAGE_RETRIES = int(os.environ.get("REVIEWS_PAGE_RETRIES", "2"))
+REVIEWS_RETRY_DELAY_SECONDS = float(os.environ.get("REVIEWS_RETRY_DELAY_SECONDS", "1"))
+
+REVIEW_SORTS = {
+    "newest": Sort.NEWEST,
+    "most_relevant": Sort.MOST_RELEVANT,
+    "rating": Sort.RATING,
+}
+
+# Prometheus metrics served on /metrics. Labels are limited to bounded values
+# (stage, tier, error kind, route template), never app ids.
+metrics_registry = CollectorRegistry()
+# Latency buckets in seconds, from a cached parse up to a slow browser navigation
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def scraper_metric(metric_class: type, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs: Any) -> Any:
+    return metric_class(name, documentation, labelnames, namespace="scraper", registry=metrics_registry, **kwargs)
+
+stage_duration = scraper_metric(
+    Histogram,
+    "stage_duration_seconds",
+    "Duration of scraping stages (details, reviews, permissions, http_page, developer_page, locale_probe, browser_launch, navigation, evaluate, parse)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+tier_attempts = scraper_metric(Counter, "tier_attempts_total", "Scrape attempts per tier and outcome (success, failure, skipped)", ["tier", "outcome"])
+tier_errors = scraper_metric(Counter, "tier_errors_total", "Failed scrape attempts per tier and kind of error", ["tier", "error"])
+tier_fallbacks = scraper_metric(Counter, "tier_fallbacks_total", "Times a scrape fell back to the next tier, by the tier that was given up", ["from_tier"])
+listings_scraped = scraper_metric(Counter, "listings_scraped_total", "Listings scraped per tier", ["tier"])
+cache_lookups = scraper_metric(Counter, "listing_cache_lookups_total", "Listing cache lookups by status (HIT, MISS, STALE)", ["status"])
+upstream_calls = scraper_metric(Counter, "upstream_calls_total", "Calls made to Google Play by kind", ["call"])
+requests_in_flight = scraper_metric(Gauge, "http_requests_in_flight", "HTTP requests currently being handled")
+request_duration = scraper_metric(
+    Histogram, "http_request_duration_seconds", "HTTP request duration until the response starts, by route", ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+scraper_metric(Gauge, "listing_cache_hit_ratio", "Share of listing cache lookups served from the cache").set_function(
+    lambda: listing_cache.stats()["hit_ratio"]
+)
+scraper_metric(Gauge, "listing_cache_entries", "Listings in the in-memory cache").set_function(
+    lambda: listing_cache.stats()["size"]
+)
+scraper_metric(Gauge, "scrapes_in_flight", "Distinct upstream scrapes currently running").set_function(
+    lambda: scrape_singleflight.stats()["in_flight"]
+)
+scraper_metric(Gauge, "browser_pages_in_use", "Browser pages currently leased from the pool").set_function(
+    lambda: browser_pool.active_pages
+)
+upstream_in_flight = scraper_metric(Gauge, "upstream_in_flight", "Calls in flight per upstream endpoint class", ["upstream"])
+upstream_queue_depth = scraper_metric(Gauge, "upstream_queue_depth", "Calls waiting for an upstream slot per endpoint class", ["upstream"])
+upstream_concurrency_limit = scraper_metric(Gauge, "upstream_concurrency_limit", "Adaptive concurrency limit per upstream endpoint class", ["upstream"])
+for upstream_name, upstream_limiter in upstream_limiters.items():
+    upstream_in_flight.labels(upstream_name).set_function(lambda limiter=upstream_limiter: limiter.stats()["in_flight"])
+    upstream_queue_depth.labels(upstream_name).set_function(lambda limiter=upstream_limiter: limiter.stats()["queue_depth"])
+    upstream_concurrency_limit.labels(upstream_name).set_function(lambda limiter=upstream_limiter: limiter.concurrency_limit)
+
+browser_pool = BrowserPool(
+    max_browsers=PLAYWRIGHT_MAX_BROWSERS,
+    max_pages_per_browser=PLAYWRIGHT_MAX_PAGES_PER_BROWSER,
+    max_navigations_per_browser=PLAYWRIGHT_MAX_NAVIGATIONS_PER_BROWSER,
+    max_memory_mb=PLAYWRIGHT_MAX_BROWSER_MEMORY_MB or None,
+    memory_check_interval=PLAYWRIGHT_MEMORY_CHECK_INTERVAL,
+    lean_mode=PLAYWRIGHT_LEAN_MODE,
+    asset_cache_max_bytes=PLAYWRIGHT_ASSET_CACHE_MB * 1024 * 1024,
+    context_options={"user_agent": PLAYWRIGHT_USER_AGENT},
+    on_browser_launch=lambda seconds: stage_duration.labels(stage="browser_launch").observe(seconds),
+    logger=logger,
+)
+
 # Create FastAPI app
 app = FastAPI(
     title="Google Play Scraper API",
@@ -42,6 +318,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Record in-flight requests and request durations for /metrics."""
+    requests_in_flight.inc()
+    start = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        requests_in_flight.dec()
+        # Label by route template (e.g. /snapshots/{app_id}) to keep app ids out of labels
+        route = request.scope.get("route")
+        request_duration.labels(route=getattr(route, "path", "unmatched")).observe(time.perf_counter() - start)
+
+@app.on_event("startup")
+async def start_browser_pool():
+    """Launch the warm browser pool used by the Playwright fallback."""
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # The pool retries lazily on the first lease, so the API can still serve
+        # google-play-scraper requests if Chromium is unavailable at startup.
+        logger.error(f"Failed to start browser pool: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_scrapers():
+    await browser_pool.stop()
+    await http_client.aclose()
+    gplay_executor.shutdown(wait=False, cancel_futures=True)
+    parse_executor.shutdown(wait=False, cancel_futures=True)
+    if snapshot_store is not None:
+        snapshot_store.close()
+
 # Models
 class AppListingRequest(BaseModel):
     url: HttpUrl = Field(..., description="Google Play app listing URL")
@@ -56,6 +364,8 @@ class FullScrapingRequest(BaseModel):
     url: HttpUrl = Field(..., description="Google Play app listing URL")
     language: str = Field(..., description="Language code (e.g., en, es, fr)")
     country: str = Field(..., description="Country code (e.g., US, ES, FR)")
+    fields: Optional[List[str]] = Field(None, description="Only return these AppListing fields")
+    exclude: Optional[List[str]] = Field(None, description="AppListing fields to leave out")
 
 class Screenshot(BaseModel):
     url: str
@@ -97,8 +407,156 @@ class AppListing(BaseModel):
     developer_responses: List[Dict[str, Any]] = []
     similar_apps: List[Dict[str, str]] = []
     html_content: Optional[str] = None  # Raw HTML for further analysis if needed
+    fetch_timings: Optional[Dict[str, float]] = None  # Upstream call durations in milliseconds
+    scrape_tier: Optional[str] = None  # Scraping tier that produced this listing
+
+class LocaleRequest(BaseModel):
+    language: str = Field(..., description="Language code (e.g., en, es, fr)")
+    country: str = Field(..., description="Country code (e.g., US, ES, FR)")
+
+class BatchScrapingRequest(BaseModel):
+    url: Optional[HttpUrl] = Field(None, description="Google Play app listing URL")
+    app_id: Optional[str] = Field(None, description="App ID (alternative to url)")
+    apps: Optional[List[str]] = Field(None, min_length=1, description="Several app IDs or URLs (alternative to url/app_id)")
+    locales: List[LocaleRequest] = Field(..., min_length=1, description="Language/country pairs to scrape")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Maximum number of app/locale pairs scraped at once")
+    fields: Optional[List[str]] = Field(None, description="Only return these AppListing fields")
+    exclude: Optional[List[str]] = Field(None, description="AppListing fields to leave out")
+
+class BatchScrapeResult(BaseModel):
+    index: int  # Position of the (app, locale) pair in the request
+    app_id: str
+    language: str
+    country: str
+    listing: Optional[Dict[str, Any]] = None  # AppListing trimmed to the selected fields
+    cache_status: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchScrapingResponse(BaseModel):
+    app_id: Optional[str] = None  # Set when a single app was requested
+    results: List[BatchScrapeResult]
+
+class DeveloperCrawlRequest(BaseModel):
+    developer: str = Field(..., description="Developer page URL, developer name or numeric developer id")
+    locales: List[LocaleRequest] = Field(..., min_length=1, description="Language/country pairs to scrape every app in")
+    max_apps: Optional[int] = Field(None, ge=1, description="Scrape at most this many of the developer's apps (capped by the server limit)")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Maximum number of app/locale pairs scraped at once")
+    fields: Optional[List[str]] = Field(None, description="Only return these AppListing fields")
+    exclude: Optional[List[str]] = Field(None, description="AppListing fields to leave out")
+
+class LocaleProbeRequest(BaseModel):
+    url: Optional[HttpUrl] = Field(None, description="Google Play app listing URL; its hl/gl is the default reference locale")
+    app_id: Optional[str] = Field(None, description="App ID (alternative to url)")
+    locales: List[str] = Field(..., min_length=1, description="Locales to probe, as codes (e.g. pt-BR) or listing URLs with hl/gl")
+    reference: Optional[str] = Field(None, description="Reference locale (defaults to the url's locale, or en-US)")
+
+class LocaleProbeResult(BaseModel):
+    locale: str  # "<language>-<country>"
+    language: str
+    country: str
+    title: Optional[str] = None
+    short_description: Optional[str] = None
+    fingerprint: Optional[str] = None
+    same_as_reference: Optional[bool] = None
+    error: Optional[str] = None
+
+class LocaleGroup(BaseModel):
+    fingerprint: str
+    locales: List[str]  # Locales serving this exact title and short description
+    representative: str  # Locale to scrape on behalf of the whole group
+    is_reference: bool
+
+class LocaleDivergenceResponse(BaseModel):
+    app_id: str
+    reference: str
+    results: List[LocaleProbeResult]
+    groups: List[LocaleGroup]
+    distinct_locales: List[LocaleRequest]  # One locale per group that differs from the reference
+    scrape_locales: List[LocaleRequest]  # The reference plus distinct_locales, ready for /scrape-batch
+
+class ReviewHarvestRequest(BaseModel):
+    url: Optional[HttpUrl] = Field(None, description="Google Play app listing URL")
+    app_id: Optional[str] = Field(None, description="App ID (alternative to url)")
+    language: str = Field(..., description="Language code (e.g., en, es, fr)")
+    country: str = Field(..., description="Country code (e.g., US, ES, FR)")
+    sorts: List[str] = Field(["newest"], min_length=1, description="Sort orders to harvest: newest, most_relevant, rating")
+    scores: List[Optional[int]] = Field([None], min_length=1, description="Star filters to harvest (1-5, or null for all)")
+    batch_size: int = Field(200, ge=1, description="Reviews fetched per page")
+    max_reviews: Optional[int] = Field(None, ge=1, description="Stop after this many unique reviews (capped by the server limit)")
+    continuation_tokens: Dict[str, str] = Field({}, description="Tokens from a previous harvest, keyed by stream, to resume from")
+
+class ReviewBatch(BaseModel):
+    stream: str  # "<sort>:<score or all>"
+    sort: str
+    score: Optional[int] = None
+    reviews: List[Dict[str, Any]] = []
+    continuation_token: Optional[str] = None  # Pass back in continuation_tokens to resume this stream
+    done: bool = False
+    total_harvested: int = 0
+    error: Optional[str] = None
+
+# Optional, expensive parts of a listing and the AppListing fields they populate
+SCRAPE_PART_FIELDS: Dict[str, set] = {
+    "reviews": {"user_reviews", "developer_responses"},
+    "permissions": {"app_permissions"},
+    "html": {"html_content"},
+}
+
+# Parts fetched when the caller does not select fields; the raw HTML is opt-in
+DEFAULT_SCRAPE_PARTS = frozenset({"reviews", "permissions"})
+
+# Fields always returned so a trimmed listing can still be identified
+ALWAYS_INCLUDED_FIELDS = {"app_id", "language", "country"}
+
+# Number of upstream requests made, by call type
+upstream_call_counts: Dict[str, int] = {}
 
 # Helper functions
+def count_upstream_call(name: str) -> None:
+    upstream_call_counts[name] = upstream_call_counts.get(name, 0) + 1
+    upstream_calls.labels(call=name).inc()
+
+def classify_error(e: BaseException) -> str:
+    """Return a bounded label for the kind of an error, looking through wrapped exceptions."""
+    while e is not None:
+        if isinstance(e, RateLimitTimeout):
+            return "rate_limit_queue"
+        if isinstance(e, Exception) and is_throttle_error(e):
+            return "throttled"
+        if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)) or "Timeout" in type(e).__name__:
+            return "timeout"
+        if isinstance(e, NotFoundError) or (isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 404):
+            return "not_found"
+        if 400 <= (http_error_status(e) or 0) < 500:
+            return "client_error"
+        e = e.__cause__ or e.__context__
+    return "other"
+
+# Kinds of tier errors that say nothing about whether the tier works: Google Play
+# answered but the app is missing or the request was rejected, or the call never
+# left our own rate limiter. Only the other kinds count as circuit breaker failures.
+BREAKER_SUCCESS_ERRORS = frozenset({"not_found", "client_error"})
+BREAKER_IGNORED_ERRORS = frozenset({"rate_limit_queue"})
+
+def resolve_field_selection(fields: Optional[List[str]], exclude: Optional[List[str]]) -> tuple[set, frozenset]:
+    """
+    Resolve `fields`/`exclude` into the set of returned fields and the parts to fetch.
+    
+    Without `fields`, every field except `html_content` is returned.
+    
+    Raises:
+        HTTPException: If an unknown field name is given.
+    """
+    known_fields = set(AppListing.model_fields)
+    unknown = (set(fields or []) | set(exclude or [])) - known_fields
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    selected = set(fields) if fields else known_fields - SCRAPE_PART_FIELDS["html"]
+    selected -= set(exclude or [])
+    parts = frozenset(part for part, part_fields in SCRAPE_PART_FIELDS.items() if part_fields & selected)
+    return selected | ALWAYS_INCLUDED_FIELDS, parts
+
 def extract_app_id(url: str) -> str:
     """Extract app ID from Google Play URL."""
     match = re.search(r"id=([^&]+)", url)
@@ -132,13 +590,83 @@ def extract_language_country(url: str) -> tuple[str, str]:
     
     return language, country
 
+def build_listing_url(app_id: str, language: str, country: str) -> str:
+    """Build the Google Play details URL for an app in a given language and country."""
+    return f"https://play.google.com/store/apps/details?id={app_id}&hl={language}-{country}&gl={country}"
+
+def resolve_developer_id(developer: str) -> str:
+    """Return the developer id from a developer page URL, or the input itself if it is not a URL."""
+    developer = developer.strip()
+    if "://" in developer or developer.startswith("play.google.com"):
+        ids = parse_qs(urlsplit(developer).query).get("id")
+        if not ids:
+            raise ValueError(f"Could not extract developer ID from URL: {developer}")
+        return ids[0]
+    return developer
+
+def build_developer_url(developer_id: str) -> str:
+    """Build the Google Play page of a developer, by numeric id or by developer name."""
+    path = "dev" if developer_id.isdigit() else "developer"
+    return f"https://play.google.com/store/apps/{path}?id={quote_plus(developer_id)}&hl=en&gl=US"
+
+def normalize_locale(value: str) -> tuple[str, str]:
+    """Normalize a locale code (en, pt-BR, pt_BR) or a listing URL with hl/gl to (language, country)."""
+    value = value.strip()
+    if "hl=" in value or "gl=" in value:
+        return extract_language_country(value)
+    return extract_language_country(f"?hl={value.replace('_', '-')}")
+
+def fingerprint_listing_text(title: Optional[str], short_description: Optional[str]) -> str:
+    """Fingerprint a listing's title and short description, ignoring case and whitespace differences."""
+    normalized = "\n".join(" ".join((text or "").split()).casefold() for text in (title, short_description))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+def normalize_listing_key(app_id: str, language: str, country: str) -> tuple[str, str, str]:
+    """Normalize an (app_id, language, country) tuple for use as a cache key."""
+    return app_id.strip(), language.strip().lower(), country.strip().upper()
+
+def describe_error(e: Exception) -> str:
+    """Return a readable message for an exception, unwrapping HTTPException details."""
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    return str(e) or e.__class__.__name__
+
+def summarize_timings(samples: Iterable[float]) -> Dict[str, Any]:
+    """Summarize a series of durations in milliseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 1),
+        "p50_ms": round(ordered[len(ordered) // 2], 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+async def run_parser(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Run an extractor on the parse pool, returning its result and wall time in milliseconds."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    result, extract_ms = await loop.run_in_executor(parse_executor, functools.partial(run_timed, func, *args))
+    wall_ms = (time.perf_counter() - start) * 1000
+    parse_timings["extract"].append(extract_ms)
+    parse_timings["wall"].append(wall_ms)
+    stage_duration.labels(stage="parse").observe(wall_ms / 1000)
+    return result, round(wall_ms, 1)
+
+def wants_fresh_response(request: Request) -> bool:
+    """Check whether the client asked to bypass cached data via Cache-Control."""
+    cache_control = request.headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
+
 async def detect_language_country(url: str) -> LanguageCountryResponse:
     """Detect language and country from Google Play URL."""
     language, country = extract_language_country(url)
     
     # Construct a URL with the detected language and country
     app_id = extract_app_id(url)
-    normalized_url = f"https://play.google.com/store/apps/details?id={app_id}&hl={language}-{country}&gl={country}"
+    normalized_url = build_listing_url(app_id, language, country)
     
     return LanguageCountryResponse(
         language=language,
@@ -147,27 +675,68 @@ async def detect_language_country(url: str) -> LanguageCountryResponse:
         detected_from_url=bool(re.search(r"[?&]hl=|[?&]gl=", url))
     )
 
-async def scrape_with_google_play_scraper(app_id: str, language: str, country: str) -> AppListing:
+async def run_gplay_call(name: str, func: Callable, *args, timeout: float, timings: Dict[str, float], **kwargs) -> Any:
+    """Run a blocking google-play-scraper call on the dedicated pool, recording its duration."""
+    loop = asyncio.get_running_loop()
+    async with upstream_limiters[name].acquire():
+        count_upstream_call(name)
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(gplay_executor, functools.partial(func, *args, **kwargs)),
+                timeout=timeout
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[name] = round(elapsed * 1000, 1)
+            stage_duration.labels(stage=name).observe(elapsed)
+
+async def scrape_with_google_play_scraper(app_id: str, language: str, country: str, parts: frozenset = DEFAULT_SCRAPE_PARTS) -> AppListing:
     """Scrape Google Play app listing using google-play-scraper library."""
     logger.info(f"Scraping app listing with google-play-scraper: {app_id}")
     
     try:
-        # Get app details
-        app_details = gplay_app(
-            app_id,
-            lang=language,
-            country=country
-        )
+        # Fetch details, reviews (limited to 20 for performance) and permissions in
+        # parallel. Only the details are required; reviews and permissions may fail
+        # or time out and the listing is returned without them. Reviews and
+        # permissions are skipped entirely when their fields were not requested.
+        timings: Dict[str, float] = {}
+        calls = {
+            "details": run_gplay_call(
+                "details", gplay_app, app_id,
+                lang=language, country=country,
+                timeout=GPLAY_DETAILS_TIMEOUT, timings=timings
+            )
+        }
+        if "reviews" in parts:
+            calls["reviews"] = run_gplay_call(
+                "reviews", reviews, app_id,
+                lang=language, country=country, count=20, sort=Sort.NEWEST,
+                timeout=GPLAY_REVIEWS_TIMEOUT, timings=timings
+            )
+        if "permissions" in parts:
+            calls["permissions"] = run_gplay_call(
+                "permissions", gplay_permissions, app_id,
+                lang=language, country=country,
+                timeout=GPLAY_PERMISSIONS_TIMEOUT, timings=timings
+            )
+        results = dict(zip(calls, await asyncio.gather(*calls.values(), return_exceptions=True)))
+        details_result = results["details"]
+        reviews_result = results.get("reviews", ([], None))
+        permissions_result = results.get("permissions")
+        logger.info(f"google-play-scraper timings for {app_id} (ms): {timings}")
         
-        # Get reviews (limited to 20 for performance)
-        app_reviews_result, _ = reviews(
-            app_id,
-            lang=language,
-            country=country,
-            count=20,
-            sort=Sort.NEWEST  # Using the Sort enum
-        )
-        app_reviews = app_reviews_result  # The reviews are directly in the result
+        if isinstance(details_result, BaseException):
+            if isinstance(details_result, asyncio.TimeoutError):
+                raise TimeoutError(f"App details request timed out after {GPLAY_DETAILS_TIMEOUT}s")
+            raise details_result
+        app_details = details_result
+        
+        if isinstance(reviews_result, BaseException):
+            logger.warning(f"Failed to get app reviews: {reviews_result!r}")
+            app_reviews = []
+        else:
+            app_reviews, _ = reviews_result  # The reviews are directly in the result
         
         # Format screenshots
         screenshots = []
@@ -216,22 +785,17 @@ async def scrape_with_google_play_scraper(app_id: str, language: str, country: s
         if isinstance(price, (int, float)):
             price = f"${price}" if price > 0 else "Free"
         
-        # Get app permissions
-        try:
-            app_permissions_data = gplay_permissions(
-                app_id,
-                lang=language,
-                country=country
-            )
-            
-            # Format permissions into a list
+        # Format permissions into a list
+        if permissions_result is None:
+            app_permissions = None
+        elif isinstance(permissions_result, BaseException):
+            logger.warning(f"Failed to get app permissions: {permissions_result!r}")
+            app_permissions = None
+        else:
             app_permissions = []
-            for category, perms in app_permissions_data.items():
+            for category, perms in permissions_result.items():
                 for perm in perms:
                     app_permissions.append(perm)
-        except Exception as e:
-            logger.warning(f"Failed to get app permissions: {e}")
-            app_permissions = None
         
         # Create AppListing object
         app_listing = AppListing(
@@ -242,6 +806,7 @@ async def scrape_with_google_play_scraper(app_id: str, language: str, country: s
             title=app_details.get('title', 'Unknown'),
             developer=app_details.get('developer', 'Unknown'),
             icon_url=app_details.get('icon', ''),
+            category=app_details.get('genre'),
             rating=app_details.get('score'),
             reviews_count=app_details.get('reviews'),
             ratings_distribution=ratings_distribution if ratings_distribution else None,
@@ -268,7 +833,8 @@ async def scrape_with_google_play_scraper(app_id: str, language: str, country: s
             user_reviews=user_reviews,
             developer_responses=developer_responses,
             similar_apps=[],  # Not included in this implementation
-            html_content=None  # Not applicable for this method
+            html_content=None,  # Not applicable: this tier is skipped when the HTML is requested
+            fetch_timings=timings
         )
         
         return app_listing
@@ -277,7 +843,7 @@ async def scrape_with_google_play_scraper(app_id: str, language: str, country: s
         logger.error(f"Error scraping app listing with google-play-scraper: {e}")
         raise HTTPException(status_code=500, detail=f"Error scraping app listing with google-play-scraper: {str(e)}")
 
-async def scrape_app_listing_with_playwright(url: str, language: str, country: str) -> AppListing:
+async def scrape_app_listing_with_playwright(url: str, language: str, country: str, include_html: bool = True) -> AppListing:
     """Scrape Google Play app listing using Playwright."""
     logger.info(f"Scraping app listing: {url}")
     
@@ -287,283 +853,53 @@ async def scrape_app_listing_with_playwright(url: str, language: str, country: s
         logger.error(f"Invalid URL: {e}")
         raise HTTPException(status_code=400, detail=str(e))
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        )
-        page = await context.new_page()
-        
+    async with browser_pool.page() as page:
+        if fixture_store is not None:
+            await fixture_store.route_page(page)
+        count_upstream_call("playwright_page")
         try:
-            await page.goto(url, wait_until="networkidle")
+            # In lean mode the listing data is in the initial DOM, so there is no
+            # need to wait for the network to go idle.
+            navigation_start = time.perf_counter()
+            async with upstream_limiters["web_page"].acquire() as permit:
+                response = await page.goto(url, wait_until="domcontentloaded" if PLAYWRIGHT_LEAN_MODE else "networkidle")
+                if response is not None and response.status in THROTTLE_STATUS_CODES:
+                    permit.mark_throttled()
+                    raise ValueError(f"Details page returned HTTP {response.status}")
+            if response is not None and response.status == 404:
+                raise NotFoundError(f"App not found: {app_id}")
             
             # Wait for content to load
             await page.wait_for_selector("h1")
             
-            # Get the HTML content
-            html_content = await page.content()
-            
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html_content, "lxml")
+            navigation_ms = round((time.perf_counter() - navigation_start) * 1000, 1)
+            stage_duration.labels(stage="navigation").observe(navigation_ms / 1000)
+            timings = {"navigation": navigation_ms}
             
-            # Extract app information
-            title = soup.select_one("h1")
-            title_text = title.text.strip() if title else "Unknown"
+            fields = None
+            if PLAYWRIGHT_EXTRACTION_MODE == "evaluate":
+                # Extract inside the page so only the needed values cross the CDP pipe
+                extract_start = time.perf_counter()
+                in_page_result = await page.evaluate(IN_PAGE_EXTRACTION_SCRIPT, in_page_extraction_args())
+                fields = extract_listing_from_in_page_result(in_page_result, app_id, url, language, country)
+                timings["evaluate"] = round((time.perf_counter() - extract_start) * 1000, 1)
+                stage_duration.labels(stage="evaluate").observe(timings["evaluate"] / 1000)
+                if fields is not None:
+                    logger.info(f"Extracted {app_id} in the page in {timings['evaluate']} ms")
             
-            developer_elem = soup.select_one('a[href*="developer"]')
-            developer = developer_elem.text.strip() if developer_elem else "Unknown"
+            # The full HTML is only serialized when it was requested or when the
+            # in-page extraction found no embedded data to work with
+            html_content = await page.content() if include_html or fields is None else None
             
-            icon_elem = soup.select_one('img[src*="play-lh.googleusercontent.com"]')
-            icon_url = icon_elem.get("src") if icon_elem else ""
+            if fields is None:
+                # Extract the listing from the embedded data, falling back to DOM selectors
+                fields, timings["parse"] = await run_parser(extract_listing_fields, html_content, app_id, url, language, country)
+                logger.info(f"Extracted {app_id} with the {fields.pop('extractor')} extractor in {timings['parse']} ms")
             
-            # Extract rating
-            rating_elem = soup.select_one('div[role="img"][aria-label*="stars"]')
-            rating = None
-            if rating_elem:
-                rating_text = rating_elem.get("aria-label", "")
-                rating_match = re.search(r"([\d.]+) stars", rating_text)
-                if rating_match:
-                    rating = float(rating_match.group(1))
-            
-            # Extract reviews count
-            reviews_elem = soup.select_one('div[aria-label*="ratings"]')
-            reviews_count = None
-            if reviews_elem:
-                reviews_text = reviews_elem.text.strip()
-                reviews_match = re.search(r"([\d,]+)", reviews_text)
-                if reviews_match:
-                    reviews_count = int(reviews_match.group(1).replace(",", ""))
-            
-            # Extract descriptions
-            short_description = None
-            short_desc_elem = soup.select_one('meta[name="description"]')
-            if short_desc_elem:
-                short_description = short_desc_elem.get("content", "").strip()
-            
-            long_description = None
-            long_desc_elem = soup.select_one('div[data-g-id="description"]')
-            if long_desc_elem:
-                long_description = long_desc_elem.text.strip()
-            
-            # Extract screenshots
-            screenshots = []
-            screenshot_elems = soup.select('img[src*="play-lh.googleusercontent.com"][alt*="screenshot"]')
-            for img in screenshot_elems:
-                screenshots.append(
-                    Screenshot(
-                        url=img.get("src", ""),
-                        alt_text=img.get("alt", "")
-                    )
-                )
-            
-            # Extract feature graphic
-            feature_graphic = None
-            feature_elem = soup.select_one('img[src*="play-lh.googleusercontent.com"]:not([alt*="screenshot"])')
-            if feature_elem and feature_elem != icon_elem:
-                feature_graphic = feature_elem.get("src", "")
-            
-            # Extract ratings distribution
-            ratings_distribution = {}
-            rating_bars = soup.select('div[class*="rating-bar"]')
-            for bar in rating_bars:
-                # Try to find the rating value (1-5 stars)
-                rating_value = None
-                for i in range(1, 6):
-                    if f"{i} stars" in bar.text:
-                        rating_value = str(i)
-                        break
-                
-                if rating_value:
-                    # Try to find the count
-                    count_match = re.search(r"([\d,]+)", bar.text)
-                    if count_match:
-                        count = int(count_match.group(1).replace(",", ""))
-                        ratings_distribution[rating_value] = count
-            
-            # Extract additional information
-            additional_info = {}
-            info_elems = soup.select('div[class*="details-section"] div[class*="content"]')
-            for elem in info_elems:
-                text = elem.text.strip()
-                if "Updated on" in text:
-                    additional_info["last_updated"] = re.search(r"Updated on (.+)", text).group(1)
-                elif "Size" in text:
-                    additional_info["size"] = re.search(r"Size (.+)", text).group(1)
-                elif "Installs" in text:
-                    additional_info["installs"] = re.search(r"Installs (.+)", text).group(1)
-                elif "Current Version" in text:
-                    additional_info["version"] = re.search(r"Current Version (.+)", text).group(1)
-                elif "Content Rating" in text:
-                    additional_info["content_rating"] = re.search(r"Content Rating (.+)", text).group(1)
-                elif "In-app purchases" in text:
-                    additional_info["in_app_purchases"] = True
-                    # Try to extract in-app purchase details
-                    purchase_match = re.search(r"In-app purchases(.+)", text)
-                    if purchase_match:
-                        purchase_text = purchase_match.group(1).strip()
-                        if purchase_text and purchase_text != "Yes":
-                            additional_info["in_app_purchase_details"] = [item.strip() for item in purchase_text.split(",")]
-                elif "Contains ads" in text:
-                    additional_info["contains_ads"] = True
-                elif "Offered by" in text:
-                    additional_info["developer"] = re.search(r"Offered by (.+)", text).group(1).strip()
-                elif "OS" in text or "Android" in text:
-                    os_match = re.search(r"Android\s+([\d\.]+)", text)
-                    if os_match:
-                        additional_info["min_os_version"] = os_match.group(1)
-            
-            # Extract developer information
-            developer_info_section = soup.select_one('div[class*="developer-info"]')
-            if developer_info_section:
-                # Extract developer email
-                email_elem = developer_info_section.select_one('a[href^="mailto:"]')
-                if email_elem:
-                    developer_email = email_elem.get("href").replace("mailto:", "")
-                    additional_info["developer_email"] = developer_email
-                
-                # Extract developer website
-                website_elem = developer_info_section.select_one('a[href^="http"]:not([href*="play.google.com"])')
-                if website_elem:
-                    developer_website = website_elem.get("href")
-                    additional_info["developer_website"] = developer_website
-            
-            # Extract privacy policy
-            privacy_elem = soup.select_one('a[href*="privacy"]')
-            if privacy_elem:
-                privacy_url = privacy_elem.get("href")
-                additional_info["privacy_policy_url"] = privacy_url
-            
-            # Extract app permissions
-            permissions = []
-            permission_elems = soup.select('div[class*="permission"]')
-            for perm in permission_elems:
-                perm_text = perm.text.strip()
-                if perm_text:
-                    permissions.append(perm_text)
-            
-            if permissions:
-                additional_info["app_permissions"] = permissions
-            
-            # Extract supported devices
-            devices = []
-            device_elems = soup.select('div[class*="device-support"]')
-            for device in device_elems:
-                device_text = device.text.strip()
-                if device_text:
-                    devices.append(device_text)
-            
-            if devices:
-                additional_info["supported_devices"] = devices
-            
-            # Extract update history
-            update_history = []
-            update_elems = soup.select('div[class*="update-history"] div[class*="update-item"]')
-            for update in update_elems:
-                date_elem = update.select_one('div[class*="date"]')
-                desc_elem = update.select_one('div[class*="description"]')
-                
-                if date_elem and desc_elem:
-                    update_history.append({
-                        "date": date_elem.text.strip(),
-                        "description": desc_elem.text.strip()
-                    })
-            
-            if update_history:
-                additional_info["update_history"] = update_history
-            
-            # Extract user reviews
-            user_reviews = []
-            review_elems = soup.select('div[data-g-id="reviews"] div[data-g-id="review"]')
-            for review in review_elems[:5]:  # Limit to 5 reviews for performance
-                rating_elem = review.select_one('div[role="img"][aria-label*="stars"]')
-                rating_value = None
-                if rating_elem:
-                    rating_text = rating_elem.get("aria-label", "")
-                    rating_match = re.search(r"([\d.]+) stars", rating_text)
-                    if rating_match:
-                        rating_value = float(rating_match.group(1))
-                
-                author_elem = review.select_one('div[class*="author"]')
-                author = author_elem.text.strip() if author_elem else "Unknown"
-                
-                date_elem = review.select_one('div[class*="date"]')
-                date = date_elem.text.strip() if date_elem else None
-                
-                text_elem = review.select_one('div[class*="content"]')
-                text = text_elem.text.strip() if text_elem else ""
-                
-                user_reviews.append({
-                    "author": author,
-                    "rating": rating_value,
-                    "date": date,
-                    "text": text
-                })
-            
-            # Extract developer responses
-            developer_responses = []
-            response_elems = soup.select('div[data-g-id="developer-response"]')
-            for response in response_elems[:5]:  # Limit to 5 responses for performance
-                date_elem = response.select_one('div[class*="date"]')
-                date = date_elem.text.strip() if date_elem else None
-                
-                text_elem = response.select_one('div[class*="content"]')
-                text = text_elem.text.strip() if text_elem else ""
-                
-                developer_responses.append({
-                    "date": date,
-                    "text": text
-                })
-            
-            # Extract similar apps
-            similar_apps = []
-            similar_elems = soup.select('div[data-g-id="similar-apps"] a[href*="details"]')
-            for app in similar_elems[:5]:  # Limit to 5 similar apps for performance
-                app_name_elem = app.select_one('div[class*="title"]')
-                app_name = app_name_elem.text.strip() if app_name_elem else "Unknown"
-                app_url = app.get("href", "")
-                if app_url and not app_url.startswith("http"):
-                    app_url = f"https://play.google.com{app_url}"
-                
-                similar_apps.append({
-                    "name": app_name,
-                    "url": app_url
-                })
-            
-            # Create AppListing object
             app_listing = AppListing(
-                app_id=app_id,
-                url=url,
-                language=language,
-                country=country,
-                title=title_text,
-                developer=developer,
-                icon_url=icon_url,
-                rating=rating,
-                reviews_count=reviews_count,
-                ratings_distribution=ratings_distribution if ratings_distribution else None,
-                short_description=short_description,
-                long_description=long_description,
-                screenshots=screenshots,
-                feature_graphic=feature_graphic,
-                last_updated=additional_info.get("last_updated"),
-                size=additional_info.get("size"),
-                installs=additional_info.get("installs"),
-                version=additional_info.get("version"),
-                content_rating=additional_info.get("content_rating"),
-                contains_ads=additional_info.get("contains_ads"),
-                in_app_purchases=additional_info.get("in_app_purchases"),
-                in_app_purchase_details=additional_info.get("in_app_purchase_details"),
-                developer_email=additional_info.get("developer_email"),
-                developer_website=additional_info.get("developer_website"),
-                privacy_policy_url=additional_info.get("privacy_policy_url"),
-                app_permissions=additional_info.get("app_permissions"),
-                supported_devices=additional_info.get("supported_devices"),
-                min_os_version=additional_info.get("min_os_version"),
-                update_history=additional_info.get("update_history"),
-                user_reviews=user_reviews,
-                developer_responses=developer_responses,
-                similar_apps=similar_apps,
-                html_content=html_content
+                **fields,
+                html_content=html_content if include_html else None,
+                fetch_timings=timings
             )
             
             return app_listing
@@ -571,8 +907,182 @@ async def scrape_app_listing_with_playwright(url: str, language: str, country: s
         except Exception as e:
             logger.error(f"Error scraping app listing: {e}")
             raise HTTPException(status_code=500, detail=f"Error scraping app listing: {str(e)}")
-        finally:
-            await browser.close()
+
+async def probe_listing_text(app_id: str, language: str, country: str) -> Dict[str, Optional[str]]:
+    """
+    Fetch just enough of a details page to read its title and short description.
+    
+    The page is streamed and the download stops once the details dataset has arrived,
+    so a probe usually transfers only part of the page and parses a single dataset.
+    """
+    url = build_listing_url(app_id, language, country)
+    async with upstream_limiters["web_page"].acquire():
+        count_upstream_call("locale_probe")
+        start = time.perf_counter()
+        async with http_client.stream(
+            "GET", url, headers={"Accept-Language": f"{language}-{country},{language};q=0.9"}
+        ) as response:
+            if response.status_code == 404:
+                raise HTTPException(status_code=404, detail=f"App not found: {app_id}")
+            response.raise_for_status()
+            # Without the details callback the whole page is read, so the parser can
+            # still look for the details under another dataset key
+            html_content = ""
+            details_start = -1
+            async for chunk in response.aiter_text():
+                # Overlap the previous chunk so a callback split across chunks is found
+                search_from = max(0, len(html_content) - 64)
+                html_content += chunk
+                if details_start < 0:
+                    details_start = find_dataset_callback(html_content, DETAILS_DATASET_KEY, search_from)
+                if details_start >= 0 and html_content.find("</script", details_start) >= 0:
+                    break
+        stage_duration.labels(stage="locale_probe").observe(time.perf_counter() - start)
+    
+    text, _ = await run_parser(extract_listing_text, html_content)
+    if text is None:
+        raise ValueError("Details page has no embedded listing data")
+    return text
+
+async def enumerate_developer_apps(developer_id: str) -> List[str]:
+    """Fetch a developer's page and return the ids of the apps it lists."""
+    url = build_developer_url(developer_id)
+    logger.info(f"Listing apps of developer {developer_id}: {url}")
+    async with upstream_limiters["web_page"].acquire():
+        count_upstream_call("developer_page")
+        start = time.perf_counter()
+        response = await http_client.get(url)
+        stage_duration.labels(stage="developer_page").observe(time.perf_counter() - start)
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Developer not found: {developer_id}")
+        response.raise_for_status()
+    app_ids, _ = await run_parser(extract_developer_app_ids, response.text)
+    return app_ids
+
+def format_harvested_review(review: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a google-play-scraper review for the review harvest stream."""
+    return {
+        "review_id": review.get("reviewId"),
+        "author": review.get("userName", "Unknown"),
+        "rating": review.get("score"),
+        "date": review["at"].isoformat() if isinstance(review.get("at"), datetime) else review.get("at"),
+        "text": review.get("content", ""),
+        "thumbs_up": review.get("thumbsUpCount"),
+        "app_version": review.get("appVersion"),
+        "reply_text": review.get("replyContent"),
+        "reply_date": review["repliedAt"].isoformat() if isinstance(review.get("repliedAt"), datetime) else review.get("repliedAt"),
+    }
+
+def fetch_review_page(
+    app_id: str, lang: str, country: str, sort: Sort, count: int,
+    filter_score_with: Optional[int], continuation_token: Optional[_ContinuationToken]
+) -> Tuple[List[Dict[str, Any]], _ContinuationToken]:
+    """
+    Fetch one page of reviews with a single request, like google-play-scraper's reviews().
+    
+    Unlike reviews(), a short page is not topped up with further requests and a failed
+    request raises, instead of returning the reviews so far without a token (which is
+    indistinguishable from the end of the stream).
+    """
+    token = continuation_token.token if continuation_token is not None else None
+    review_items, next_token = _fetch_review_items(
+        Formats.Reviews.build(lang=lang, country=country),
+        app_id, sort.value, min(count, MAX_COUNT_EACH_FETCH), filter_score_with, None, token
+    )
+    if isinstance(next_token, list):
+        # What google-play-scraper also treats as the end of the stream
+        next_token = None
+    page = [{key: spec.extract_content(item) for key, spec in ElementSpecs.Review.items()} for item in review_items]
+    return page, _ContinuationToken(next_token, lang, country, sort.value, count, filter_score_with, None)
+
+async def harvest_reviews(app_id: str, request: ReviewHarvestRequest) -> AsyncIterator[ReviewBatch]:
+    """
+    Page through reviews for every (sort, score) stream in parallel, yielding batches.
+    
+    Streams share a cap on unique reviews. Batches go through a small bounded queue,
+    so at most a few pages are held in memory no matter how many reviews are harvested.
+    """
+    max_reviews = min(request.max_reviews or REVIEWS_MAX_PER_REQUEST, REVIEWS_MAX_PER_REQUEST)
+    batch_size = min(request.batch_size, REVIEWS_MAX_BATCH_SIZE)
+    language, country = request.language.lower(), request.country.upper()
+    seen_ids: set = set()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+    
+    async def harvest_stream(sort_name: str, score: Optional[int]) -> None:
+        stream = f"{sort_name}:{score if score is not None else 'all'}"
+        sort = REVIEW_SORTS[sort_name]
+        token = None
+        if stream in request.continuation_tokens:
+            token = _ContinuationToken(
+                request.continuation_tokens[stream], language, country, sort.value, batch_size, score, None
+            )
+        
+        while len(seen_ids) < max_reviews:
+            previous_token = token
+            try:
+                for attempt in range(REVIEWS_PAGE_RETRIES + 1):
+                    try:
+                        page, token = await run_gplay_call(
+                            "reviews", fetch_review_page, app_id,
+                            lang=language, country=country, sort=sort, count=batch_size,
+                            filter_score_with=score, continuation_token=previous_token,
+                            timeout=GPLAY_REVIEWS_TIMEOUT, timings={}
+                        )
+                        break
+                    except Exception as e:
+                        if isinstance(e, NotFoundError) or attempt == REVIEWS_PAGE_RETRIES:
+                            raise
+                        logger.info(f"Retrying review page of {stream} for {app_id}: {describe_error(e)}")
+                        await asyncio.sleep(REVIEWS_RETRY_DELAY_SECONDS * (attempt + 1))
+            except Exception as e:
+                logger.warning(f"Review harvest stream {stream} for {app_id} failed: {describe_error(e)}")
+                await batches.put(ReviewBatch(
+                    stream=stream, sort=sort_name, score=score, done=True,
+                    continuation_token=previous_token.token if previous_token is not None else None,
+                    total_harvested=len(seen_ids), error=describe_error(e)
+                ))
+                return
+            
+            new_reviews = []
+            for review in page:
+                if len(seen_ids) >= max_reviews:
+                    break
+                review_id = review.get("reviewId")
+                if review_id in seen_ids:
+                    continue
+                seen_ids.add(review_id)
+                new_reviews.append(format_harvested_review(review))
+            
+            exhausted = not page or token.token is None
+            done = exhausted or len(seen_ids) >= max_reviews
+            await batches.put(ReviewBatch(
+                stream=stream, sort=sort_name, score=score, reviews=new_reviews,
+                continuation_token=None if exhausted else token.token, done=done,
+                total_harvested=len(seen_ids)
+            ))
+            if done:
+                return
+    
+    producers = [
+        asyncio.create_task(harvest_stream(sort_name, score))
+        for sort_name in request.sorts for score in request.scores
+    ]
+    all_done = asyncio.gather(*producers)
+    try:
+        while True:
+            next_batch = asyncio.create_task(batches.get())
+            await asyncio.wait({next_batch, all_done}, return_when=asyncio.FIRST_COMPLETED)
+            if next_batch.done():
+                yield next_batch.result()
+                continue
+            next_batch.cancel()
+            while not batches.empty():
+                yield batches.get_nowait()
+            break
+    finally:
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(all_done, return_exceptions=True)
 
 # Routes
 @app.get("/")
@@ -583,6 +1093,32 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/stats")
+async def stats():
+    """Return runtime statistics for the scraper's shared resources."""
+    return {
+        "browser_pool": browser_pool.stats(),
+        "listing_cache": listing_cache.stats(),
+        "lookup_cache": lookup_cache.stats(),
+        "singleflight": scrape_singleflight.stats(),
+        "snapshot_store": snapshot_store.stats() if snapshot_store is not None else None,
+        "upstream_calls": upstream_call_counts,
+        "upstream_limits": {name: limiter.stats() for name, limiter in upstream_limiters.items()},
+        "circuit_breakers": {tier: breaker.stats() for tier, breaker in tier_breakers.items()},
+        "fixtures": fixture_store.stats() if fixture_store is not None else None,
+        "parse": {
+            "pool": PARSE_POOL_KIND,
+            "workers": PARSE_POOL_WORKERS,
+            "extract": summarize_timings(parse_timings["extract"]),
+            "wall": summarize_timings(parse_timings["wall"]),
+        },
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Return scraper metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/detect-language-country", response_model=LanguageCountryResponse)
 async def detect_language_country_endpoint(request: AppListingRequest):
     """
@@ -599,8 +1135,183 @@ async def detect_language_country_endpoint(request: AppListingRequest):
         logger.error(f"Error in detect_language_country endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def scrape_with_http(app_id: str, language: str, country: str, parts: frozenset = DEFAULT_SCRAPE_PARTS) -> AppListing:
+    """Scrape a listing by fetching the details page over HTTP and parsing its embedded data."""
+    url = build_listing_url(app_id, language, country)
+    logger.info(f"Scraping app listing over HTTP: {url}")
+    
+    async with upstream_limiters["web_page"].acquire():
+        count_upstream_call("http_page")
+        start = time.perf_counter()
+        response = await http_client.get(url, headers={"Accept-Language": f"{language}-{country},{language};q=0.9"})
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        stage_duration.labels(stage="http_page").observe(elapsed_ms / 1000)
+        response.raise_for_status()
+    html_content = response.text
+    
+    fields, parse_ms = await run_parser(extract_listing_from_embedded_data, html_content, app_id, url, language, country)
+    if fields is None:
+        # Without embedded data the page needs JavaScript to render
+        raise ValueError("Details page has no embedded listing data")
+    
+    return AppListing(
+        **fields,
+        html_content=html_content if "html" in parts else None,
+        fetch_timings={"page": elapsed_ms, "parse": parse_ms}
+    )
+
+async def scrape_with_playwright(app_id: str, language: str, country: str, parts: frozenset = DEFAULT_SCRAPE_PARTS) -> AppListing:
+    """Scrape a listing by rendering the details page in a pooled browser."""
+    return await scrape_app_listing_with_playwright(
+        build_listing_url(app_id, language, country), language, country,
+        include_html="html" in parts
+    )
+
+# Scraping tiers in order of cost; each is tried only if the previous ones failed
+SCRAPE_TIERS: List[tuple[str, Callable[..., Any]]] = [
+    ("google_play_scraper", scrape_with_google_play_scraper),
+    ("http", scrape_with_http),
+    ("playwright", scrape_with_playwright),
+]
+
+# Tiers that read the details page itself, and so can return its raw HTML; the
+# others are skipped when the "html" part is requested
+HTML_TIERS = frozenset({"http", "playwright"})
+
+tier_breakers = {
+    tier: CircuitBreaker(
+        tier,
+        window_size=CIRCUIT_BREAKER_WINDOW,
+        min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate_threshold=CIRCUIT_BREAKER_FAILURE_RATE,
+        open_seconds=CIRCUIT_BREAKER_OPEN_SECONDS,
+        slow_call_seconds=CIRCUIT_BREAKER_SLOW_CALL_SECONDS or None,
+        logger=logger,
+    )
+    for tier, _ in SCRAPE_TIERS
+}
+circuit_breaker_open = scraper_metric(
+    Gauge, "circuit_breaker_open", "Whether a tier's circuit breaker is open (1), half-open (0.5) or closed (0)", ["tier"]
+)
+for breaker_tier, tier_breaker in tier_breakers.items():
+    circuit_breaker_open.labels(breaker_tier).set_function(
+        lambda breaker=tier_breaker: {"open": 1.0, "half_open": 0.5}.get(breaker.state, 0.0)
+    )
+
+async def scrape_listing(app_id: str, language: str, country: str, parts: frozenset = DEFAULT_SCRAPE_PARTS) -> AppListing:
+    """Scrape a listing, trying each tier in order of cost until one succeeds."""
+    last_error: Optional[Exception] = None
+    for index, (tier, scrape) in enumerate(SCRAPE_TIERS):
+        if "html" in parts and tier not in HTML_TIERS:
+            continue
+        breaker = tier_breakers[tier]
+        if not breaker.allow():
+            logger.info(f"Skipping tier {tier} for {app_id}: circuit breaker is {breaker.state}")
+            tier_attempts.labels(tier=tier, outcome="skipped").inc()
+            continue
+        start = time.perf_counter()
+        try:
+            logger.info(f"Attempting to scrape {app_id} with tier {tier}")
+            app_listing = await scrape(app_id, language, country, parts)
+            breaker.record_success((time.perf_counter() - start) * 1000)
+            app_listing.scrape_tier = tier
+            tier_attempts.labels(tier=tier, outcome="success").inc()
+            listings_scraped.labels(tier=tier).inc()
+            logger.info(f"Successfully scraped {app_id} with tier {tier}")
+            return app_listing
+        except Exception as e:
+            # Log the error and fall back to the next tier
+            error_kind = classify_error(e)
+            latency_ms = (time.perf_counter() - start) * 1000
+            if error_kind in BREAKER_SUCCESS_ERRORS:
+                breaker.record_success(latency_ms)
+            elif error_kind in BREAKER_IGNORED_ERRORS:
+                breaker.record_ignored()
+            else:
+                breaker.record_failure(latency_ms)
+            tier_attempts.labels(tier=tier, outcome="failure").inc()
+            tier_errors.labels(tier=tier, error=error_kind).inc()
+            if error_kind == "not_found":
+                # Google Play said the app does not exist: the other tiers would only ask again
+                logger.info(f"App {app_id} not found ({language}-{country}) with tier {tier}")
+                raise HTTPException(status_code=404, detail=f"App not found: {app_id}") from e
+            if index < len(SCRAPE_TIERS) - 1:
+                tier_fallbacks.labels(from_tier=tier).inc()
+            logger.warning(f"Failed to scrape {app_id} with tier {tier}: {describe_error(e)}")
+            last_error = e
+    if last_error is None:
+        raise HTTPException(status_code=503, detail="All scraping tiers are temporarily disabled by their circuit breakers")
+    raise last_error
+
+async def load_warm_snapshot(listing_key: tuple[str, str, str], parts: frozenset) -> Optional[FetchedValue]:
+    """
+    Return the stored snapshot of a listing, with its age, if it was confirmed recently enough to skip a scrape.
+    
+    The age makes the listing cache count its TTL from the last real scrape. A snapshot
+    older than the cache TTL would be cached already expired, so it is never used.
+    """
+    # Snapshots never hold the raw HTML
+    if snapshot_store is None or SNAPSHOT_WARM_SECONDS <= 0 or "html" in parts:
+        return None
+    try:
+        snapshot = await asyncio.to_thread(snapshot_store.latest, *listing_key)
+    except Exception as e:
+        logger.warning(f"Failed to read snapshot for {listing_key}: {e}")
+        return None
+    if snapshot is None:
+        return None
+    age_seconds = max(0.0, time.time() - snapshot["last_seen_at"])
+    if age_seconds > SNAPSHOT_WARM_SECONDS or age_seconds >= LISTING_CACHE_TTL_SECONDS:
+        return None
+    app_listing = AppListing(**snapshot["listing"])
+    app_listing.scrape_tier = "snapshot"
+    return FetchedValue(app_listing, age_seconds)
+
+async def save_snapshot(app_listing: AppListing, parts: frozenset) -> None:
+    """Record a freshly scraped listing in the snapshot store."""
+    # Listings scraped without reviews or permissions would show up as those fields
+    # disappearing from the history, so only complete scrapes are recorded.
+    if snapshot_store is None or not DEFAULT_SCRAPE_PARTS <= parts:
+        return
+    try:
+        await asyncio.to_thread(snapshot_store.save, app_listing.model_dump(mode="json"))
+    except Exception as e:
+        logger.warning(f"Failed to save snapshot for {app_listing.app_id}: {e}")
+
+async def fetch_listing(listing_key: tuple[str, str, str], parts: frozenset, force_refresh: bool = False) -> FetchedValue:
+    """Return a recent snapshot of a listing, or scrape it and record the new snapshot, with its age."""
+    if not force_refresh:
+        warm_snapshot = await load_warm_snapshot(listing_key, parts)
+        if warm_snapshot is not None:
+            return warm_snapshot
+    app_listing = await scrape_listing(*listing_key, parts)
+    await save_snapshot(app_listing, parts)
+    return FetchedValue(app_listing, 0.0)
+
+async def get_listing(
+    app_id: str,
+    language: str,
+    country: str,
+    force_refresh: bool = False,
+    parts: frozenset = DEFAULT_SCRAPE_PARTS
+) -> tuple[AppListing, str]:
+    """Return a listing from the cache or scrape it, along with the cache status."""
+    # Listings scraped with different parts are cached separately, since a listing
+    # scraped without reviews cannot answer a request that needs them.
+    listing_key = normalize_listing_key(app_id, language, country)
+    key = (*listing_key, tuple(sorted(parts)))
+    # A forced refresh must not join a fetch that may answer from a warm snapshot
+    flight_key = (*key, force_refresh)
+    app_listing, cache_status = await listing_cache.get_or_fetch(
+        key,
+        lambda: scrape_singleflight.do(flight_key, lambda: fetch_listing(listing_key, parts, force_refresh)),
+        force_refresh=force_refresh
+    )
+    cache_lookups.labels(status=cache_status).inc()
+    return app_listing, cache_status
+
 @app.post("/scrape", response_model=AppListing)
-async def scrape_app_listing(request: FullScrapingRequest):
+async def scrape_app_listing(request: FullScrapingRequest, http_request: Request):
     """
     Scrape a Google Play app listing with specified language and country.
     
@@ -608,32 +1319,436 @@ async def scrape_app_listing(request: FullScrapingRequest):
     - **language**: Language code (e.g., en, es, fr)
     - **country**: Country code (e.g., US, ES, FR)
     
+    Tiers are tried in order of cost: google-play-scraper, a plain HTTP fetch of the
+    details page, then Playwright. The `scrape_tier` field and the `X-Scrape-Tier`
+    header report which tier produced the data.
+    
+    Results are cached; the `X-Cache` response header reports HIT, MISS or STALE.
+    Send `Cache-Control: no-cache` to force a fresh scrape.
+    
+    - **fields**: Optional list of AppListing fields to return (e.g. `["title", "short_description"]`)
+    - **exclude**: Optional list of AppListing fields to leave out
+    
+    Reviews, permissions and the raw HTML are only fetched when their fields are
+    selected. `html_content` is left out unless it is listed in `fields`.
+    
     Returns the scraped app listing data.
     """
+    selected_fields, parts = resolve_field_selection(request.fields, request.exclude)
     try:
         # Extract app ID from URL
         app_id = extract_app_id(str(request.url))
         
-        # Try to scrape with google-play-scraper first
-        try:
-            logger.info(f"Attempting to scrape with google-play-scraper: {app_id}")
-            app_listing = await scrape_with_google_play_scraper(app_id, request.language, request.country)
-            logger.info(f"Successfully scraped with google-play-scraper: {app_id}")
-            return app_listing
-        except Exception as e:
-            # Log the error and fall back to Playwright
-            logger.warning(f"Failed to scrape with google-play-scraper: {e}. Falling back to Playwright.")
-            
-            # Construct URL with language and country parameters
-            url = f"https://play.google.com/store/apps/details?id={app_id}&hl={request.language}-{request.country}&gl={request.country}"
-            
-            # Fall back to Playwright scraping
-            app_listing = await scrape_app_listing_with_playwright(url, request.language, request.country)
-            return app_listing
+        app_listing, cache_status = await get_listing(
+            app_id,
+            request.language,
+            request.country,
+            force_refresh=wants_fresh_response(http_request),
+            parts=parts
+        )
+        return JSONResponse(
+            content=app_listing.model_dump(mode="json", include=selected_fields),
+            headers={
+                "X-Cache": cache_status,
+                "X-Scrape-Tier": app_listing.scrape_tier or "unknown",
+            }
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in scrape_app_listing endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def iter_batch_results(
+    items: Iterable[Tuple[int, str, str, str]],
+    concurrency: int,
+    force_refresh: bool = False,
+    selected_fields: Optional[set] = None,
+    parts: frozenset = DEFAULT_SCRAPE_PARTS
+) -> AsyncIterator[BatchScrapeResult]:
+    """
+    Scrape (index, app_id, language, country) items with bounded concurrency.
+    
+    Results are yielded as soon as each item finishes, so their order follows
+    completion rather than input. Only `concurrency` items are in progress and at
+    most `concurrency` finished results are buffered at any time, keeping memory
+    flat regardless of the number of items.
+    """
+    item_iter = iter(items)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    
+    async def scrape_item(index: int, app_id: str, language: str, country: str) -> BatchScrapeResult:
+        try:
+            listing, cache_status = await get_listing(app_id, language, country, force_refresh=force_refresh, parts=parts)
+            return BatchScrapeResult(
+                index=index,
+                app_id=app_id,
+                language=language,
+                country=country,
+                listing=listing.model_dump(mode="json", include=selected_fields),
+                cache_status=cache_status
+            )
+        except Exception as e:
+            logger.warning(f"Batch scrape failed for {app_id} ({language}-{country}): {describe_error(e)}")
+            return BatchScrapeResult(index=index, app_id=app_id, language=language, country=country, error=describe_error(e))
+    
+    async def worker() -> None:
+        for item in item_iter:
+            await results.put(await scrape_item(*item))
+    
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    all_done = asyncio.gather(*workers)
+    try:
+        while True:
+            next_result = asyncio.create_task(results.get())
+            await asyncio.wait({next_result, all_done}, return_when=asyncio.FIRST_COMPLETED)
+            if next_result.done():
+                yield next_result.result()
+                continue
+            next_result.cancel()
+            while not results.empty():
+                yield results.get_nowait()
+            break
+    finally:
+        # Stop outstanding work if the client went away mid-stream
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(all_done, return_exceptions=True)
+
+@app.post("/scrape-batch", response_model=BatchScrapingResponse)
+async def scrape_app_listing_batch(request: BatchScrapingRequest, http_request: Request):
+    """
+    Scrape Google Play apps across several language/country pairs concurrently.
+    
+    - **url** or **app_id**: The app to scrape
+    - **apps**: Alternatively, a list of app IDs or URLs; every app is scraped in every locale
+    - **locales**: List of `{"language": ..., "country": ...}` pairs
+    - **max_concurrency**: Optional limit on items scraped at once (capped by the server limit)
+    - **fields** / **exclude**: Optional field selection applied to every listing, as for `/scrape`
+    
+    Results are returned in the same order as the requested (app, locale) pairs. A failure
+    for one item is reported in that entry's `error` field and does not fail the batch.
+    
+    With `Accept: application/x-ndjson` the response is streamed instead: one
+    result object per line, emitted as soon as each item is scraped (use `index` to
+    map results back to the request).
+    """
+    if sum(1 for field in (request.url, request.app_id, request.apps) if field) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'url', 'app_id' or 'apps'")
+    if len(request.locales) > SCRAPE_BATCH_MAX_LOCALES:
+        raise HTTPException(status_code=400, detail=f"At most {SCRAPE_BATCH_MAX_LOCALES} locales can be scraped per batch")
+    selected_fields, parts = resolve_field_selection(request.fields, request.exclude)
+    
+    try:
+        if request.apps:
+            app_ids = [extract_app_id(app) if "id=" in app else app.strip() for app in request.apps]
+        elif request.url:
+            app_ids = [extract_app_id(str(request.url))]
+        else:
+            app_ids = [request.app_id.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    item_count = len(app_ids) * len(request.locales)
+    if item_count > SCRAPE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {SCRAPE_BATCH_MAX_ITEMS} app/locale pairs can be scraped per batch")
+    
+    items = (
+        (index, app_id, locale.language, locale.country)
+        for index, (app_id, locale) in enumerate(itertools.product(app_ids, request.locales))
+    )
+    concurrency = min(request.max_concurrency or SCRAPE_BATCH_MAX_CONCURRENCY, SCRAPE_BATCH_MAX_CONCURRENCY)
+    force_refresh = wants_fresh_response(http_request)
+    logger.info(f"Batch scraping {len(app_ids)} app(s) across {len(request.locales)} locales (concurrency={concurrency})")
+    
+    results = iter_batch_results(items, concurrency, force_refresh=force_refresh, selected_fields=selected_fields, parts=parts)
+    
+    if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        async def stream_results() -> AsyncIterator[str]:
+            async for result in results:
+                yield result.model_dump_json() + "\n"
+        
+        return StreamingResponse(stream_results(), media_type=NDJSON_MEDIA_TYPE)
+    
+    ordered: List[Optional[BatchScrapeResult]] = [None] * item_count
+    async for result in results:
+        ordered[result.index] = result
+    return BatchScrapingResponse(app_id=app_ids[0] if len(app_ids) == 1 else None, results=ordered)
+
+@app.post("/scrape-developer")
+async def scrape_developer_portfolio(request: DeveloperCrawlRequest, http_request: Request):
+    """
+    Scrape every app of a developer across several language/country pairs, streaming results as NDJSON.
+    
+    - **developer**: Developer page URL (`/store/apps/developer?id=...` or `/store/apps/dev?id=...`),
+      developer name or numeric developer id
+    - **locales**: List of `{"language": ..., "country": ...}` pairs
+    - **max_apps**: Optional limit on the number of apps scraped (capped by the server limit)
+    - **max_concurrency**: Optional limit on items scraped at once (capped by the server limit)
+    - **fields** / **exclude**: Optional field selection applied to every listing, as for `/scrape`
+    
+    Each line is a `/scrape-batch` result object, emitted as soon as its app/locale pair
+    is scraped. Listings go through the same cache as `/scrape`. The
+    `X-Developer-Apps-Found` and `X-Developer-Apps-Scraped` headers report how many
+    apps the developer page lists and how many are scraped.
+    """
+    # Duplicate locales would scrape the same listings twice
+    locales = list(dict.fromkeys(normalize_listing_key("", locale.language, locale.country)[1:] for locale in request.locales))
+    if len(locales) > SCRAPE_BATCH_MAX_LOCALES:
+        raise HTTPException(status_code=400, detail=f"At most {SCRAPE_BATCH_MAX_LOCALES} locales can be scraped per batch")
+    selected_fields, parts = resolve_field_selection(request.fields, request.exclude)
+    
+    try:
+        developer_id = resolve_developer_id(request.developer)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    force_refresh = wants_fresh_response(http_request)
+    key = ("developer", developer_id)
+    try:
+        app_ids, _ = await lookup_cache.get_or_fetch(
+            key,
+            lambda: scrape_singleflight.do(key, lambda: enumerate_developer_apps(developer_id)),
+            force_refresh=force_refresh
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing apps of developer {developer_id}: {describe_error(e)}")
+        raise HTTPException(status_code=502, detail=f"Error listing apps of developer {developer_id}: {describe_error(e)}")
+    if not app_ids:
+        raise HTTPException(status_code=404, detail=f"No apps found for developer {developer_id}")
+    
+    max_apps = min(request.max_apps or DEVELOPER_MAX_APPS, DEVELOPER_MAX_APPS, max(1, SCRAPE_BATCH_MAX_ITEMS // len(locales)))
+    scraped_app_ids = app_ids[:max_apps]
+    
+    items = (
+        (index, app_id, language, country)
+        for index, (app_id, (language, country)) in enumerate(itertools.product(scraped_app_ids, locales))
+    )
+    concurrency = min(request.max_concurrency or SCRAPE_BATCH_MAX_CONCURRENCY, SCRAPE_BATCH_MAX_CONCURRENCY)
+    logger.info(
+        f"Crawling developer {developer_id}: {len(scraped_app_ids)} of {len(app_ids)} app(s) "
+        f"across {len(locales)} locales (concurrency={concurrency})"
+    )
+    
+    results = iter_batch_results(items, concurrency, force_refresh=force_refresh, selected_fields=selected_fields, parts=parts)
+    
+    async def stream_results() -> AsyncIterator[str]:
+        async for result in results:
+            yield result.model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        stream_results(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"X-Developer-Apps-Found": str(len(app_ids)), "X-Developer-Apps-Scraped": str(len(scraped_app_ids))}
+    )
+
+@app.post("/locale-divergence", response_model=LocaleDivergenceResponse)
+async def probe_locale_divergence(request: LocaleProbeRequest, http_request: Request):
+    """
+    Find which locales serve a genuinely localized listing, without full scrapes.
+    
+    - **url** or **app_id**: The app to probe
+    - **locales**: Locales to probe, as codes (`pt-BR`, `pt_BR`, `ja`) or listing URLs with `hl`/`gl`
+    - **reference**: Reference locale (defaults to the locale of `url`, or `en-US`)
+    
+    Only the title and short description are read for each locale. Locales with the
+    same (case- and whitespace-insensitive) text are grouped. `scrape_locales` lists the
+    reference plus one locale per group that differs from it, ready to pass to `/scrape-batch`.
+    """
+    if bool(request.url) == bool(request.app_id):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'url' or 'app_id'")
+    try:
+        app_id = extract_app_id(str(request.url)) if request.url else request.app_id.strip()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if request.reference:
+        reference = normalize_locale(request.reference)
+    elif request.url:
+        detected = await detect_language_country(str(request.url))
+        reference = (detected.language, detected.country)
+    else:
+        reference = ("en", "US")
+    
+    # The reference is always probed first; duplicates collapse after normalization
+    locales = list(dict.fromkeys([reference] + [normalize_locale(locale) for locale in request.locales]))
+    if len(locales) > SCRAPE_BATCH_MAX_LOCALES:
+        raise HTTPException(status_code=400, detail=f"At most {SCRAPE_BATCH_MAX_LOCALES} locales can be probed per request")
+    
+    force_refresh = wants_fresh_response(http_request)
+    semaphore = asyncio.Semaphore(SCRAPE_BATCH_MAX_CONCURRENCY)
+    
+    async def probe(language: str, country: str) -> LocaleProbeResult:
+        locale = f"{language}-{country}"
+        key = ("locale_probe", app_id, language, country)
+        try:
+            async with semaphore:
+                text, _ = await lookup_cache.get_or_fetch(
+                    key,
+                    lambda: scrape_singleflight.do(key, lambda: probe_listing_text(app_id, language, country)),
+                    force_refresh=force_refresh
+                )
+        except Exception as e:
+            logger.warning(f"Locale probe failed for {app_id} ({locale}): {describe_error(e)}")
+            return LocaleProbeResult(locale=locale, language=language, country=country, error=describe_error(e))
+        return LocaleProbeResult(
+            locale=locale,
+            language=language,
+            country=country,
+            title=text["title"],
+            short_description=text["short_description"],
+            fingerprint=fingerprint_listing_text(text["title"], text["short_description"])
+        )
+    
+    logger.info(f"Probing {app_id} in {len(locales)} locales for localized listings")
+    results = await asyncio.gather(*(probe(language, country) for language, country in locales))
+    
+    reference_fingerprint = results[0].fingerprint
+    groups: Dict[str, List[LocaleProbeResult]] = {}
+    for result in results:
+        if result.fingerprint is None:
+            continue
+        if reference_fingerprint is not None:
+            result.same_as_reference = result.fingerprint == reference_fingerprint
+        groups.setdefault(result.fingerprint, []).append(result)
+    
+    locale_groups = [
+        LocaleGroup(
+            fingerprint=fingerprint,
+            locales=[member.locale for member in members],
+            representative=members[0].locale,
+            is_reference=fingerprint == reference_fingerprint
+        )
+        for fingerprint, members in groups.items()
+    ]
+    distinct_locales = [
+        LocaleRequest(language=members[0].language, country=members[0].country)
+        for fingerprint, members in groups.items()
+        if fingerprint != reference_fingerprint
+    ]
+    reference_locale = LocaleRequest(language=reference[0], country=reference[1])
+    
+    return LocaleDivergenceResponse(
+        app_id=app_id,
+        reference=f"{reference[0]}-{reference[1]}",
+        results=results,
+        groups=locale_groups,
+        distinct_locales=distinct_locales,
+        scrape_locales=[reference_locale] + distinct_locales
+    )
+
+@app.post("/reviews")
+async def harvest_app_reviews(request: ReviewHarvestRequest):
+    """
+    Harvest reviews for an app, streaming batches as NDJSON.
+    
+    - **url** or **app_id**: The app whose reviews to harvest
+    - **language** / **country**: Locale of the reviews
+    - **sorts**: Sort orders to harvest in parallel (newest, most_relevant, rating)
+    - **scores**: Star filters to harvest in parallel (1-5, or null for all ratings)
+    - **batch_size**: Reviews fetched per page
+    - **max_reviews**: Cap on unique reviews across all streams (capped by the server limit)
+    - **continuation_tokens**: Tokens from a previous harvest, keyed by stream, to resume from
+    
+    Each line is one batch of new reviews for a `<sort>:<score>` stream, with the
+    stream's continuation token. The last batch of a stream has `done: true`.
+    """
+    if bool(request.url) == bool(request.app_id):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'url' or 'app_id'")
+    unknown_sorts = set(request.sorts) - set(REVIEW_SORTS)
+    if unknown_sorts:
+        raise HTTPException(status_code=400, detail=f"Unknown sorts: {', '.join(sorted(unknown_sorts))}")
+    if any(score is not None and not 1 <= score <= 5 for score in request.scores):
+        raise HTTPException(status_code=400, detail="Scores must be between 1 and 5, or null")
+    
+    try:
+        app_id = extract_app_id(str(request.url)) if request.url else request.app_id.strip()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"Harvesting reviews for {app_id} ({request.language}-{request.country}), streams: {request.sorts} x {request.scores}")
+    
+    async def stream_batches() -> AsyncIterator[str]:
+        async for batch in harvest_reviews(app_id, request):
+            yield batch.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_batches(), media_type=NDJSON_MEDIA_TYPE)
+
+def require_snapshot_store() -> SnapshotStore:
+    if snapshot_store is None:
+        raise HTTPException(status_code=404, detail="Snapshot store is disabled (SNAPSHOT_DB_PATH is empty)")
+    return snapshot_store
+
+def format_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a snapshot's Unix times as ISO 8601 UTC timestamps."""
+    return {
+        **snapshot,
+        "scraped_at": datetime.fromtimestamp(snapshot["scraped_at"], timezone.utc).isoformat(),
+        "last_seen_at": datetime.fromtimestamp(snapshot["last_seen_at"], timezone.utc).isoformat(),
+    }
+
+@app.get("/snapshots/{app_id}")
+async def list_snapshots(app_id: str, language: str, country: str):
+    """List the stored versions of an app listing in one locale, oldest first."""
+    store = require_snapshot_store()
+    versions = await asyncio.to_thread(store.versions, *normalize_listing_key(app_id, language, country))
+    return {"versions": [format_snapshot(version) for version in versions]}
+
+@app.get("/snapshots/{app_id}/latest")
+async def get_latest_snapshot(app_id: str, language: str, country: str):
+    """Return the most recent stored version of an app listing."""
+    store = require_snapshot_store()
+    snapshot = await asyncio.to_thread(store.latest, *normalize_listing_key(app_id, language, country))
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No snapshots for {app_id} ({language}-{country})")
+    return format_snapshot(snapshot)
+
+@app.get("/snapshots/{app_id}/at")
+async def get_snapshot_at(app_id: str, language: str, country: str, timestamp: datetime):
+    """
+    Return the version of an app listing that was current at a point in time.
+    
+    - **timestamp**: ISO 8601 date and time; treated as UTC when it has no offset
+    """
+    store = require_snapshot_store()
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    snapshot = await asyncio.to_thread(
+        store.at, *normalize_listing_key(app_id, language, country), timestamp.timestamp()
+    )
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No snapshots for {app_id} ({language}-{country}) at {timestamp.isoformat()}")
+    return format_snapshot(snapshot)
+
+@app.get("/snapshots/{app_id}/diff")
+async def diff_snapshots(
+    app_id: str,
+    language: str,
+    country: str,
+    from_version: Optional[int] = None,
+    to_version: Optional[int] = None
+):
+    """
+    Return the fields that changed between two versions of an app listing.
+    
+    - **from_version**: Older version (defaults to the one before `to_version`)
+    - **to_version**: Newer version (defaults to the latest)
+    """
+    store = require_snapshot_store()
+    listing_key = normalize_listing_key(app_id, language, country)
+    version_ids = [version["version"] for version in await asyncio.to_thread(store.versions, *listing_key)]
+    if to_version is None and version_ids:
+        to_version = version_ids[-1]
+    if from_version is None and to_version in version_ids and version_ids.index(to_version) > 0:
+        from_version = version_ids[version_ids.index(to_version) - 1]
+    if from_version not in version_ids or to_version not in version_ids:
+        raise HTTPException(status_code=404, detail=f"Versions to compare not found for {app_id} ({language}-{country})")
+    
+    changes = await asyncio.to_thread(store.diff, from_version, to_version)
+    return {"from_version": from_version, "to_version": to_version, "changes": changes}
+
 # Run the app
 if __name__ == "__main__":
     import uvicorn
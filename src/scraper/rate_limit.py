@@ -0,0 +1,203 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+# HTTP status codes with which an upstream tells us to slow down
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a caller waited longer than its deadline for an upstream slot."""
+
+
+class UpstreamPermit:
+    """Handle for one leased upstream slot, used to report throttled responses."""
+
+    __slots__ = ("throttled",)
+
+    def __init__(self):
+        self.throttled = False
+
+    def mark_throttled(self) -> None:
+        """Report that the upstream throttled this call (e.g. answered 429 or 503)."""
+        self.throttled = True
+
+
+class UpstreamLimiter:
+    """
+    A token-bucket rate limiter with AIMD-adaptive concurrency for one upstream.
+
+    Calls need a token (refilled at `rate_per_second`, up to `burst`) and a free
+    concurrency slot. The concurrency limit grows by one per window of healthy calls
+    and is cut by `decrease_factor` when the upstream throttles a call, at most once
+    per `decrease_cooldown_seconds` so one burst of 429s counts as one signal.
+    Callers that cannot get a slot wait in line until their deadline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: float = 5.0,
+        burst: int = 10,
+        min_concurrency: int = 1,
+        max_concurrency: int = 12,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_seconds: float = 1.0,
+        queue_timeout: float = 30.0,
+        is_throttled: Optional[Callable[[Exception], bool]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the UpstreamLimiter.
+
+        Args:
+            name: Name of the upstream, used in logs and stats.
+            rate_per_second: Token refill rate (0 disables the token bucket).
+            burst: Maximum number of tokens that can accumulate.
+            min_concurrency: Lower bound of the adaptive concurrency limit.
+            max_concurrency: Upper bound (and starting value) of the adaptive concurrency limit.
+            decrease_factor: Factor applied to the concurrency limit when the upstream throttles.
+            decrease_cooldown_seconds: Minimum time between two decreases.
+            queue_timeout: Default time a caller waits for a slot before giving up.
+            is_throttled: Tells whether an exception raised by a call means the upstream throttled it.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.name = name
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.queue_timeout = queue_timeout
+        self.is_throttled = is_throttled or (lambda e: False)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._limit = float(self.max_concurrency)
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._counters: Dict[str, int] = {
+            "acquired": 0,
+            "queued": 0,
+            "timeouts": 0,
+            "throttled": 0,
+            "decreases": 0,
+        }
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(self.min_concurrency, int(self._limit))
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None) -> AsyncIterator[UpstreamPermit]:
+        """
+        Wait for a token and a concurrency slot, and hold the slot for the duration of the block.
+
+        Args:
+            timeout: Maximum time to wait in line (defaults to the limiter's queue timeout).
+
+        Yields:
+            UpstreamPermit: Call `mark_throttled()` on it when the upstream throttled a call
+            without raising an exception that `is_throttled` recognizes.
+
+        Raises:
+            RateLimitTimeout: If no slot became available before the deadline.
+        """
+        await self._wait_for_slot(self.queue_timeout if timeout is None else timeout)
+        permit = UpstreamPermit()
+        healthy = False
+        try:
+            yield permit
+            healthy = True
+        except Exception as e:
+            if self.is_throttled(e):
+                permit.mark_throttled()
+            raise
+        finally:
+            self._release(permit.throttled, healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limits, usage and counters."""
+        self._refill()
+        return {
+            **self._counters,
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "tokens": round(self._tokens, 2),
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+        }
+
+    async def _wait_for_slot(self, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        queued = False
+        while True:
+            self._refill()
+            has_slot = self._in_flight < self.concurrency_limit
+            if has_slot and (self.rate_per_second <= 0 or self._tokens >= 1):
+                if self.rate_per_second > 0:
+                    self._tokens -= 1
+                self._in_flight += 1
+                self._counters["acquired"] += 1
+                return
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._counters["timeouts"] += 1
+                raise RateLimitTimeout(f"Timed out after {timeout:.1f}s waiting for the {self.name} upstream")
+            if not queued:
+                self._counters["queued"] += 1
+                queued = True
+
+            # Sleep until a slot is released, or until the next token when only a token is missing
+            wait = remaining
+            if has_slot:
+                wait = min(wait, (1 - self._tokens) / self.rate_per_second)
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _release(self, throttled: bool, healthy: bool) -> None:
+        self._in_flight -= 1
+        if throttled:
+            self._counters["throttled"] += 1
+            now = time.monotonic()
+            # Stop the bucket from releasing a burst right after being throttled
+            self._tokens = min(self._tokens, 0.0)
+            if now - self._last_decrease >= self.decrease_cooldown_seconds:
+                previous = self.concurrency_limit
+                self._limit = max(float(self.min_concurrency), self._limit * self.decrease_factor)
+                self._last_decrease = now
+                self._counters["decreases"] += 1
+                self.logger.warning(
+                    f"Upstream {self.name} throttled a call; concurrency limit {previous} -> {self.concurrency_limit}"
+                )
+        elif healthy:
+            # Additive increase: about +1 per window of `limit` healthy calls.
+            # Other failures (timeouts, 404s) leave the limit unchanged.
+            self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate_per_second > 0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
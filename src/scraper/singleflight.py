@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running wait for the same result (or exception) instead of starting their own.
+    The work runs as its own task, so a waiter being cancelled does not cancel it
+    for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._counters: Dict[str, int] = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` for `key`, or join an execution already in flight for the same key.
+
+        Args:
+            key: Identity of the work.
+            fn: Coroutine factory performing the work.
+
+        Returns:
+            The result of the shared execution.
+        """
+        self._counters["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self._counters["executions"] += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Return call counters and the number of executions currently in flight."""
+        return {**self._counters, "in_flight": len(self._in_flight)}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the exception so an execution whose waiters were all cancelled
+        # does not log "Task exception was never retrieved".
+        if not task.cancelled():
+            task.exception()
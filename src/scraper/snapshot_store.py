@@ -0,0 +1,263 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Listing fields that change on every scrape without the listing itself changing
+VOLATILE_FIELDS = frozenset({"fetch_timings", "scrape_tier", "html_content"})
+
+# User activity on a listing: it changes on almost every scrape of an active app, so
+# it is kept out of the content hash and the deltas, and stored beside the version
+# instead (the latest version always has the latest activity)
+ACTIVITY_FIELDS = frozenset({"user_reviews", "developer_responses", "rating", "reviews_count", "ratings_distribution"})
+
+SNAPSHOT_KIND_FULL = "full"
+SNAPSHOT_KIND_DELTA = "delta"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    country TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    last_seen_at REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    base_id INTEGER,
+    chain_length INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    activity BLOB
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_locale ON snapshots (app_id, language, country, scraped_at);
+"""
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
+def _decode(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def content_hash(listing: Dict[str, Any]) -> str:
+    """Hash the canonical JSON form of a listing."""
+    canonical = json.dumps(listing, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def diff_listings(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Return the top-level fields that differ between two listings, with their old and new values."""
+    return {
+        field: {"from": old.get(field), "to": new.get(field)}
+        for field in sorted(set(old) | set(new))
+        if old.get(field) != new.get(field) or (field in old) != (field in new)
+    }
+
+
+class SnapshotStore:
+    """
+    A SQLite-backed, versioned store of scraped listings.
+
+    Each (app_id, language, country) has a history of versions. A scrape whose content
+    (every field but the volatile and activity ones) is identical to the latest version
+    only bumps its `last_seen_at` and replaces its activity; a changed one adds a version that
+    stores just the changed fields against the previous version, with a full copy every
+    `keyframe_interval` versions so reading a version never replays a long chain.
+    Payloads are zlib-compressed JSON.
+
+    Calls block on SQLite; run them off the event loop (e.g. `asyncio.to_thread`).
+    """
+
+    def __init__(
+        self,
+        path: str = "snapshots.db",
+        keyframe_interval: int = 10,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the SnapshotStore.
+
+        Args:
+            path: Path of the SQLite database file (created if missing).
+            keyframe_interval: Store a full copy of a listing every this many versions.
+            logger: Custom logger instance. If None, will create a new one.
+        """
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(snapshots)")}
+        if "activity" not in columns:
+            # Databases created before activity was stored separately
+            self._conn.execute("ALTER TABLE snapshots ADD COLUMN activity BLOB")
+        self._counters: Dict[str, int] = {
+            "saves": 0,
+            "versions_created": 0,
+            "duplicates": 0,
+            "reads": 0,
+        }
+
+    def save(self, listing: Dict[str, Any], scraped_at: Optional[float] = None) -> Tuple[int, bool]:
+        """
+        Record a scraped listing.
+
+        Args:
+            listing: The listing as a JSON-compatible dict; must contain app_id, language and country.
+            scraped_at: Unix time of the scrape (defaults to now).
+
+        Returns:
+            Tuple of (version id, whether a new version was created).
+        """
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        content = {k: v for k, v in listing.items() if k not in VOLATILE_FIELDS | ACTIVITY_FIELDS}
+        activity = _encode({k: v for k, v in listing.items() if k in ACTIVITY_FIELDS})
+        digest = content_hash(content)
+        key = (content["app_id"], content["language"], content["country"])
+
+        with self._lock, self._conn:
+            self._counters["saves"] += 1
+            latest = self._conn.execute(
+                "SELECT * FROM snapshots WHERE app_id = ? AND language = ? AND country = ? "
+                "ORDER BY scraped_at DESC, id DESC LIMIT 1",
+                key,
+            ).fetchone()
+
+            if latest is not None and latest["content_hash"] == digest:
+                self._conn.execute(
+                    "UPDATE snapshots SET last_seen_at = MAX(last_seen_at, ?), "
+                    "activity = CASE WHEN ? >= last_seen_at THEN ? ELSE activity END WHERE id = ?",
+                    (scraped_at, scraped_at, activity, latest["id"]),
+                )
+                self._counters["duplicates"] += 1
+                return latest["id"], False
+
+            if latest is None or latest["chain_length"] + 1 >= self.keyframe_interval:
+                kind, base_id, chain_length, payload = SNAPSHOT_KIND_FULL, None, 0, _encode(content)
+            else:
+                previous = self._load(latest["id"])
+                delta = {
+                    "set": {k: v for k, v in content.items() if k not in previous or previous[k] != v},
+                    "unset": [k for k in previous if k not in content],
+                }
+                kind, base_id, chain_length, payload = (
+                    SNAPSHOT_KIND_DELTA, latest["id"], latest["chain_length"] + 1, _encode(delta)
+                )
+
+            cursor = self._conn.execute(
+                "INSERT INTO snapshots (app_id, language, country, scraped_at, last_seen_at, "
+                "content_hash, kind, base_id, chain_length, payload, activity) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, scraped_at, scraped_at, digest, kind, base_id, chain_length, payload, activity),
+            )
+            self._counters["versions_created"] += 1
+            return cursor.lastrowid, True
+
+    def latest(self, app_id: str, language: str, country: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent version of a listing, or None if it was never stored."""
+        return self._find(
+            "WHERE app_id = ? AND language = ? AND country = ? ORDER BY scraped_at DESC, id DESC LIMIT 1",
+            (app_id, language, country),
+        )
+
+    def at(self, app_id: str, language: str, country: str, timestamp: float) -> Optional[Dict[str, Any]]:
+        """Return the version of a listing that was current at a Unix time, or None."""
+        return self._find(
+            "WHERE app_id = ? AND language = ? AND country = ? AND scraped_at <= ? "
+            "ORDER BY scraped_at DESC, id DESC LIMIT 1",
+            (app_id, language, country, timestamp),
+        )
+
+    def get_version(self, version_id: int) -> Optional[Dict[str, Any]]:
+        """Return a version by id, or None if it does not exist."""
+        return self._find("WHERE id = ?", (version_id,))
+
+    def versions(self, app_id: str, language: str, country: str) -> List[Dict[str, Any]]:
+        """Return metadata for all versions of a listing, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM snapshots WHERE app_id = ? AND language = ? AND country = ? "
+                "ORDER BY scraped_at, id",
+                (app_id, language, country),
+            ).fetchall()
+        return [self._metadata(row) for row in rows]
+
+    def diff(self, from_version: int, to_version: int) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return the field-level differences between two versions, or None if either is missing."""
+        old, new = self.get_version(from_version), self.get_version(to_version)
+        if old is None or new is None:
+            return None
+        return diff_listings(old["listing"], new["listing"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Return store counters and size."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS versions, COUNT(DISTINCT app_id || '/' || language || '/' || country) AS listings, "
+                "COALESCE(SUM(LENGTH(payload)), 0) AS payload_bytes, "
+                "COALESCE(SUM(kind = 'full'), 0) AS keyframes FROM snapshots"
+            ).fetchone()
+        return {
+            **self._counters,
+            "path": self.path,
+            "listings": row["listings"],
+            "versions": row["versions"],
+            "keyframes": row["keyframes"],
+            "payload_bytes": row["payload_bytes"],
+            "keyframe_interval": self.keyframe_interval,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _find(self, where: str, params: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._counters["reads"] += 1
+            row = self._conn.execute(f"SELECT * FROM snapshots {where}", params).fetchone()
+            if row is None:
+                return None
+            listing = self._load(row["id"])
+            if row["activity"] is not None:
+                listing.update(_decode(row["activity"]))
+            return {**self._metadata(row), "listing": listing}
+
+    def _load(self, version_id: int) -> Dict[str, Any]:
+        """Rebuild a version's content by replaying deltas from its keyframe. Caller holds the lock."""
+        chain = []
+        row = self._conn.execute("SELECT kind, base_id, payload FROM snapshots WHERE id = ?", (version_id,)).fetchone()
+        while row["kind"] == SNAPSHOT_KIND_DELTA:
+            chain.append(_decode(row["payload"]))
+            row = self._conn.execute(
+                "SELECT kind, base_id, payload FROM snapshots WHERE id = ?", (row["base_id"],)
+            ).fetchone()
+
+        listing = _decode(row["payload"])
+        for delta in reversed(chain):
+            listing.update(delta["set"])
+            for field in delta["unset"]:
+                listing.pop(field, None)
+        return listing
+
+    @staticmethod
+    def _metadata(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "version": row["id"],
+            "app_id": row["app_id"],
+            "language": row["language"],
+            "country": row["country"],
+            "scraped_at": row["scraped_at"],
+            "last_seen_at": row["last_seen_at"],
+            "content_hash": row["content_hash"],
+            "kind": row["kind"],
+        }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The scraper modules are imported flat, as in the Docker image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing main must not create a snapshot database in the working directory;
+# tests that need a store create their own
+os.environ.setdefault("SNAPSHOT_DB_PATH", "")
@@ -0,0 +1,183 @@
+import time
+import asyncio
+
+from browser_pool import BrowserPool
+
+
+class FakeContext:
+    async def route(self, pattern, handler):
+        pass
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def send(self, method):
+        self.browser.process_info_calls += 1
+        await asyncio.sleep(self.browser.process_info_delay)
+        return {"processInfo": []}
+
+    async def detach(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, process_info_delay: float):
+        self.connected = True
+        self.process_info_calls = 0
+        self.process_info_delay = process_info_delay
+
+    def is_connected(self):
+        return self.connected
+
+    def on(self, event, handler):
+        pass
+
+    async def new_context(self, **options):
+        return FakeContext()
+
+    async def new_browser_cdp_session(self):
+        return FakeSession(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self, process_info_delay: float = 0.0):
+        self.browsers = []
+        self.process_info_delay = process_info_delay
+        self.launch_delay = 0.0
+        self.launch_error = None
+
+    async def launch(self, **options):
+        await asyncio.sleep(self.launch_delay)
+        if self.launch_error is not None:
+            raise self.launch_error
+        browser = FakeBrowser(self.process_info_delay)
+        self.browsers.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self, process_info_delay: float = 0.0):
+        self.chromium = FakeChromium(process_info_delay)
+
+    async def stop(self):
+        pass
+
+
+def make_pool(process_info_delay: float = 0.0, **options) -> BrowserPool:
+    pool = BrowserPool(**options)
+    pool._playwright = FakePlaywright(process_info_delay)
+    pool._started = True
+    return pool
+
+
+def test_retiring_browser_is_recycled_under_overlapping_load():
+    pool = make_pool(max_browsers=1, max_pages_per_browser=4, max_navigations_per_browser=5, max_memory_mb=None)
+    max_live_browsers = 0
+
+    async def lease():
+        nonlocal max_live_browsers
+        async with pool.page():
+            max_live_browsers = max(max_live_browsers, sum(not slot.retiring for slot in pool._slots))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        # Staggered leases, so some page is always in use
+        tasks = []
+        for _ in range(40):
+            tasks.append(asyncio.create_task(lease()))
+            await asyncio.sleep(0.003)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert pool.browsers_recycled >= 5
+    assert max_live_browsers == 1
+    assert all(not browser.connected for browser in pool._playwright.chromium.browsers[:-1])
+
+
+def test_memory_check_runs_every_interval_outside_the_lock():
+    pool = make_pool(
+        process_info_delay=0.2, max_browsers=1, max_pages_per_browser=4,
+        max_navigations_per_browser=1000, max_memory_mb=1024, memory_check_interval=5,
+    )
+
+    async def lease():
+        async with pool.page():
+            pass
+
+    async def run():
+        for _ in range(4):
+            await lease()
+        # The fifth release checks memory; a lease meanwhile must not wait for it
+        checking = asyncio.create_task(lease())
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        await lease()
+        elapsed = time.perf_counter() - start
+        await checking
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.1
+    assert pool._playwright.chromium.browsers[0].process_info_calls == 1
+
+
+def test_browser_launch_does_not_block_other_leases():
+    pool = make_pool(max_browsers=2, max_pages_per_browser=1, max_memory_mb=None)
+    chromium = pool._playwright.chromium
+
+    async def run():
+        first = pool.page()
+        await first.__aenter__()
+        chromium.launch_delay = 0.3
+        # Needs a second browser, whose launch is slow
+        launching = asyncio.create_task(lease_for(0.0))
+        await asyncio.sleep(0.01)
+        assert [slot.launching for slot in pool._slots] == [False, True]
+
+        start = time.perf_counter()
+        await first.__aexit__(None, None, None)
+        await lease_for(0.0)
+        elapsed = time.perf_counter() - start
+        await launching
+        return elapsed
+
+    async def lease_for(seconds):
+        async with pool.page():
+            await asyncio.sleep(seconds)
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.1
+    assert len(chromium.browsers) == 2 and pool.browsers_launched == 2
+
+
+def test_failed_launch_fails_its_waiting_leases():
+    pool = make_pool(max_browsers=1, max_pages_per_browser=4, max_memory_mb=None)
+    chromium = pool._playwright.chromium
+    chromium.launch_delay = 0.05
+    chromium.launch_error = RuntimeError("no chromium")
+
+    async def lease():
+        async with pool.page():
+            pass
+
+    async def run():
+        return await asyncio.gather(lease(), lease(), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert pool._slots == [] and pool.active_pages == 0
+
+    chromium.launch_error = None
+    asyncio.run(lease())
+    assert pool.browsers_launched == 1
@@ -0,0 +1,47 @@
+import asyncio
+
+from cache import CACHE_HIT, CACHE_MISS, CACHE_STALE, FetchedValue, ListingCache
+
+
+def test_fetched_value_age_counts_towards_ttl():
+    cache = ListingCache(ttl_seconds=100, stale_seconds=50)
+    fetches = []
+
+    async def fetch_old():
+        fetches.append("old")
+        return FetchedValue("snapshot", 120)
+
+    async def fetch_fresh():
+        fetches.append("fresh")
+        return "scraped"
+
+    async def run():
+        value, status = await cache.get_or_fetch("key", fetch_old)
+        assert (value, status) == ("snapshot", CACHE_MISS)
+        # Already past its TTL, so the next lookup is stale and refreshes it
+        value, status = await cache.get_or_fetch("key", fetch_fresh)
+        assert (value, status) == ("snapshot", CACHE_STALE)
+        await asyncio.gather(*cache._background_tasks)
+        value, status = await cache.get_or_fetch("key", fetch_fresh)
+        assert (value, status) == ("scraped", CACHE_HIT)
+
+    asyncio.run(run())
+    assert fetches == ["old", "fresh"]
+
+
+def test_fetched_value_past_stale_window_is_a_miss():
+    cache = ListingCache(ttl_seconds=100, stale_seconds=50)
+
+    async def run():
+        await cache.get_or_fetch("key", lambda: asyncio.sleep(0, FetchedValue("snapshot", 200)))
+        return await cache.get_or_fetch("key", lambda: asyncio.sleep(0, "scraped"))
+
+    assert asyncio.run(run()) == ("scraped", CACHE_MISS)
+
+
+def test_lru_eviction():
+    cache = ListingCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
@@ -0,0 +1,104 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from google_play_scraper.exceptions import NotFoundError
+
+import main
+from circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+from rate_limit import RateLimitTimeout
+
+
+def http_status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://play.google.com/store/apps/details")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def wrapped(e: Exception) -> HTTPException:
+    """Raise and wrap an error the way the scraping tiers do."""
+    try:
+        try:
+            raise e
+        except Exception as inner:
+            raise HTTPException(status_code=500, detail=str(inner))
+    except HTTPException as outer:
+        return outer
+
+
+def test_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker("tier", window_size=10, min_calls=4, failure_rate_threshold=0.5, open_seconds=60)
+    for _ in range(3):
+        breaker.record_failure(10)
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure(10)
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_probe_released_by_ignored_call():
+    breaker = CircuitBreaker("tier", window_size=4, min_calls=1, open_seconds=0.05)
+    breaker.record_failure(10)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    # A second call waits for the probe...
+    assert not breaker.allow()
+    # ...unless the probe never reached the tier
+    breaker.record_ignored()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success(10)
+    assert breaker.state == STATE_CLOSED
+
+
+@pytest.mark.parametrize("error, kind", [
+    (NotFoundError("App not found(404)."), "not_found"),
+    (http_status_error(404), "not_found"),
+    (http_status_error(403), "client_error"),
+    (http_status_error(429), "throttled"),
+    (http_status_error(503), "throttled"),
+    (http_status_error(500), "other"),
+    (httpx.ReadTimeout("timed out"), "timeout"),
+    (RateLimitTimeout("queue"), "rate_limit_queue"),
+    (ValueError("Details page has no embedded listing data"), "other"),
+])
+def test_classify_error_looks_through_wrapping(error, kind):
+    assert main.classify_error(error) == kind
+    assert main.classify_error(wrapped(error)) == kind
+
+
+def run_scrapes(monkeypatch, error: Exception, count: int):
+    async def failing_tier(app_id, language, country, parts):
+        raise wrapped(error)
+
+    tiers = [(tier, failing_tier) for tier, _ in main.SCRAPE_TIERS]
+    breakers = {tier: CircuitBreaker(tier, window_size=10, min_calls=3, open_seconds=60) for tier, _ in tiers}
+    monkeypatch.setattr(main, "SCRAPE_TIERS", tiers)
+    monkeypatch.setattr(main, "tier_breakers", breakers)
+
+    async def scrape_all():
+        for _ in range(count):
+            with pytest.raises(HTTPException) as raised:
+                await main.scrape_listing("com.example.missing", "en", "US")
+            assert raised.value.status_code == (404 if main.classify_error(error) == "not_found" else 500)
+
+    asyncio.run(scrape_all())
+    return breakers
+
+
+@pytest.mark.parametrize("error", [
+    NotFoundError("App not found(404)."),
+    http_status_error(400),
+    RateLimitTimeout("queue"),
+])
+def test_errors_about_the_request_leave_breakers_closed(monkeypatch, error):
+    breakers = run_scrapes(monkeypatch, error, count=5)
+    assert all(breaker.state == STATE_CLOSED for breaker in breakers.values())
+
+
+@pytest.mark.parametrize("error", [http_status_error(503), httpx.ConnectTimeout("timed out"), ValueError("broken")])
+def test_tier_errors_open_breakers(monkeypatch, error):
+    breakers = run_scrapes(monkeypatch, error, count=3)
+    assert all(breaker.state == STATE_OPEN for breaker in breakers.values())
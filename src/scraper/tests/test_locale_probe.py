@@ -0,0 +1,87 @@
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import main
+from extractors import extract_listing_text, find_dataset_callback
+
+
+def details_dataset(title: str, short_description: str) -> list:
+    details = [None] * 74
+    details[0] = [title]
+    details[73] = [[None, short_description]]
+    return [None, [None, None, details]]
+
+
+def callback_script(key: str, data: object) -> str:
+    return f"<script nonce=\"x\">AF_initDataCallback({{key: '{key}', hash: '1', data:{json.dumps(data)}, sideChannel: {{}}}});</script>"
+
+
+def sample_page() -> str:
+    """A details page shaped like Play's: dataset keys appear in the head long before the datasets."""
+    head = (
+        "<html><head><script>var AF_initDataKeys = ['ds:0','ds:5'];"
+        "var AF_dataServiceRequests = {'ds:0' : {id:'ag2B9c',request:[]},'ds:5' : {id:'Ws7gDc',request:[]}};</script>"
+        "<title>Example</title></head><body>"
+    )
+    return (
+        head
+        + "<div>" + "filler " * 2000 + "</div>"
+        + callback_script("ds:0", [[1, 2, 3]])
+        + callback_script("ds:5", details_dataset("Example App", "Plan your week"))
+        + "<div>" + "more filler " * 2000 + "</div>"
+        + callback_script("ds:9", [[4, 5, 6]])
+        + "</body></html>"
+    )
+
+
+def test_find_dataset_callback_skips_head_mentions():
+    page = sample_page()
+    assert page.find("'ds:5'") < page.find("AF_initDataCallback({key: 'ds:5'")
+    assert find_dataset_callback(page, "ds:5") == page.find("AF_initDataCallback({key: 'ds:5'")
+    assert find_dataset_callback(page, "ds:7") == -1
+
+
+def probe(monkeypatch, page: str, chunk_size: int = 512):
+    chunks_sent = []
+
+    async def body():
+        for offset in range(0, len(page), chunk_size):
+            chunks_sent.append(offset)
+            yield page[offset:offset + chunk_size].encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body(), headers={"content-type": "text/html; charset=utf-8"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(main, "http_client", client)
+            return await main.probe_listing_text("com.example.app", "en", "US")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        monkeypatch.setattr(main, "parse_executor", executor)
+        text = asyncio.run(run())
+    return text, len(chunks_sent) * chunk_size
+
+
+def test_probe_stops_after_details_callback(monkeypatch):
+    page = sample_page()
+    text, bytes_read = probe(monkeypatch, page)
+    assert text == {"title": "Example App", "short_description": "Plan your week"}
+    assert bytes_read < page.find("AF_initDataCallback({key: 'ds:9'")
+    assert text == extract_listing_text(page)
+
+
+def test_probe_reads_whole_page_without_details_callback(monkeypatch):
+    page = sample_page().replace("key: 'ds:5'", "key: 'ds:4'")
+    text, bytes_read = probe(monkeypatch, page)
+    assert text == {"title": "Example App", "short_description": "Plan your week"}
+    assert bytes_read >= len(page)
+
+
+def test_probe_without_embedded_data_fails(monkeypatch):
+    with pytest.raises(ValueError):
+        probe(monkeypatch, "<html><head><script>var AF_dataServiceRequests = {'ds:5' : {}};</script></head></html>")
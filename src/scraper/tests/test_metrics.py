@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_metrics_endpoint_renders_prometheus_text():
+    main.tier_attempts.labels(tier="http", outcome="success").inc()
+    main.stage_duration.labels(stage="parse").observe(0.02)
+    response = TestClient(main.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'scraper_tier_attempts_total{outcome="success",tier="http"}' in body
+    assert 'scraper_stage_duration_seconds_bucket{le="0.025",stage="parse"}' in body
+    assert 'scraper_circuit_breaker_open{tier="playwright"} 0.0' in body
+    assert 'scraper_upstream_concurrency_limit{upstream="details"}' in body
+    assert "scraper_listing_cache_hit_ratio" in body
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import google_play_scraper.features.reviews as gplay_reviews
+from google_play_scraper import Sort
+
+import main
+
+
+def fake_fetch(pages: Dict[Optional[str], List]):
+    """
+    A stand-in for google-play-scraper's single-request _fetch_review_items: `pages` maps
+    a token to its successive results, each (review ids, next token) or an exception.
+    """
+    calls = []
+
+    def fetch(url, app_id, sort, count, filter_score_with, filter_device_with, pagination_token):
+        calls.append(pagination_token)
+        results = pages[pagination_token]
+        result = results.pop(0) if len(results) > 1 else results[0]
+        if isinstance(result, Exception):
+            raise result
+        review_ids, next_token = result
+        return [[review_id, None, 5, None, "text"] for review_id in review_ids], next_token
+
+    return fetch, calls
+
+
+def harvest(monkeypatch, pages, **request_fields):
+    fetch, calls = fake_fetch(pages)
+    monkeypatch.setattr(main, "_fetch_review_items", fetch)
+    monkeypatch.setattr(main, "REVIEWS_RETRY_DELAY_SECONDS", 0)
+    request = main.ReviewHarvestRequest(app_id="com.example.app", language="en", country="US", **request_fields)
+
+    async def run():
+        return [batch async for batch in main.harvest_reviews("com.example.app", request)]
+
+    return asyncio.run(run()), calls
+
+
+def test_failed_fetch_ends_stream_with_error_and_token(monkeypatch):
+    batches, calls = harvest(monkeypatch, {None: [(["a", "b"], "t1")], "t1": [ConnectionError("reset")]})
+    assert [len(batch.reviews) for batch in batches] == [2, 0]
+    last = batches[-1]
+    assert last.done and last.error
+    assert last.continuation_token == "t1"
+    assert calls == [None] + ["t1"] * (main.REVIEWS_PAGE_RETRIES + 1)
+
+
+def test_short_page_is_not_topped_up_by_a_failing_fetch(monkeypatch):
+    # reviews() would fetch again to fill the short page, swallow that fetch's error
+    # and return the page without a token, as if the stream had ended
+    pages = {None: [(["a", "b"], "t1")], "t1": [ConnectionError("reset")]}
+    fetch, _ = fake_fetch({token: list(results) for token, results in pages.items()})
+    monkeypatch.setattr(gplay_reviews, "_fetch_review_items", fetch)
+    page, token = gplay_reviews.reviews("com.example.app", count=3)
+    assert len(page) == 2 and token.token is None
+
+    batches, calls = harvest(monkeypatch, pages, batch_size=3)
+    assert batches[0].continuation_token == "t1" and not batches[0].done
+    assert batches[-1].error and batches[-1].continuation_token == "t1"
+
+
+def test_failed_fetch_is_retried(monkeypatch):
+    batches, _ = harvest(monkeypatch, {
+        None: [(["a", "b"], "t1")],
+        "t1": [ConnectionError("reset"), (["c"], None)],
+    })
+    assert [batch.error for batch in batches] == [None, None]
+    assert batches[-1].done and batches[-1].continuation_token is None
+    assert batches[-1].total_harvested == 3
+    assert batches[-1].reviews[0]["review_id"] == "c" and batches[-1].reviews[0]["text"] == "text"
+
+
+def test_stream_without_reviews_ends_cleanly(monkeypatch):
+    batches, calls = harvest(monkeypatch, {None: [([], None)]})
+    assert len(batches) == 1 and batches[0].done and batches[0].error is None
+    assert calls == [None]
+
+
+def test_resumed_stream_keeps_its_token_on_failure(monkeypatch):
+    batches, _ = harvest(monkeypatch, {"t5": [ConnectionError("reset")]}, continuation_tokens={"newest:all": "t5"})
+    assert batches[-1].error and batches[-1].continuation_token == "t5"
+
+
+def test_max_reviews_caps_unique_reviews(monkeypatch):
+    batches, _ = harvest(monkeypatch, {None: [(["a", "b", "c"], "t1")], "t1": [(["c", "d", "e"], None)]}, max_reviews=4)
+    assert batches[-1].done and batches[-1].total_harvested == 4
+    assert [review["review_id"] for batch in batches for review in batch.reviews] == ["a", "b", "c", "d"]
+
+
+def test_fetch_review_page_makes_a_single_request(monkeypatch):
+    fetch, calls = fake_fetch({"t1": [(["a"], "t2")]})
+    monkeypatch.setattr(main, "_fetch_review_items", fetch)
+    token = gplay_reviews._ContinuationToken("t1", "en", "US", Sort.NEWEST.value, 100, None, None)
+    page, next_token = main.fetch_review_page("com.example.app", "en", "US", Sort.NEWEST, 100, None, token)
+    assert [review["reviewId"] for review in page] == ["a"]
+    assert next_token.token == "t2" and calls == ["t1"]
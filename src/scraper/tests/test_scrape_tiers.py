@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+import main
+from cache import ListingCache
+from circuit_breaker import CircuitBreaker
+
+
+def make_listing(**fields):
+    return main.AppListing(
+        app_id="com.example.app", language="en", country="US",
+        url="https://play.google.com/store/apps/details?id=com.example.app&hl=en&gl=US",
+        title="Example", developer="Example Inc.", icon_url="https://example.com/icon.png",
+        **fields
+    )
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    """Replace the scraping tiers with fakes; returns the tiers each scrape called, in order."""
+    calls = []
+    behaviours = {}
+
+    def tier(name):
+        async def scrape(app_id, language, country, parts):
+            calls.append(name)
+            result = behaviours[name](parts)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return scrape
+
+    monkeypatch.setattr(main, "SCRAPE_TIERS", [(name, tier(name)) for name, _ in main.SCRAPE_TIERS])
+    monkeypatch.setattr(main, "tier_breakers", {name: CircuitBreaker(name) for name, _ in main.SCRAPE_TIERS})
+    monkeypatch.setattr(main, "listing_cache", ListingCache(ttl_seconds=100, stale_seconds=50))
+    monkeypatch.setattr(main, "snapshot_store", None)
+    return calls, behaviours
+
+
+def test_html_request_skips_the_gplay_tier(tiers):
+    calls, behaviours = tiers
+    behaviours["google_play_scraper"] = lambda parts: make_listing()
+    behaviours["http"] = lambda parts: make_listing(html_content="<html>page</html>" if "html" in parts else None)
+
+    async def run():
+        parts = frozenset({"html"})
+        first, _ = await main.get_listing("com.example.app", "en", "US", parts=parts)
+        cached, _ = await main.get_listing("com.example.app", "en", "US", parts=parts)
+        plain, _ = await main.get_listing("com.example.app", "en", "US")
+        return first, cached, plain
+
+    first, cached, plain = asyncio.run(run())
+    assert first.html_content == "<html>page</html>" and first.scrape_tier == "http"
+    assert cached.html_content == "<html>page</html>"
+    assert plain.scrape_tier == "google_play_scraper"
+    assert calls == ["http", "google_play_scraper"]
+
+
+def test_not_found_ends_the_scrape_with_404(tiers):
+    from fastapi import HTTPException
+    from google_play_scraper.exceptions import NotFoundError
+
+    calls, behaviours = tiers
+    behaviours["google_play_scraper"] = lambda parts: NotFoundError("App not found(404).")
+    behaviours["http"] = behaviours["playwright"] = lambda parts: AssertionError("later tiers must not run")
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(HTTPException) as raised:
+                await main.get_listing("com.example.missing", "en", "US")
+            assert raised.value.status_code == 404
+
+    asyncio.run(run())
+    assert calls == ["google_play_scraper"] * 3
+    assert main.tier_breakers["google_play_scraper"].state == "closed"
+
+
+def test_scrape_endpoint_returns_404_for_a_missing_app(tiers):
+    from fastapi.testclient import TestClient
+    from google_play_scraper.exceptions import NotFoundError
+
+    calls, behaviours = tiers
+    behaviours["google_play_scraper"] = lambda parts: NotFoundError("App not found(404).")
+    response = TestClient(main.app).post("/scrape", json={
+        "url": "https://play.google.com/store/apps/details?id=com.example.missing", "language": "en", "country": "US",
+    })
+    assert response.status_code == 404
+    assert calls == ["google_play_scraper"]
+
+
+def test_forced_refresh_does_not_join_a_non_forced_fetch(monkeypatch):
+    monkeypatch.setattr(main, "listing_cache", ListingCache(ttl_seconds=100, stale_seconds=50))
+    fetches = []
+
+    async def fetch_listing(listing_key, parts, force_refresh=False):
+        fetches.append(force_refresh)
+        await asyncio.sleep(0.05)
+        listing = make_listing()
+        listing.scrape_tier = "google_play_scraper" if force_refresh else "snapshot"
+        return main.FetchedValue(listing, 0.0)
+
+    monkeypatch.setattr(main, "fetch_listing", fetch_listing)
+
+    async def run():
+        return await asyncio.gather(
+            main.get_listing("com.example.app", "en", "US"),
+            main.get_listing("com.example.app", "en", "US"),
+            main.get_listing("com.example.app", "en", "US", force_refresh=True),
+        )
+
+    (plain, _), (joined, _), (forced, _) = asyncio.run(run())
+    assert sorted(fetches) == [False, True]
+    assert plain.scrape_tier == joined.scrape_tier == "snapshot"
+    assert forced.scrape_tier == "google_play_scraper"
+
+
+def test_locale_probes_use_the_lookup_cache(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, "listing_cache", ListingCache(ttl_seconds=100, stale_seconds=50))
+    monkeypatch.setattr(main, "lookup_cache", ListingCache(ttl_seconds=100, stale_seconds=50))
+
+    async def probe_listing_text(app_id, language, country):
+        return {"title": "Example", "short_description": f"{language} text"}
+
+    monkeypatch.setattr(main, "probe_listing_text", probe_listing_text)
+    response = TestClient(main.app).post("/locale-divergence", json={
+        "app_id": "com.example.app", "locales": ["pt-BR"],
+    })
+    assert response.status_code == 200, response.text
+    assert main.listing_cache.stats()["size"] == 0
+    assert main.lookup_cache.stats()["size"] == 2
+    assert main.listing_cache.stats()["misses"] == 0
@@ -0,0 +1,118 @@
+import pytest
+
+from snapshot_store import SNAPSHOT_KIND_DELTA, SNAPSHOT_KIND_FULL, SnapshotStore
+
+
+def listing(**fields):
+    return {"app_id": "com.example.app", "language": "en", "country": "US", "title": "Example", **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"), keyframe_interval=3)
+    yield store
+    store.close()
+
+
+def test_delta_round_trip_across_keyframes(store):
+    versions = [
+        listing(rating=4.1, installs="1,000+", screenshots=["a.png"]),
+        listing(rating=4.2, installs="1,000+", screenshots=["a.png", "b.png"]),
+        listing(rating=4.2, screenshots=["b.png"]),  # installs removed
+        listing(rating=4.3, installs="5,000+", screenshots=["b.png"], video="v.mp4"),
+        listing(rating=4.4, installs="5,000+", screenshots=[]),
+    ]
+    ids = []
+    for scraped_at, version in enumerate(versions, start=1):
+        version_id, created = store.save({**version, "fetch_timings": {"page": scraped_at}}, scraped_at=scraped_at)
+        assert created
+        ids.append(version_id)
+
+    kinds = [meta["kind"] for meta in store.versions("com.example.app", "en", "US")]
+    assert kinds == [SNAPSHOT_KIND_FULL, SNAPSHOT_KIND_DELTA, SNAPSHOT_KIND_DELTA, SNAPSHOT_KIND_FULL, SNAPSHOT_KIND_DELTA]
+    for version_id, version in zip(ids, versions):
+        assert store.get_version(version_id)["listing"] == version
+    assert store.at("com.example.app", "en", "US", 3.5)["listing"] == versions[2]
+    assert store.diff(ids[1], ids[2]) == {
+        "installs": {"from": "1,000+", "to": None},
+        "screenshots": {"from": ["a.png", "b.png"], "to": ["b.png"]},
+    }
+
+
+def test_identical_scrape_only_bumps_last_seen(store):
+    first_id, _ = store.save({**listing(), "scrape_tier": "http"}, scraped_at=10)
+    second_id, created = store.save({**listing(), "scrape_tier": "playwright"}, scraped_at=20)
+    assert second_id == first_id and not created
+    latest = store.latest("com.example.app", "en", "US")
+    assert (latest["scraped_at"], latest["last_seen_at"]) == (10, 20)
+
+
+def test_review_and_rating_churn_does_not_create_versions(store):
+    first_id, _ = store.save(listing(rating=4.1, reviews_count=10, user_reviews=[{"id": "a"}]), scraped_at=10)
+    second_id, created = store.save(listing(rating=4.2, reviews_count=12, user_reviews=[{"id": "b"}]), scraped_at=20)
+    assert second_id == first_id and not created
+    latest = store.latest("com.example.app", "en", "US")
+    assert latest["listing"]["rating"] == 4.2 and latest["listing"]["user_reviews"] == [{"id": "b"}]
+
+    # An older scrape saved late does not overwrite newer activity
+    store.save(listing(rating=4.0, reviews_count=9, user_reviews=[]), scraped_at=15)
+    assert store.latest("com.example.app", "en", "US")["listing"]["rating"] == 4.2
+
+    third_id, created = store.save(listing(title="Renamed", rating=4.3), scraped_at=30)
+    assert created
+    assert store.diff(first_id, third_id)["title"] == {"from": "Example", "to": "Renamed"}
+    assert store.get_version(first_id)["listing"]["rating"] == 4.2
+
+
+def test_database_without_activity_column_is_upgraded(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, app_id TEXT NOT NULL, language TEXT NOT NULL, "
+        "country TEXT NOT NULL, scraped_at REAL NOT NULL, last_seen_at REAL NOT NULL, content_hash TEXT NOT NULL, "
+        "kind TEXT NOT NULL, base_id INTEGER, chain_length INTEGER NOT NULL, payload BLOB NOT NULL);"
+    )
+    conn.close()
+    store = SnapshotStore(path)
+    store.save(listing(rating=4.0), scraped_at=1)
+    assert store.latest("com.example.app", "en", "US")["listing"] == listing(rating=4.0)
+    store.close()
+
+
+def test_warm_snapshot_is_cached_with_its_real_age(store, monkeypatch):
+    import time
+    import asyncio
+
+    import main
+    from cache import CACHE_HIT, CACHE_STALE, ListingCache
+
+    app_listing = main.AppListing(
+        app_id="com.example.app", language="en", country="US",
+        url="https://play.google.com/store/apps/details?id=com.example.app&hl=en&gl=US",
+        title="Example", developer="Example Inc.", icon_url="https://example.com/icon.png",
+    )
+    store.save(app_listing.model_dump(mode="json"), scraped_at=time.time() - 80)
+    monkeypatch.setattr(main, "snapshot_store", store)
+    monkeypatch.setattr(main, "SNAPSHOT_WARM_SECONDS", 90)
+    monkeypatch.setattr(main, "LISTING_CACHE_TTL_SECONDS", 100)
+    monkeypatch.setattr(main, "listing_cache", ListingCache(ttl_seconds=100, stale_seconds=50))
+
+    async def scrape_listing(*args):
+        raise AssertionError("a warm snapshot must not be scraped")
+
+    monkeypatch.setattr(main, "scrape_listing", scrape_listing)
+
+    async def run():
+        first, _ = await main.get_listing("com.example.app", "en", "US")
+        assert first.scrape_tier == "snapshot"
+        assert (await main.get_listing("com.example.app", "en", "US"))[1] == CACHE_HIT
+        # 80s old at insertion: expired 20s later, not TTL seconds later
+        for entry in main.listing_cache._entries.values():
+            entry.stored_at -= 25
+        _, status = await main.get_listing("com.example.app", "en", "US")
+        main.listing_cache._background_tasks.clear()
+        return status
+
+    assert asyncio.run(run()) == CACHE_STALE